@@ -7,7 +7,7 @@ from __future__ import absolute_import, unicode_literals
 
 from consent.api import permissions
 from consent.errors import ConsentAPIRequestError
-from consent.helpers import get_data_sharing_consent
+from consent.helpers import get_data_sharing_consent, get_data_sharing_consents
 from edx_rest_framework_extensions.authentication import BearerAuthentication, JwtAuthentication
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.response import Response
@@ -125,6 +125,15 @@ class DataSharingConsentView(APIView):
         Get an HTTPResponse that can be used when there's no related EnterpriseCustomer.
         """
         username, course_id, program_uuid, enterprise_customer_uuid = self.get_required_query_params(request)
+        return Response(
+            self.get_no_record_data(username, course_id, program_uuid, enterprise_customer_uuid),
+            status=HTTP_200_OK
+        )
+
+    def get_no_record_data(self, username, course_id, program_uuid, enterprise_customer_uuid):
+        """
+        Get the serialized consent data to use when there's no related EnterpriseCustomer.
+        """
         data = {
             self.REQUIRED_PARAM_USERNAME: username,
             self.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: enterprise_customer_uuid,
@@ -138,7 +147,7 @@ class DataSharingConsentView(APIView):
         if program_uuid:
             data[self.REQUIRED_PARAM_PROGRAM_UUID] = program_uuid
 
-        return Response(data, status=HTTP_200_OK)
+        return data
 
     def get(self, request):
         """
@@ -235,3 +244,127 @@ class DataSharingConsentView(APIView):
             return Response({'error': str(invalid_request)}, status=HTTP_400_BAD_REQUEST)
 
         return Response(consent_record.serialize())
+
+
+class DataSharingConsentBatchView(DataSharingConsentView):
+    """
+        **Use Cases**
+
+            Get the data sharing consent state of many courses and programs,
+            for one or more users, in a single request.
+
+        **Behavior**
+
+            Implements GET, which accepts the same parameters as the GET
+            handler of ``DataSharingConsentView``, except that ``username``,
+            ``course_id`` and ``program_uuid`` may each be a comma-separated
+            list of values:
+
+            GET /consent/api/v1/data_sharing_consent/batch?username=bob&enterprise_customer_uuid=ENTERPRISE-UUID
+                &course_id=ID1,ID2&program_uuid=UUID
+            >>> {
+            >>>     "enterprise_customer_uuid": "enterprise-uuid-goes-right-here",
+            >>>     "results": {
+            >>>         "bob": {
+            >>>             "ID1": {"username": "bob", "course_id": "ID1", ...},
+            >>>             "ID2": {"username": "bob", "course_id": "ID2", ...},
+            >>>             "UUID": {"username": "bob", "program_uuid": "UUID", ...}
+            >>>         }
+            >>>     }
+            >>> }
+
+            Each result is the body the GET handler of ``DataSharingConsentView``
+            would return for that user and course or program. Users who are not
+            staff may only request their own consent state.
+
+    """
+
+    http_method_names = ['get', 'head', 'options']
+
+    LIST_SEPARATOR = ','
+
+    def get_required_query_params(self, request):
+        """
+        Gets the lists of ``username``, ``course_id`` and ``program_uuid``, and the ``enterprise_customer_uuid``,
+        which are the relevant query parameters for this API endpoint.
+
+        :param request: The request to this endpoint.
+        :return: The ``username``, ``course_id`` and ``program_uuid`` lists, and the ``enterprise_customer_uuid``
+            from the request.
+        """
+        username, course_id, program_uuid, enterprise_customer_uuid = super(
+            DataSharingConsentBatchView, self
+        ).get_required_query_params(request)
+        return (
+            self.split_query_param(username),
+            self.split_query_param(course_id),
+            self.split_query_param(program_uuid),
+            enterprise_customer_uuid,
+        )
+
+    def split_query_param(self, value):
+        """
+        Split a comma-separated query parameter into a list of unique values, preserving their order.
+        """
+        values = []
+        for item in value.split(self.LIST_SEPARATOR):
+            item = item.strip()
+            if item and item not in values:
+                values.append(item)
+        return values
+
+    def get(self, request):
+        """
+        GET /consent/api/v1/data_sharing_consent/batch?username=bob&course_id=id1,id2&enterprise_customer_uuid=uuid
+        *username*
+            Comma-separated list of the edX usernames from whom to get consent.
+        *course_id*
+            Comma-separated list of the courses for which consent is granted.
+        *program_uuid*
+            Comma-separated list of the programs for which consent is granted.
+        *enterprise_customer_uuid*
+            The UUID of the enterprise customer that requires consent.
+        """
+        try:
+            usernames, course_ids, program_uuids, enterprise_customer_uuid = self.get_required_query_params(request)
+        except ConsentAPIRequestError as invalid_request:
+            return Response({'error': str(invalid_request)}, status=HTTP_400_BAD_REQUEST)
+
+        consent_records = get_data_sharing_consents(
+            usernames,
+            enterprise_customer_uuid,
+            course_ids=course_ids,
+            program_uuids=program_uuids,
+        ) or {}
+
+        results = {}
+        for username in usernames:
+            results[username] = {}
+            for course_id in course_ids:
+                results[username][course_id] = self.serialize_consent_record(
+                    consent_records.get((username, course_id)), username, enterprise_customer_uuid, course_id=course_id
+                )
+            for program_uuid in program_uuids:
+                results[username][program_uuid] = self.serialize_consent_record(
+                    consent_records.get((username, program_uuid)),
+                    username,
+                    enterprise_customer_uuid,
+                    program_uuid=program_uuid,
+                )
+
+        return Response(
+            {
+                self.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: enterprise_customer_uuid,
+                'results': results,
+            },
+            status=HTTP_200_OK
+        )
+
+    def serialize_consent_record(self, consent_record, username, enterprise_customer_uuid, course_id='',
+                                 program_uuid=''):
+        """
+        Serialize the given consent record, or the data to use when there's no consent record.
+        """
+        if consent_record is None:
+            return self.get_no_record_data(username, course_id, program_uuid, enterprise_customer_uuid)
+        return consent_record.serialize()
@@ -5,6 +5,7 @@ Helper functions for the Consent application.
 
 from __future__ import absolute_import, unicode_literals
 
+from consent.lookups import BatchConsentLookups
 from consent.models import ProxyDataSharingConsent
 
 from django.apps import apps
@@ -62,8 +63,63 @@ def get_program_data_sharing_consent(username, program_uuid, enterprise_customer
     enterprise_customer = get_enterprise_customer(enterprise_customer_uuid)
     discovery_client = CourseCatalogApiServiceClient(enterprise_customer.site)
     course_ids = discovery_client.get_program_course_keys(program_uuid)
-    child_consents = (
-        get_data_sharing_consent(username, enterprise_customer_uuid, course_id=individual_course_id)
-        for individual_course_id in course_ids
+    # Prevent circular imports.
+    DataSharingConsent = apps.get_model('consent', 'DataSharingConsent')  # pylint: disable=invalid-name
+    lookups = [(username, individual_course_id, enterprise_customer) for individual_course_id in course_ids]
+    child_consents = DataSharingConsent.objects.proxied_get_many(lookups)
+    return ProxyDataSharingConsent.from_children(program_uuid, *(child_consents[lookup] for lookup in lookups))
+
+
+def get_data_sharing_consents(usernames, enterprise_customer_uuid, course_ids=(), program_uuids=()):
+    """
+    Get the data sharing consent objects associated with many users of an enterprise customer, for many courses
+    and programs.
+
+    All the course consent records are fetched in a single query, and the courses of each program are fetched
+    from the discovery service once for all the users. The returned consent objects share their enrollment and
+    catalog lookups, see ``BatchConsentLookups``.
+
+    :param usernames: The users that grant consent.
+    :param enterprise_customer_uuid: The consent requester.
+    :param course_ids (optional): The courses to which consent may be related.
+    :param program_uuids (optional): The programs to which consent may be related.
+    :return: A dict mapping (username, course_id or program_uuid) to the data sharing consent object, which is None
+        for programs without courses, or None if the enterprise customer for the given UUID does not exist.
+    """
+    enterprise_customer = get_enterprise_customer(enterprise_customer_uuid)
+    if enterprise_customer is None:
+        return None
+
+    program_course_ids = {}
+    if program_uuids:
+        discovery_client = CourseCatalogApiServiceClient(enterprise_customer.site)
+        program_course_ids = {
+            program_uuid: discovery_client.get_program_course_keys(program_uuid)
+            for program_uuid in program_uuids
+        }
+
+    # Prevent circular imports.
+    DataSharingConsent = apps.get_model('consent', 'DataSharingConsent')  # pylint: disable=invalid-name
+    all_course_ids = set(course_ids).union(*program_course_ids.values())
+    course_consents = DataSharingConsent.objects.proxied_get_many(
+        (username, course_id, enterprise_customer) for username in usernames for course_id in all_course_ids
     )
-    return ProxyDataSharingConsent.from_children(program_uuid, *child_consents)
+
+    shared_lookups = BatchConsentLookups(enterprise_customer, list(course_consents.values()))
+    for consent in course_consents.values():
+        consent.share_lookups(shared_lookups)
+
+    consents = {}
+    for username in usernames:
+        for course_id in course_ids:
+            consents[(username, course_id)] = course_consents[(username, course_id, enterprise_customer)]
+        for program_uuid in program_uuids:
+            consents[(username, program_uuid)] = ProxyDataSharingConsent.from_children(
+                program_uuid,
+                *(
+                    course_consents[(username, course_id, enterprise_customer)]
+                    for course_id in program_course_ids[program_uuid]
+                )
+            )
+    return consents
+
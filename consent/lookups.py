@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Lookups shared by the consent records of an Enterprise Customer which are evaluated together.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+from collections import Counter
+
+from django.contrib.auth.models import User
+
+from enterprise.models import EnterpriseCourseEnrollment
+
+
+class ConsentLookups(object):
+    """
+    Memoize the user, enrollment and catalog lookups needed to evaluate consent records of an Enterprise Customer.
+
+    Consent records sharing an instance, such as the course consent records of a program, only look up each
+    user, enrollment and course catalog membership once. The number of lookups actually performed is counted in
+    ``counts``, under the ``user_queries``, ``enrollment_queries`` and ``catalog_lookups`` keys; each catalog
+    lookup makes at least one request to the discovery service.
+    """
+
+    def __init__(self, enterprise_customer):
+        """
+        Initialize empty lookups for the given Enterprise Customer.
+        """
+        self.enterprise_customer = enterprise_customer
+        self.user_ids = {}
+        self.enrollments = {}
+        self.catalog_membership = {}
+        self.counts = Counter()
+
+    def get_user_id(self, username):
+        """
+        Get the ID of the user with the given username, or None if there is no such user.
+        """
+        if username not in self.user_ids:
+            self.counts['user_queries'] += 1
+            self.user_ids[username] = User.objects.filter(username=username).values_list('id', flat=True).first()
+        return self.user_ids[username]
+
+    def enterprise_enrollment_exists(self, username, course_id):
+        """
+        Determine whether the user is enrolled in the course through the Enterprise Customer.
+        """
+        if (username, course_id) not in self.enrollments:
+            user_id = self.get_user_id(username)
+            if user_id is None:
+                self.enrollments[(username, course_id)] = False
+            else:
+                self.counts['enrollment_queries'] += 1
+                self.enrollments[(username, course_id)] = EnterpriseCourseEnrollment.objects.filter(
+                    course_id=course_id,
+                    enterprise_customer_user__user_id=user_id,
+                    enterprise_customer_user__enterprise_customer=self.enterprise_customer,
+                ).exists()
+        return self.enrollments[(username, course_id)]
+
+    def catalog_contains_course(self, course_id):
+        """
+        Determine whether the course is in one of the Enterprise Customer's catalogs.
+        """
+        if course_id not in self.catalog_membership:
+            self.counts['catalog_lookups'] += 1
+            self.catalog_membership[course_id] = self.enterprise_customer.catalog_contains_course(course_id)
+        return self.catalog_membership[course_id]
+
+
+class BatchConsentLookups(ConsentLookups):
+    """
+    Consent lookups which fetch the users and enterprise enrollments of many consent records up front.
+    """
+
+    def __init__(self, enterprise_customer, consents):
+        """
+        Fetch the users and enterprise enrollments related to the given consent records.
+        """
+        super(BatchConsentLookups, self).__init__(enterprise_customer)
+
+        usernames = {consent.username for consent in consents}
+        course_ids = {consent.course_id for consent in consents if consent.course_id}
+        if not (usernames and course_ids):
+            return
+
+        self.counts['user_queries'] += 1
+        self.user_ids = dict.fromkeys(usernames)
+        self.user_ids.update(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+        self.counts['enrollment_queries'] += 1
+        enrolled = set(EnterpriseCourseEnrollment.objects.filter(
+            course_id__in=course_ids,
+            enterprise_customer_user__user_id__in=[user_id for user_id in self.user_ids.values() if user_id],
+            enterprise_customer_user__enterprise_customer=enterprise_customer,
+        ).values_list('enterprise_customer_user__user_id', 'course_id'))
+        self.enrollments = {
+            (username, course_id): (user_id, course_id) in enrolled
+            for username, user_id in self.user_ids.items()
+            for course_id in course_ids
+        }
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consent', '0003_historicaldatasharingconsent_history_change_reason'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='datasharingconsent',
+            index_together=set([('enterprise_customer', 'username', 'granted')]),
+        ),
+    ]
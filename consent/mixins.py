@@ -5,10 +5,13 @@ Mixins for edX Enterprise's Consent application.
 
 from __future__ import absolute_import, unicode_literals
 
-from django.contrib.auth.models import User
+from logging import getLogger
+
+from consent.lookups import ConsentLookups
+
 from django.utils.encoding import python_2_unicode_compatible
 
-from enterprise.models import EnterpriseCourseEnrollment
+LOGGER = getLogger(__name__)
 
 
 @python_2_unicode_compatible
@@ -17,6 +20,9 @@ class ConsentModelMixin(object):
     A mixin for Data Sharing Consent classes that require common, reusable functionality.
     """
 
+    # Lookups shared by consent records which are evaluated together, see ``consent.lookups.ConsentLookups``.
+    shared_lookups = None
+
     def __str__(self):
         """
         Return a human-readable string representation.
@@ -46,24 +52,39 @@ class ConsentModelMixin(object):
 
         return bool(
             (self.enterprise_customer.enforces_data_sharing_consent('at_enrollment')) and
-            (self.enterprise_customer.catalog_contains_course(self.course_id))
+            (self.catalog_contains_course)
         )
 
+    @property
+    def catalog_contains_course(self):
+        """
+        Determine whether the course of this consent record is in one of the Enterprise Customer's catalogs.
+        """
+        return self.get_shared_lookups().catalog_contains_course(self.course_id)
+
+    def get_shared_lookups(self):
+        """
+        Get the lookups this consent record shares with the records evaluated along with it, creating them if needed.
+        """
+        if self.shared_lookups is None:
+            self.share_lookups(ConsentLookups(self.enterprise_customer))
+        return self.shared_lookups
+
+    def share_lookups(self, shared_lookups):
+        """
+        Make this consent record, and its child consent records, use the given lookups.
+        """
+        self.shared_lookups = shared_lookups
+        for child in getattr(self, '_child_consents', []):
+            child.share_lookups(shared_lookups)
+
     @property
     def enterprise_enrollment_exists(self):
         """
         Determine whether there exists an EnterpriseCourseEnrollment related to this consent record.
         """
         if self.course_id:
-            try:
-                user_id = User.objects.get(username=self.username).pk
-            except User.DoesNotExist:
-                return False
-            return EnterpriseCourseEnrollment.objects.filter(
-                course_id=self.course_id,
-                enterprise_customer_user__user_id=user_id,
-                enterprise_customer_user__enterprise_customer=self.enterprise_customer,
-            ).exists()
+            return self.get_shared_lookups().enterprise_enrollment_exists(self.username, self.course_id)
         return False
 
     @property
@@ -103,4 +124,13 @@ class ConsentModelMixin(object):
             details['course_id'] = self.course_id
         if getattr(self, 'program_uuid', None):
             details['program_uuid'] = self.program_uuid
+
+        counts = self.get_shared_lookups().counts
+        LOGGER.debug(
+            'Serialized %r using %d user queries, %d enrollment queries and %d catalog lookups so far.',
+            self,
+            counts['user_queries'],
+            counts['enrollment_queries'],
+            counts['catalog_lookups'],
+        )
         return details
@@ -6,6 +6,7 @@ Models for edX Enterprise's Consent application.
 from __future__ import absolute_import, unicode_literals
 
 from consent.errors import InvalidProxyConsent
+from consent.lookups import ConsentLookups
 from consent.mixins import ConsentModelMixin
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
@@ -59,6 +60,72 @@ class DataSharingConsentQuerySet(models.query.QuerySet):
         except DataSharingConsent.DoesNotExist:
             return ProxyDataSharingConsent(**original_kwargs)
 
+    # Maximum number of usernames, and of course IDs, filtered on in each query of ``proxied_get_many``, which keeps
+    # the queries under the maximum number of parameters of the database (999 for SQLite).
+    LOOKUP_BATCH_SIZE = 400
+
+    def proxied_get_many(self, lookups):
+        """
+        Perform ``proxied_get`` for many (username, course_id, enterprise_customer) triples at once.
+
+        The records for all the given course runs, and for the courses they belong to, are fetched for each
+        enterprise customer, in batches of at most ``LOOKUP_BATCH_SIZE`` course IDs. They are filtered on the
+        usernames looked up, unless there are more than ``LOOKUP_BATCH_SIZE`` of them, in which case all the records
+        of the enterprise customer for those courses are fetched instead. The records are resolved the same way
+        ``proxied_get`` does: a record for the course run takes precedence over a record for its course. A
+        ``ProxyDataSharingConsent`` object is returned for the triples which have neither.
+
+        :param lookups: An iterable of (username, course_id, enterprise_customer) tuples, where
+            ``enterprise_customer`` is an ``EnterpriseCustomer`` instance.
+        :return: A dict mapping each of the given tuples to its ``DataSharingConsent`` or
+            ``ProxyDataSharingConsent`` object.
+        """
+        candidate_course_ids = {}
+        for lookup in lookups:
+            course_id = lookup[1]
+            candidates = [course_id]
+            try:
+                # Check if we have a course ID or a course run ID
+                course_run_key = str(CourseKey.from_string(course_id))
+            except InvalidKeyError:
+                pass
+            else:
+                candidates.append(get_course_id_from_course_run_id(course_run_key))
+            candidate_course_ids[lookup] = candidates
+
+        lookups_by_enterprise_customer = {}
+        for (username, __, enterprise_customer), candidates in candidate_course_ids.items():
+            usernames, course_ids = lookups_by_enterprise_customer.setdefault(enterprise_customer.pk, (set(), set()))
+            usernames.add(username)
+            course_ids.update(candidates)
+
+        records = {}
+        for enterprise_customer_id, (usernames, course_ids) in lookups_by_enterprise_customer.items():
+            queryset = self.filter(enterprise_customer=enterprise_customer_id)
+            if len(usernames) <= self.LOOKUP_BATCH_SIZE:
+                queryset = queryset.filter(username__in=usernames)
+            course_ids = sorted(course_ids)
+            for start in range(0, len(course_ids), self.LOOKUP_BATCH_SIZE):
+                for record in queryset.filter(course_id__in=course_ids[start:start + self.LOOKUP_BATCH_SIZE]):
+                    if record.username in usernames:
+                        records[(record.username, record.course_id, enterprise_customer_id)] = record
+
+        consents = {}
+        for lookup, candidates in candidate_course_ids.items():
+            username, course_id, enterprise_customer = lookup
+            for candidate in candidates:
+                record = records.get((username, candidate, enterprise_customer.pk))
+                if record is not None:
+                    consents[lookup] = record
+                    break
+            else:
+                consents[lookup] = ProxyDataSharingConsent(
+                    enterprise_customer=enterprise_customer,
+                    username=username,
+                    course_id=course_id,
+                )
+        return consents
+
 
 class DataSharingConsentManager(models.Manager.from_queryset(DataSharingConsentQuerySet)):  # pylint: disable=no-member
     """
@@ -125,7 +192,6 @@ class ProxyDataSharingConsent(ConsentModelMixin):
         if not children or any(child is None for child in children):
             return None
         granted = all((child.granted for child in children))
-        exists = any((child.exists for child in children))
         usernames = set([child.username for child in children])
         enterprises = set([child.enterprise_customer for child in children])
         if not len(usernames) == len(enterprises) == 1:
@@ -135,7 +201,17 @@ class ProxyDataSharingConsent(ConsentModelMixin):
             )
         username = children[0].username
         enterprise_customer = children[0].enterprise_customer
-        return cls(
+
+        # Evaluate all the children with the same lookups, so that the user and the catalogs are only looked up once.
+        shared_lookups = next(
+            (child.shared_lookups for child in children if child.shared_lookups is not None),
+            None
+        ) or ConsentLookups(enterprise_customer)
+        for child in children:
+            child.share_lookups(shared_lookups)
+
+        exists = any((child.exists for child in children))
+        proxy_consent = cls(
             enterprise_customer=enterprise_customer,
             username=username,
             program_uuid=program_uuid,
@@ -143,6 +219,8 @@ class ProxyDataSharingConsent(ConsentModelMixin):
             granted=granted,
             child_consents=children
         )
+        proxy_consent.share_lookups(shared_lookups)
+        return proxy_consent
 
     def commit(self):
         """
@@ -230,6 +308,7 @@ class DataSharingConsent(ConsentModelMixin, Consent):  # pylint: disable=model-m
         verbose_name = _("Data Sharing Consent Record")
         verbose_name_plural = _("Data Sharing Consent Records")
         unique_together = (("enterprise_customer", "username", "course_id"),)
+        index_together = (("enterprise_customer", "username", "granted"),)
 
     objects = DataSharingConsentManager()
 
@@ -8,6 +8,7 @@ from django.conf.urls import url
 from django.contrib import admin
 from django.contrib.auth import settings
 from django.core.urlresolvers import reverse
+from django.db.models import Case, Count, IntegerField, Sum, Value, When
 from django.http import HttpResponseRedirect
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
@@ -21,6 +22,8 @@ from enterprise.admin.utils import UrlNames
 from enterprise.admin.views import EnterpriseCustomerManageLearnersView, TemplatePreviewView
 from enterprise.api_client.lms import CourseApiClient, EnrollmentApiClient
 from enterprise.models import (
+    BulkEnrollmentJob,
+    BulkEnrollmentJobLearner,
     EnrollmentNotificationEmailTemplate,
     EnterpriseCustomer,
     EnterpriseCustomerUser,
@@ -468,6 +471,131 @@ class PendingEnrollmentAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(BulkEnrollmentJob)
+class BulkEnrollmentJobAdmin(admin.ModelAdmin):
+    """
+    Django admin model for BulkEnrollmentJob
+    """
+
+    class Meta(object):
+        model = BulkEnrollmentJob
+
+    readonly_fields = (
+        'enterprise_customer',
+        'requester',
+        'course_id',
+        'program_details',
+        'course_mode',
+        'notify',
+        'status',
+        'progress',
+        'learner_results',
+        'worker',
+        'heartbeat',
+        'attempts',
+    )
+
+    list_display = (
+        'id',
+        'enterprise_customer',
+        'enrolled_in',
+        'status',
+        'progress',
+        'created',
+        'heartbeat',
+    )
+
+    list_filter = ('status',)
+
+    list_select_related = ('enterprise_customer',)
+
+    def get_queryset(self, request):
+        """
+        Annotate the jobs with their total and pending numbers of learners, so the list counts them in one query.
+        """
+        return super(BulkEnrollmentJobAdmin, self).get_queryset(request).annotate(
+            learners_total=Count('learners'),
+            learners_pending=Sum(Case(
+                When(learners__status=BulkEnrollmentJobLearner.PENDING, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )),
+        )
+
+    def progress(self, job):
+        """
+        Return the number of learners of the job processed so far, out of its total number of learners.
+        """
+        return '{} / {}'.format(job.learners_total - (job.learners_pending or 0), job.learners_total)
+
+    def learner_results(self, job):
+        """
+        Return a link to the result of each learner of the job.
+        """
+        return format_html(
+            '<a href="{url}?job__id__exact={job_id}">{text}</a>',
+            url=reverse('admin:enterprise_bulkenrollmentjoblearner_changelist'),
+            job_id=job.id,
+            text=_('View the result of each learner'),
+        )
+
+    def has_add_permission(self, request):
+        """
+        Disable add permission for BulkEnrollmentJob.
+        """
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        """
+        Disable deletion for BulkEnrollmentJob.
+        """
+        return False
+
+
+@admin.register(BulkEnrollmentJobLearner)
+class BulkEnrollmentJobLearnerAdmin(admin.ModelAdmin):
+    """
+    Django admin model for BulkEnrollmentJobLearner
+    """
+
+    class Meta(object):
+        model = BulkEnrollmentJobLearner
+
+    readonly_fields = (
+        'job',
+        'user_email',
+        'status',
+        'message',
+        'modified',
+    )
+
+    list_display = (
+        'user_email',
+        'job',
+        'status',
+        'message',
+        'modified',
+    )
+
+    list_filter = ('status',)
+
+    list_select_related = ('job__enterprise_customer',)
+
+    search_fields = ('user_email',)
+
+    def has_add_permission(self, request):
+        """
+        Disable add permission for BulkEnrollmentJobLearner.
+        """
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        """
+        Disable deletion for BulkEnrollmentJobLearner.
+        """
+        return False
+
+
 @admin.register(EnterpriseCustomerCatalog)
 class EnterpriseCustomerCatalogAdmin(admin.ModelAdmin):
     """
@@ -481,6 +609,7 @@ class EnterpriseCustomerCatalogAdmin(admin.ModelAdmin):
         'uuid',
         'title',
         'enterprise_customer',
+        'content_indexed_at',
     )
 
     search_fields = (
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Background runner for the bulk enrollments requested from the manage learners admin page.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import os
+import socket
+from datetime import timedelta
+from logging import getLogger
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from enterprise.admin.utils import get_course_runs_from_program
+from enterprise.admin.views import EnterpriseCustomerManageLearnersView
+from enterprise.api_client.lms import EnrollmentApiClient
+from enterprise.models import (
+    BulkEnrollmentJob,
+    BulkEnrollmentJobLearner,
+    EnterpriseCourseEnrollment,
+    EnterpriseCustomerUser,
+    PendingEnterpriseCustomerUser,
+)
+
+LOGGER = getLogger(__name__)
+
+
+class BulkEnrollmentJobRunner(object):
+    """
+    Run the persisted bulk enrollment jobs, enrolling several learners of a job concurrently.
+
+    The results of the learners, and the heartbeat of the job, are saved after each batch of learners, so that a job
+    left running by a worker which crashed is claimed again by another worker once its heartbeat is ``STALE_AFTER``
+    seconds old, and resumed with the learners which were not processed yet. A worker stops running a job as soon as
+    it finds out another worker claimed it, and a job which was claimed ``MAX_ATTEMPTS`` times without completing is
+    marked as failed.
+    """
+
+    # Number of learners of a job enrolled concurrently through the Enrollment API, by each runner. Can be
+    # overridden through the ``ENTERPRISE_BULK_ENROLLMENT_JOB_WORKERS`` setting.
+    WORKERS = 4
+
+    # Number of seconds after which a running job whose heartbeat was not updated is considered abandoned by its
+    # worker. Can be overridden through the ``ENTERPRISE_BULK_ENROLLMENT_JOB_STALE_AFTER`` setting.
+    STALE_AFTER = 600
+
+    # Number of times a job may be claimed before it is marked as failed, rather than resumed again. Can be
+    # overridden through the ``ENTERPRISE_BULK_ENROLLMENT_JOB_MAX_ATTEMPTS`` setting.
+    MAX_ATTEMPTS = 3
+
+    # Number of learners of a job processed between two updates of its heartbeat, for each concurrent enrollment.
+    LEARNERS_PER_WORKER = 10
+
+    def __init__(self, worker=None, workers=None):
+        """
+        Initialize a runner, identified as ``worker``, which enrolls up to ``workers`` learners concurrently.
+        """
+        self.worker = worker or '{host}:{pid}'.format(host=socket.gethostname(), pid=os.getpid())
+        if workers is None:
+            workers = getattr(settings, 'ENTERPRISE_BULK_ENROLLMENT_JOB_WORKERS', self.WORKERS)
+        self.workers = max(int(workers), 1)
+        self.enrollment_client = None
+
+    def run_next_job(self):
+        """
+        Claim the next job to run, and run it.
+
+        Returns:
+            BulkEnrollmentJob: The job which was run, or None if there was no job to run.
+        """
+        stale_after = timedelta(
+            seconds=getattr(settings, 'ENTERPRISE_BULK_ENROLLMENT_JOB_STALE_AFTER', self.STALE_AFTER)
+        )
+        max_attempts = getattr(settings, 'ENTERPRISE_BULK_ENROLLMENT_JOB_MAX_ATTEMPTS', self.MAX_ATTEMPTS)
+        job = BulkEnrollmentJob.objects.claim(self.worker, stale_after, max_attempts)
+        if job is not None:
+            self.run(job)
+        return job
+
+    def run(self, job):
+        """
+        Enroll the learners of the job which were not processed yet, notify the learners, and complete the job.
+
+        The job must have been claimed by this runner's worker; the run stops as soon as another worker claims it.
+        """
+        LOGGER.info('Running bulk enrollment job %d for %s', job.id, job.enrolled_in)
+        if job.program_details:
+            course_ids = get_course_runs_from_program(job.program_details)
+        else:
+            course_ids = [job.course_id]
+
+        if self.enrollment_client is None:
+            self.enrollment_client = EnrollmentApiClient(concurrency=self.workers)
+        while True:
+            learners = list(
+                job.learners.filter(status=BulkEnrollmentJobLearner.PENDING).order_by('id')[
+                    :self.workers * self.LEARNERS_PER_WORKER
+                ]
+            )
+            if not learners:
+                break
+            self._enroll_learners(job, course_ids, learners)
+            if not job.heartbeat_now():
+                self._log_lost_job(job)
+                return
+
+        # Refresh the heartbeat right before notifying the learners, so that no other worker claims the job, and
+        # notifies them again, in the meantime.
+        if job.notify:
+            if not job.heartbeat_now():
+                self._log_lost_job(job)
+                return
+            self._notify_learners(job)
+        if not job.complete():
+            self._log_lost_job(job)
+            return
+
+        processed, total = job.progress
+        LOGGER.info('Completed bulk enrollment job %d, having processed %d of %d learners', job.id, processed, total)
+
+    def _enroll_learners(self, job, course_ids, learners):
+        """
+        Enroll the given learners of the job in the courses, and save the result of each learner.
+
+        The Enrollment API client enrolls up to ``workers`` learners concurrently in each course; the database is
+        only updated once all of them are enrolled. A learner whose enrollment fails, for whatever reason, is marked
+        as failed, so that the other learners of the job are still processed.
+        """
+        user_emails = [learner.user_email for learner in learners]
+        users = {user.email: user for user in User.objects.filter(email__in=user_emails)}
+
+        registered_learners = [learner for learner in learners if learner.user_email in users]
+        enrollment_errors = EnterpriseCustomerManageLearnersView.enroll_users_in_courses(
+            self.enrollment_client,
+            [users[learner.user_email].username for learner in registered_learners],
+            job.course_mode,
+            course_ids,
+        )
+
+        for learner in learners:
+            user = users.get(learner.user_email)
+            try:
+                with transaction.atomic():
+                    if user is None:
+                        EnterpriseCustomerManageLearnersView.enroll_user_pending_registration(
+                            job.enterprise_customer, learner.user_email, job.course_mode, *course_ids
+                        )
+                        learner.status = BulkEnrollmentJobLearner.PENDING_REGISTRATION
+                    else:
+                        self._save_enrollments(job, course_ids, learner, user, enrollment_errors.get(user.username))
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.exception(
+                    'Failed to save the enrollment of %s by bulk enrollment job %d', learner.user_email, job.id
+                )
+                learner.status = BulkEnrollmentJobLearner.FAILED
+                learner.message = str(exc)
+            learner.save()
+
+    @staticmethod
+    def _save_enrollments(job, course_ids, learner, user, enrollment_errors):
+        """
+        Save the enterprise course enrollments of the user in the courses they were enrolled in, and their result.
+        """
+        enrollment_errors = enrollment_errors or {}
+        enterprise_customer_user, __ = EnterpriseCustomerUser.objects.get_or_create(
+            enterprise_customer=job.enterprise_customer,
+            user_id=user.id,
+        )
+        for course_id in course_ids:
+            if course_id not in enrollment_errors:
+                EnterpriseCourseEnrollment.objects.get_or_create(
+                    enterprise_customer_user=enterprise_customer_user,
+                    course_id=course_id,
+                )
+        if enrollment_errors:
+            learner.status = BulkEnrollmentJobLearner.FAILED
+            learner.message = '\n'.join(
+                '{course_id}: {message}'.format(course_id=course_id, message=enrollment_errors[course_id])
+                for course_id in course_ids if course_id in enrollment_errors
+            )
+        else:
+            learner.status = BulkEnrollmentJobLearner.ENROLLED
+
+    @staticmethod
+    def _log_lost_job(job):
+        """
+        Log that the job was claimed by another worker, which is now running it.
+        """
+        LOGGER.warning(
+            'Bulk enrollment job %d was claimed by another worker; stopped running it on worker %s', job.id, job.worker
+        )
+
+    @staticmethod
+    def _notify_learners(job):
+        """
+        Notify the learners of the job who were enrolled, or who will be on registration.
+        """
+        # The learners are looked up through subqueries of the learners of the job, rather than lists of emails,
+        # which could exceed the maximum number of query parameters of the database.
+        enrolled_emails = job.learners.filter(status=BulkEnrollmentJobLearner.ENROLLED).values('user_email')
+        pending_emails = job.learners.filter(
+            status=BulkEnrollmentJobLearner.PENDING_REGISTRATION
+        ).values('user_email')
+        users = list(User.objects.filter(email__in=enrolled_emails)) + list(
+            PendingEnterpriseCustomerUser.objects.filter(
+                enterprise_customer=job.enterprise_customer,
+                user_email__in=pending_emails,
+            )
+        )
+        if not users:
+            return
+
+        if job.program_details:
+            EnterpriseCustomerManageLearnersView.notify_program_learners(
+                enterprise_customer=job.enterprise_customer,
+                program_details=job.program_details,
+                users=users,
+            )
+        elif job.requester is None:
+            LOGGER.warning(
+                'The requester of bulk enrollment job %d no longer exists, so the learners cannot be notified.', job.id
+            )
+        else:
+            EnterpriseCustomerManageLearnersView.notify_enrolled_learners(
+                enterprise_customer=job.enterprise_customer,
+                requester=job.requester,
+                course_id=job.course_id,
+                users=users,
+            )
@@ -128,7 +128,7 @@ def email_or_username__to__email(email_or_username):
         return email_or_username
 
 
-def validate_email_to_link(email, raw_email=None, message_template=None, ignore_existing=False):
+def validate_email_to_link(email, raw_email=None, message_template=None, ignore_existing=False, existing_links=None):
     """
     Validate email to be linked to Enterprise Customer.
 
@@ -141,6 +141,8 @@ def validate_email_to_link(email, raw_email=None, message_template=None, ignore_
         raw_email (str): raw value as it was passed by user - used in error message.
         message_template (str): Validation error template string.
         ignore_existing (bool): If True to skip the check for an existing Enterprise Customer
+        existing_links (dict): The links of the emails being validated, as returned by
+            ``EnterpriseCustomerUser.objects.get_links_by_email``; the link is looked up when not given.
 
     Raises:
         ValidationError: if email is invalid or already linked to Enterprise Customer.
@@ -155,7 +157,10 @@ def validate_email_to_link(email, raw_email=None, message_template=None, ignore_
     except ValidationError:
         raise ValidationError(message_template.format(argument=raw_email))
 
-    existing_record = EnterpriseCustomerUser.objects.get_link_by_email(email)
+    if existing_links is not None:
+        existing_record = existing_links.get(email)
+    else:
+        existing_record = EnterpriseCustomerUser.objects.get_link_by_email(email)
     if existing_record and not ignore_existing:
         raise ValidationError(ValidationMessages.USER_ALREADY_REGISTERED.format(
             email=email, ec_name=existing_record.enterprise_customer.name
@@ -16,9 +16,12 @@ from django.contrib.auth import get_permission_codename
 from django.contrib.auth.models import User
 from django.core import mail
 from django.core.exceptions import ValidationError
+from django.core.urlresolvers import reverse
+from django.db import transaction
 from django.db.models import Q
 from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
+from django.utils.html import format_html
 from django.utils.http import urlquote
 from django.utils.translation import ugettext as _
 from django.utils.translation import ungettext
@@ -37,6 +40,8 @@ from enterprise.admin.utils import (
 from enterprise.api_client.discovery import CourseCatalogApiClient
 from enterprise.api_client.lms import EnrollmentApiClient, parse_lms_api_datetime
 from enterprise.models import (
+    BulkEnrollmentJob,
+    BulkEnrollmentJobLearner,
     EnrollmentNotificationEmailTemplate,
     EnterpriseCourseEnrollment,
     EnterpriseCustomer,
@@ -100,6 +105,10 @@ class EnterpriseCustomerManageLearnersView(View):
     """
     template = "enterprise/admin/manage_learners.html"
 
+    # Number of linked, and of pending, learners listed on each page. Can be overridden through the
+    # ``ENTERPRISE_MANAGE_LEARNERS_PAGE_SIZE`` setting.
+    PAGE_SIZE = 100
+
     class ContextParameters(object):
         """
         Namespace-style class for custom context parameters.
@@ -107,10 +116,20 @@ class EnterpriseCustomerManageLearnersView(View):
         ENTERPRISE_CUSTOMER = "enterprise_customer"
         LEARNERS = "learners"
         PENDING_LEARNERS = "pending_learners"
+        LEARNERS_NEXT_PAGE_URL = "learners_next_page_url"
+        PENDING_LEARNERS_NEXT_PAGE_URL = "pending_learners_next_page_url"
+        FIRST_PAGE_URL = "first_page_url"
         MANAGE_LEARNERS_FORM = "manage_learners_form"
         SEARCH_KEYWORD = "search_keyword"
         ENROLLMENT_URL = 'ENROLLMENT_API_ROOT_URL'
 
+    class PageParameters(object):
+        """
+        Namespace-style class for the GET parameters holding the ID after which each page of learners starts.
+        """
+        LEARNERS_AFTER = "learners_after"
+        PENDING_LEARNERS_AFTER = "pending_learners_after"
+
     @staticmethod
     def _build_admin_context(request, customer):
         """
@@ -132,13 +151,26 @@ class EnterpriseCustomerManageLearnersView(View):
         enterprise_customer = EnterpriseCustomer.objects.get(uuid=customer_uuid)  # pylint: disable=no-member
 
         search_keyword = self.get_search_keyword(request)
-        linked_learners = self.get_enterprise_customer_user_queryset(search_keyword, customer_uuid)
-        pending_linked_learners = self.get_pending_users_queryset(search_keyword, customer_uuid)
+        linked_learners, learners_next_after = self.get_page(
+            self.get_enterprise_customer_user_queryset(search_keyword, customer_uuid),
+            self.get_page_after(request, self.PageParameters.LEARNERS_AFTER),
+        )
+        pending_linked_learners, pending_learners_next_after = self.get_page(
+            self.get_pending_users_queryset(search_keyword, customer_uuid),
+            self.get_page_after(request, self.PageParameters.PENDING_LEARNERS_AFTER),
+        )
 
         context = {
             self.ContextParameters.ENTERPRISE_CUSTOMER: enterprise_customer,
             self.ContextParameters.PENDING_LEARNERS: pending_linked_learners,
             self.ContextParameters.LEARNERS: linked_learners,
+            self.ContextParameters.LEARNERS_NEXT_PAGE_URL: self.get_page_url(
+                request, self.PageParameters.LEARNERS_AFTER, learners_next_after
+            ),
+            self.ContextParameters.PENDING_LEARNERS_NEXT_PAGE_URL: self.get_page_url(
+                request, self.PageParameters.PENDING_LEARNERS_AFTER, pending_learners_next_after
+            ),
+            self.ContextParameters.FIRST_PAGE_URL: self.get_first_page_url(request),
             self.ContextParameters.SEARCH_KEYWORD: search_keyword or '',
             self.ContextParameters.ENROLLMENT_URL: settings.LMS_ENROLLMENT_API_PATH,
         }
@@ -152,6 +184,65 @@ class EnterpriseCustomerManageLearnersView(View):
         """
         return request.GET.get('q', None)
 
+    @staticmethod
+    def get_page_after(request, parameter):
+        """
+        Retrieve the ID after which a page of learners starts from the GET parameters, or None for the first page.
+        """
+        try:
+            return int(request.GET[parameter])
+        except (KeyError, ValueError):
+            return None
+
+    def get_page(self, queryset, after):
+        """
+        Get a page of the learners of the queryset, using keyset pagination on their ID.
+
+        Unlike offset pagination, the database seeks the first learner of each page through the primary key
+        index, however far the page is.
+
+        Args:
+            queryset (QuerySet): The learners to paginate.
+            after (int): The page starts with the learners whose ID is greater than this one, or with the
+                first learner when None.
+
+        Returns:
+            tuple: The list of learners in the page, and the ID after which the next page starts, or None if
+                this is the last page.
+        """
+        page_size = getattr(settings, 'ENTERPRISE_MANAGE_LEARNERS_PAGE_SIZE', self.PAGE_SIZE)
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        learners = list(queryset.order_by('pk')[:page_size + 1])
+        if len(learners) > page_size:
+            return learners[:page_size], learners[page_size - 1].pk
+        return learners, None
+
+    @staticmethod
+    def get_page_url(request, parameter, after):
+        """
+        Get the URL of the next page of learners, which starts after the given ID, or None if there is none.
+
+        The search keyword and the current page of the other table of learners are kept.
+        """
+        if after is None:
+            return None
+        params = request.GET.copy()
+        params[parameter] = after
+        return '?' + params.urlencode()
+
+    def get_first_page_url(self, request):
+        """
+        Get the URL of the first page of both tables of learners, or None if this is the first page.
+        """
+        page_parameters = (self.PageParameters.LEARNERS_AFTER, self.PageParameters.PENDING_LEARNERS_AFTER)
+        if not any(parameter in request.GET for parameter in page_parameters):
+            return None
+        params = request.GET.copy()
+        for parameter in page_parameters:
+            params.pop(parameter, None)
+        return '?' + params.urlencode()
+
     def get_enterprise_customer_user_queryset(self, search_keyword, customer_uuid):
         """
         Get the list of EnterpriseCustomerUsers we want to render.
@@ -164,15 +255,15 @@ class EnterpriseCustomerManageLearnersView(View):
         learners = EnterpriseCustomerUser.objects.filter(enterprise_customer__uuid=customer_uuid)
 
         if search_keyword is not None:
-            user_ids = learners.values_list('user_id', flat=True)
+            # Filter on a subquery of the matching users, which the database runs as a semi-join against
+            # the users table, instead of listing the IDs of every learner of the enterprise customer.
             matching_users = User.objects.filter(
-                Q(pk__in=user_ids),
                 Q(email__icontains=search_keyword) | Q(username__icontains=search_keyword)
             )
-            matching_user_ids = matching_users.values_list('pk', flat=True)
-            learners = learners.filter(user_id__in=matching_user_ids)
+            learners = learners.filter(user_id__in=matching_users.values('pk'))
 
-        return learners
+        # The email address and username of each learner are rendered, so fetch their users in bulk.
+        return learners.with_users()
 
     def get_pending_users_queryset(self, search_keyword, customer_uuid):
         """
@@ -232,23 +323,31 @@ class EnterpriseCustomerManageLearnersView(View):
         else:
             parsed_csv = parse_csv(csv_file, expected_columns={ManageLearnersForm.CsvColumns.EMAIL})
 
+        row_emails = []
+        parsing_error = None
         try:
-            for index, row in enumerate(parsed_csv):
-                email = row[ManageLearnersForm.CsvColumns.EMAIL]
-                try:
-                    already_linked = validate_email_to_link(email, ignore_existing=True)
-                except ValidationError as exc:
-                    message = _("Error at line {line}: {message}\n").format(line=index + 1, message=exc)
-                    errors.append(message)
-                else:
-                    if already_linked:
-                        already_linked_emails.append((email, already_linked.enterprise_customer))
-                    elif email in emails:
-                        duplicate_emails.append(email)
-                    else:
-                        emails.add(email)
+            for row in parsed_csv:
+                row_emails.append(row[ManageLearnersForm.CsvColumns.EMAIL])
         except ValidationError as exc:
-            errors.append(exc)
+            parsing_error = exc
+
+        # Look up the existing links of all the emails at once, rather than row by row.
+        existing_links = EnterpriseCustomerUser.objects.get_links_by_email(row_emails)
+        for index, email in enumerate(row_emails):
+            try:
+                already_linked = validate_email_to_link(email, ignore_existing=True, existing_links=existing_links)
+            except ValidationError as exc:
+                message = _("Error at line {line}: {message}\n").format(line=index + 1, message=exc)
+                errors.append(message)
+            else:
+                if already_linked:
+                    already_linked_emails.append((email, already_linked.enterprise_customer))
+                elif email in emails:
+                    duplicate_emails.append(email)
+                else:
+                    emails.add(email)
+        if parsing_error is not None:
+            errors.append(parsing_error)
 
         if errors:
             manage_learners_form.add_error(
@@ -259,8 +358,7 @@ class EnterpriseCustomerManageLearnersView(View):
             return
 
         # There were no errors. Now do the actual linking:
-        for email in emails:
-            EnterpriseCustomerUser.objects.link_user(enterprise_customer, email)
+        EnterpriseCustomerUser.objects.bulk_link_users(enterprise_customer, emails)
 
         # Report what happened:
         count = len(emails)
@@ -314,45 +412,80 @@ class EnterpriseCustomerManageLearnersView(View):
         return all_processable_emails
 
     @classmethod
-    def enroll_user(cls, enterprise_customer, user, course_mode, *course_ids):
+    def enroll_users(cls, enterprise_customer, users, course_mode, *course_ids):
         """
-        Enroll a single user in any number of courses using a particular course mode.
+        Enroll any number of users in any number of courses using a particular course mode.
 
         Args:
             enterprise_customer: The EnterpriseCustomer which is sponsoring the enrollment
-            user: The user who needs to be enrolled in the course
-            course_mode: The mode with which the enrollment should be created
-            *course_ids: An iterable containing any number of course IDs to eventually enroll the user in.
+            users: The users who need to be enrolled in the courses
+            course_mode: The mode with which the enrollments should be created
+            *course_ids: An iterable containing any number of course IDs to eventually enroll the users in.
 
         Returns:
-            Boolean: Whether or not enrollment succeeded for all courses specified
+            successes: A list of users who were successfully enrolled in all courses specified
+            failures: A list of users who could not be enrolled in some of the courses
         """
-        enterprise_customer_user, __ = EnterpriseCustomerUser.objects.get_or_create(
-            enterprise_customer=enterprise_customer,
-            user_id=user.id
+        users = list(users)
+        enrollment_errors = cls.enroll_users_in_courses(
+            EnrollmentApiClient(), [user.username for user in users], course_mode, course_ids
         )
-        enrollment_client = EnrollmentApiClient()
-        succeeded = True
+
+        successes = []
+        failures = []
+        for user in users:
+            enterprise_customer_user, __ = EnterpriseCustomerUser.objects.get_or_create(
+                enterprise_customer=enterprise_customer,
+                user_id=user.id
+            )
+            user_errors = enrollment_errors.get(user.username, {})
+            for course_id in course_ids:
+                if course_id not in user_errors:
+                    EnterpriseCourseEnrollment.objects.get_or_create(
+                        enterprise_customer_user=enterprise_customer_user,
+                        course_id=course_id
+                    )
+            if user_errors:
+                failures.append(user)
+            else:
+                successes.append(user)
+        return successes, failures
+
+    @classmethod
+    def enroll_users_in_courses(cls, enrollment_client, usernames, course_mode, course_ids):
+        """
+        Enroll any number of users in any number of courses through the Enrollment API, without touching the database.
+
+        Args:
+            enrollment_client: The EnrollmentApiClient to enroll the users with
+            usernames: The usernames of the users who need to be enrolled
+            course_mode: The mode with which the enrollments should be created
+            course_ids: An iterable containing any number of course IDs to enroll the users in
+
+        Returns:
+            dict: The error message of each course each user could not be enrolled in, by username
+        """
+        enrollment_errors = {}
+        if not usernames:
+            return enrollment_errors
         for course_id in course_ids:
-            try:
-                enrollment_client.enroll_user_in_course(user.username, course_id, course_mode)
-            except HttpClientError as exc:
-                succeeded = False
+            __, failed = enrollment_client.enroll_users_in_course(usernames, course_id, course_mode)
+            for username, exc in failed.items():
                 default_message = 'No error message provided'
-                try:
-                    error_message = json.loads(exc.content.decode()).get('message', default_message)
-                except ValueError:
-                    error_message = default_message
+                if isinstance(exc, HttpClientError):
+                    try:
+                        error_message = json.loads(exc.content.decode()).get('message', default_message)
+                    except ValueError:
+                        error_message = default_message
+                else:
+                    # The LMS could not be reached, or failed to process the enrollment.
+                    error_message = str(exc) or default_message
                 logging.error(
                     'Error while enrolling user %(user)s: %(message)s',
-                    dict(user=user.username, message=error_message)
-                )
-            else:
-                EnterpriseCourseEnrollment.objects.get_or_create(
-                    enterprise_customer_user=enterprise_customer_user,
-                    course_id=course_id
+                    dict(user=username, message=error_message)
                 )
-        return succeeded
+                enrollment_errors.setdefault(username, {})[course_id] = error_message
+        return enrollment_errors
 
     @classmethod
     def get_users_by_email(cls, emails):
@@ -419,16 +552,8 @@ class EnterpriseCustomerManageLearnersView(View):
         existing_users, unregistered_emails = cls.get_users_by_email(emails)
         course_ids = get_course_runs_from_program(program_details)
 
-        successes = []
+        successes, failures = cls.enroll_users(enterprise_customer, existing_users, course_mode, *course_ids)
         pending = []
-        failures = []
-
-        for user in existing_users:
-            succeeded = cls.enroll_user(enterprise_customer, user, course_mode, *course_ids)
-            if succeeded:
-                successes.append(user)
-            else:
-                failures.append(user)
 
         for email in unregistered_emails:
             pending_user = cls.enroll_user_pending_registration(enterprise_customer, email, course_mode, *course_ids)
@@ -455,16 +580,8 @@ class EnterpriseCustomerManageLearnersView(View):
         """
         existing_users, unregistered_emails = cls.get_users_by_email(emails)
 
-        successes = []
+        successes, failures = cls.enroll_users(enterprise_customer, existing_users, course_mode, course_id)
         pending = []
-        failures = []
-
-        for user in existing_users:
-            succeeded = cls.enroll_user(enterprise_customer, user, course_mode, course_id)
-            if succeeded:
-                successes.append(user)
-            else:
-                failures.append(user)
 
         for email in unregistered_emails:
             pending_user = cls.enroll_user_pending_registration(enterprise_customer, email, course_mode, course_id)
@@ -488,17 +605,17 @@ class EnterpriseCustomerManageLearnersView(View):
             message_function(http_request, text)
 
     @classmethod
-    def notify_enrolled_learners(cls, enterprise_customer, request, course_id, users):
+    def notify_enrolled_learners(cls, enterprise_customer, requester, course_id, users):
         """
         Notify learners about a course in which they've been enrolled.
 
         Args:
             enterprise_customer: The EnterpriseCustomer being linked to
-            request: The HTTP request that's being processed
+            requester: The user who requested the enrollment, on whose behalf the course details are retrieved
             course_id: The specific course the learners were enrolled in
             users: An iterable of the users or pending users who were enrolled
         """
-        course_details = CourseCatalogApiClient(request.user, enterprise_customer.site).get_course_run(course_id)
+        course_details = CourseCatalogApiClient(requester, enterprise_customer.site).get_course_run(course_id)
         if not course_details:
             logging.warning(
                 _(
@@ -682,6 +799,19 @@ class EnterpriseCustomerManageLearnersView(View):
             program_details: Details about a program in which we want to enroll
             notify: Whether to notify (by email) the users that have been enrolled
         """
+        job_threshold = getattr(settings, 'ENTERPRISE_BULK_ENROLLMENT_JOB_THRESHOLD', None)
+        if job_threshold is not None and len(emails) >= job_threshold:
+            cls.schedule_bulk_enrollment_jobs(
+                request=request,
+                enterprise_customer=enterprise_customer,
+                emails=emails,
+                mode=mode,
+                course_id=course_id,
+                program_details=program_details,
+                notify=notify,
+            )
+            return
+
         pending_messages = []
 
         if course_id:
@@ -695,7 +825,7 @@ class EnterpriseCustomerManageLearnersView(View):
             if notify:
                 cls.notify_enrolled_learners(
                     enterprise_customer=enterprise_customer,
-                    request=request,
+                    requester=request.user,
                     course_id=course_id,
                     users=all_successes,
                 )
@@ -730,6 +860,69 @@ class EnterpriseCustomerManageLearnersView(View):
 
         cls.send_messages(request, pending_messages)
 
+    @classmethod
+    def schedule_bulk_enrollment_jobs(
+            cls,
+            request,
+            enterprise_customer,
+            emails,
+            mode,
+            course_id=None,
+            program_details=None,
+            notify=True
+    ):
+        """
+        Persist the enrollment of the users with the given email addresses as background jobs.
+
+        A job is created for the course, and another one for the program; the ``process_bulk_enrollment_jobs``
+        management command then runs them, recording the result of each learner.
+
+        Args:
+            request: The HTTP request the enrollment is being created by
+            enterprise_customer: The instance of EnterpriseCustomer whose attached users we're enrolling
+            emails: An iterable of strings containing email addresses to enroll in a course
+            mode: The enrollment mode the users will be enrolled in the course with
+            course_id: The ID of the course in which we want to enroll
+            program_details: Details about a program in which we want to enroll
+            notify: Whether to notify (by email) the users that have been enrolled
+        """
+        emails = set(emails)
+        pending_messages = []
+        for job_course_id, job_program_details in ((course_id, None), (None, program_details)):
+            if not (job_course_id or job_program_details):
+                continue
+
+            with transaction.atomic():
+                job = BulkEnrollmentJob.objects.create(
+                    enterprise_customer=enterprise_customer,
+                    requester=request.user,
+                    course_id=job_course_id or '',
+                    program_details=job_program_details,
+                    course_mode=mode,
+                    notify=notify,
+                )
+                BulkEnrollmentJobLearner.objects.bulk_create(
+                    [BulkEnrollmentJobLearner(job=job, user_email=email) for email in emails],
+                    batch_size=1000,
+                )
+            pending_messages.append((
+                'info',
+                format_html(
+                    ungettext(
+                        'The enrollment of {count} learner in {enrolled_in} was scheduled. '
+                        '<a href="{url}">Follow its progress</a>.',
+                        'The enrollment of {count} learners in {enrolled_in} was scheduled. '
+                        '<a href="{url}">Follow its progress</a>.',
+                        len(emails),
+                    ),
+                    count=len(emails),
+                    enrolled_in=job.enrolled_in,
+                    url=reverse('admin:enterprise_bulkenrollmentjob_change', args=(job.id,)),
+                ),
+            ))
+
+        cls.send_messages(request, pending_messages)
+
     def get(self, request, customer_uuid):
         """
         Handle GET request - render linked learners list and "Link learner" form.
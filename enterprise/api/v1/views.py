@@ -196,7 +196,7 @@ class EnterpriseCustomerUserViewSet(EnterpriseReadWriteModelViewSet):
     API views for the ``enterprise-learner`` API endpoint.
     """
 
-    queryset = models.EnterpriseCustomerUser.objects.all()
+    queryset = models.EnterpriseCustomerUser.objects.with_users()
     filter_backends = (filters.OrderingFilter, filters.DjangoFilterBackend, EnterpriseCustomerUserFilterBackend)
 
     FIELDS = (
@@ -4,15 +4,18 @@ Utilities to get details from the course catalog API.
 """
 from __future__ import absolute_import, unicode_literals
 
+import hashlib
+import time
 from logging import getLogger
 
 from edx_rest_api_client.client import EdxRestApiClient
-from edx_rest_api_client.exceptions import SlumberBaseException
+from edx_rest_api_client.exceptions import HttpNotFoundError, SlumberBaseException
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 from requests.exceptions import ConnectionError, Timeout  # pylint: disable=redefined-builtin
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 from django.utils.translation import ugettext_lazy as _
 
@@ -73,6 +76,27 @@ class CourseCatalogApiClient(object):
 
     DEFAULT_VALUE_SAFEGUARD = object()
 
+    # Detail resources whose responses are cached, mapped to the number of seconds a cached
+    # response is considered fresh. Can be overridden per resource through the
+    # ``ENTERPRISE_DISCOVERY_API_CACHE_TIMEOUTS`` setting.
+    CACHE_TIMEOUTS = {
+        COURSES_ENDPOINT: 60 * 60,
+        COURSE_RUNS_ENDPOINT: 60 * 60,
+        PROGRAMS_ENDPOINT: 60 * 60,
+        PROGRAM_TYPES_ENDPOINT: 60 * 60 * 24,
+    }
+    # Number of seconds a stale response may still be served while it is being revalidated,
+    # or while the discovery service is failing.
+    STALE_CACHE_TIMEOUT = 60 * 60 * 6
+    # Number of seconds a missing resource (404 or empty response) is remembered.
+    NOT_FOUND_CACHE_TIMEOUT = 60 * 5
+    # Number of seconds to wait before retrying revalidation of a stale response that failed to refresh.
+    REVALIDATE_RETRY_INTERVAL = 60
+    # Upper bound on how long a single caller may hold the revalidation lock of a cached response.
+    REVALIDATE_LOCK_TIMEOUT = 30
+    # Number of seconds after which batch lookups stop looking up resources one by one.
+    BATCH_LOOKUP_DEADLINE = 10
+
     def __init__(self, user, site=None):
         """
         Create an Course Catalog API client setup with authentication for the specified user.
@@ -93,12 +117,12 @@ class CourseCatalogApiClient(object):
             )
 
         self.user = user
-        catalog_url = get_configuration_value_for_site(
+        self.catalog_url = get_configuration_value_for_site(
             site,
             'COURSE_CATALOG_API_URL',
             settings.COURSE_CATALOG_API_URL
         )
-        self.client = course_discovery_api_client(user, catalog_url)
+        self.client = course_discovery_api_client(user, self.catalog_url)
 
     def get_search_results(self, querystring=None, traverse_pagination=True):
         """
@@ -210,16 +234,97 @@ class CourseCatalogApiClient(object):
         course_id = get_course_id_from_course_run_id(course_run_id)
         # Retrieve the course metadata from the catalog service.
         course = self.get_course_details(course_id)
+        return course, self._find_course_run(course, course_run_id)
+
+    def get_courses_and_course_runs(self, course_run_ids, deadline=None):
+        """
+        Return the course and course run metadata for many course run IDs.
 
-        course_run = None
-        if course:
-            # Find the specified course run.
-            course_run = None
-            course_runs = [course_run for course_run in course['course_runs'] if course_run['key'] == course_run_id]
-            if course_runs:
-                course_run = course_runs[0]
+        Fresh cached course metadata is used where available, and the metadata of the remaining courses is
+        fetched in a single request to the courses endpoint, filtered by course key. Any course missing from
+        that response is then looked up on its own, until ``deadline`` seconds have passed.
 
-        return course, course_run
+        Arguments:
+            course_run_ids (list): The course run IDs.
+            deadline (int): Number of seconds after which no more courses are looked up on their own.
+                Defaults to ``BATCH_LOOKUP_DEADLINE``.
+
+        Returns:
+            dict: Maps each course run ID to a tuple of its course metadata and course run metadata, which
+                are both None if the course could not be retrieved.
+        """
+        start = time.time()
+        deadline = self.BATCH_LOOKUP_DEADLINE if deadline is None else deadline
+        course_ids = {
+            course_run_id: get_course_id_from_course_run_id(course_run_id) for course_run_id in course_run_ids
+        }
+        courses = self._get_cached_courses(set(course_ids.values()))
+
+        missing_course_ids = sorted(set(course_ids.values()) - set(courses))
+        if missing_course_ids:
+            for course in self._load_data(
+                    self.COURSES_ENDPOINT,
+                    default=[],
+                    querystring={'keys': ','.join(missing_course_ids)},
+                    traverse_pagination=True,
+            ):
+                if course.get('key') in missing_course_ids:
+                    courses[course['key']] = course
+                    self._cache_course(course)
+
+        results = {}
+        for course_run_id, course_id in course_ids.items():
+            if course_id not in courses:
+                if time.time() - start < deadline:
+                    courses[course_id] = self.get_course_details(course_id)
+                else:
+                    LOGGER.warning(
+                        'Skipped looking up course %s as the deadline of %s seconds has passed.',
+                        course_id, deadline,
+                    )
+                    courses[course_id] = None
+            course = courses[course_id] or None
+            results[course_run_id] = (course, self._find_course_run(course, course_run_id))
+        return results
+
+    @staticmethod
+    def _find_course_run(course, course_run_id):
+        """
+        Return the metadata of the given course run from the course metadata, or None if it is not there.
+        """
+        if not course:
+            return None
+        course_runs = [course_run for course_run in course['course_runs'] if course_run['key'] == course_run_id]
+        return course_runs[0] if course_runs else None
+
+    def _get_cached_courses(self, course_ids):
+        """
+        Return the fresh cached metadata of the given courses, keyed by course ID.
+        """
+        if not self._get_cache_timeout(self.COURSES_ENDPOINT, resource_id=''):
+            return {}
+        cache_keys = {
+            self._get_cache_key(self.COURSES_ENDPOINT, resource_id=course_id, many=False): course_id
+            for course_id in course_ids
+        }
+        now = time.time()
+        return {
+            cache_keys[cache_key]: cached_entry['data']
+            for cache_key, cached_entry in cache.get_many(list(cache_keys)).items()
+            if cached_entry['data'] and cached_entry['fresh_until'] > now
+        }
+
+    def _cache_course(self, course):
+        """
+        Cache the given course metadata as if it had been retrieved through ``get_course_details``.
+        """
+        cache_timeout = self._get_cache_timeout(self.COURSES_ENDPOINT, resource_id=course['key'])
+        if cache_timeout:
+            self._set_cached_data(
+                self._get_cache_key(self.COURSES_ENDPOINT, resource_id=course['key'], many=False),
+                course,
+                cache_timeout,
+            )
 
     def get_course_details(self, course_id):
         """
@@ -408,6 +513,9 @@ class CourseCatalogApiClient(object):
         """
         Load data from API client.
 
+        Detail lookups of the resources listed in ``CACHE_TIMEOUTS`` are served from the cache;
+        see ``_load_cached_data`` for details.
+
         Arguments:
             resource(string): type of resource to load
             default(any): value to return if API query returned empty result. Sensible values: [], {}, None etc.
@@ -417,6 +525,10 @@ class CourseCatalogApiClient(object):
 
         """
         default_val = default if default != self.DEFAULT_VALUE_SAFEGUARD else {}
+        cache_timeout = self._get_cache_timeout(resource, **kwargs)
+        if cache_timeout:
+            return self._load_cached_data(resource, cache_timeout, **kwargs) or default_val
+
         try:
             return get_edx_api_data(
                 api_config=CatalogIntegration.current(),
@@ -431,6 +543,119 @@ class CourseCatalogApiClient(object):
             )
             return default_val
 
+    def _get_cache_timeout(self, resource, **kwargs):
+        """
+        Return the number of seconds a response for the given resource lookup stays fresh, or 0 if it is not cached.
+        """
+        if kwargs.get('resource_id') is None:
+            return 0
+        cache_timeouts = dict(self.CACHE_TIMEOUTS, **getattr(settings, 'ENTERPRISE_DISCOVERY_API_CACHE_TIMEOUTS', {}))
+        return cache_timeouts.get(resource, 0)
+
+    def _get_cache_key(self, resource, **kwargs):
+        """
+        Return the key under which the response for the given resource lookup is cached.
+
+        The key is built from a fixed format, rather than through ``get_cache_key``, so that every process computes
+        the same key, whatever the order of keyword arguments on its version of Python.
+        """
+        querystring = kwargs.get('querystring')
+        key = 'discovery:{catalog_url}:{resource}:{resource_id}:{querystring}:{traverse_pagination}:{many}'.format(
+            catalog_url=self.catalog_url,
+            resource=resource,
+            resource_id=kwargs.get('resource_id'),
+            querystring=sorted(querystring.items()) if querystring else None,
+            traverse_pagination=kwargs.get('traverse_pagination'),
+            many=kwargs.get('many'),
+        )
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    def _set_cached_data(self, cache_key, data, cache_timeout):
+        """
+        Cache the given response, fresh for ``cache_timeout`` seconds and then stale for ``STALE_CACHE_TIMEOUT``.
+        """
+        now = time.time()
+        stale_timeout = cache_timeout + self.STALE_CACHE_TIMEOUT
+        cache.set(
+            cache_key,
+            {'data': data, 'fresh_until': now + cache_timeout, 'stale_until': now + stale_timeout},
+            stale_timeout,
+        )
+
+    def _load_cached_data(self, resource, cache_timeout, **kwargs):
+        """
+        Load data for a detail resource through the cache.
+
+        Cached entries hold the response along with the time until which it is fresh. Missing resources
+        are cached too, for ``NOT_FOUND_CACHE_TIMEOUT`` seconds. Once a response goes stale it is kept for
+        another ``STALE_CACHE_TIMEOUT`` seconds, during which a single caller revalidates it while all
+        other callers keep receiving the stale response. If revalidation fails, the stale response is
+        served and revalidation is retried after ``REVALIDATE_RETRY_INTERVAL`` seconds.
+
+        Arguments:
+            resource(string): type of resource to load
+            cache_timeout(int): number of seconds a fetched response stays fresh
+
+        Returns:
+            dict: Deserialized response from Course Catalog API, or None if the resource does not exist.
+
+        """
+        cache_key = self._get_cache_key(resource, **kwargs)
+        lock_key = '{}__revalidate'.format(cache_key)
+        cached_entry = cache.get(cache_key)
+        now = time.time()
+
+        revalidating = False
+        if cached_entry is not None:
+            if cached_entry['fresh_until'] > now:
+                return cached_entry['data']
+            revalidating = cache.add(lock_key, True, self.REVALIDATE_LOCK_TIMEOUT)
+            if not revalidating:
+                # Some other caller is already revalidating this response.
+                return cached_entry['data']
+
+        try:
+            data = get_edx_api_data(
+                api_config=CatalogIntegration.current(),
+                resource=resource,
+                api=self.client,
+                **kwargs
+            )
+            not_found = not data
+        except HttpNotFoundError:
+            data, not_found = None, True
+        except (SlumberBaseException, ConnectionError, Timeout) as exc:
+            LOGGER.exception(
+                'Failed to load data from resource %s with kwargs %s due to: %s',
+                resource, kwargs, str(exc)
+            )
+            data, not_found = None, False
+        finally:
+            if revalidating:
+                cache.delete(lock_key)
+
+        if data:
+            self._set_cached_data(cache_key, data, cache_timeout)
+            return data
+
+        if cached_entry is not None and cached_entry['data'] and cached_entry['stale_until'] > now:
+            # Discovery could not provide a fresh response; keep serving the stale one for now.
+            LOGGER.warning(
+                'Serving stale data for resource %s with kwargs %s as it could not be revalidated.',
+                resource, kwargs,
+            )
+            cached_entry['fresh_until'] = now + self.REVALIDATE_RETRY_INTERVAL
+            cache.set(cache_key, cached_entry, int(cached_entry['stale_until'] - now) + 1)
+            return cached_entry['data']
+
+        if not_found:
+            cache.set(
+                cache_key,
+                {'data': None, 'fresh_until': now + self.NOT_FOUND_CACHE_TIMEOUT, 'stale_until': now},
+                self.NOT_FOUND_CACHE_TIMEOUT,
+            )
+        return None
+
 
 class CourseCatalogApiServiceClient(CourseCatalogApiClient):
     """
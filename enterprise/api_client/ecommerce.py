@@ -5,13 +5,16 @@ Client for communicating with the E-Commerce API.
 from __future__ import absolute_import, unicode_literals
 
 import logging
+from multiprocessing.pool import ThreadPool
 
 from requests.exceptions import ConnectionError, Timeout  # pylint: disable=redefined-builtin
 from slumber.exceptions import SlumberBaseException
 
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import ugettext as _
 
-from enterprise.utils import NotConnectedToOpenEdX, format_price
+from enterprise.utils import NotConnectedToOpenEdX, format_price, get_cache_key
 
 try:
     from openedx.core.djangoapps.commerce.utils import ecommerce_api_client
@@ -27,6 +30,10 @@ class EcommerceApiClient(object):
     Object builds an API client to make calls to the E-Commerce API.
     """
 
+    # Number of seconds the price details calculated for a user and SKU are cached. Can be overridden
+    # through the ``ENTERPRISE_ECOMMERCE_PRICE_CACHE_TIMEOUT`` setting.
+    PRICE_CACHE_TIMEOUT = 60
+
     def __init__(self, user):
         """
         Create an E-Commerce API client, authenticated with the API token from Django settings.
@@ -51,12 +58,77 @@ class EcommerceApiClient(object):
         Returns:
             str: Discounted price of the course mode.
 
+        """
+        return self._format_final_price(mode, self._calculate_price_details(mode['sku']) or {}, currency)
+
+    def get_course_final_prices(self, modes, currency='$', entitlement_ids=()):
+        """
+        Get the discounted price of each of the given course modes after applying any entitlements of this user.
+
+        The price details of each SKU are cached for this user and the given entitlements, for
+        ``PRICE_CACHE_TIMEOUT`` seconds. The prices which are not cached are calculated concurrently.
+
+        Arguments:
+            modes (list): The course modes.
+            currency (str): The currency symbol used to format the prices.
+            entitlement_ids (iterable): IDs of the entitlements which may apply to this user; cached prices
+                are not used once they change.
+
+        Returns:
+            dict: Maps the SKU of each course mode to its discounted price.
+
+        """
+        cache_keys = {
+            mode['sku']: get_cache_key(
+                resource='baskets_calculate',
+                user_id=self.user.id,
+                sku=mode['sku'],
+                entitlement_ids=','.join(sorted(str(entitlement_id) for entitlement_id in entitlement_ids)),
+            ) for mode in modes
+        }
+        cached_price_details = cache.get_many(list(cache_keys.values()))
+        price_details = {
+            sku: cached_price_details[cache_key]
+            for sku, cache_key in cache_keys.items() if cache_key in cached_price_details
+        }
+
+        uncached_skus = [sku for sku in cache_keys if sku not in price_details]
+        if len(uncached_skus) > 1:
+            pool = ThreadPool(len(uncached_skus))
+            try:
+                calculated_price_details = pool.map(self._calculate_price_details, uncached_skus)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            calculated_price_details = [self._calculate_price_details(sku) for sku in uncached_skus]
+
+        cache_timeout = getattr(settings, 'ENTERPRISE_ECOMMERCE_PRICE_CACHE_TIMEOUT', self.PRICE_CACHE_TIMEOUT)
+        for sku, sku_price_details in zip(uncached_skus, calculated_price_details):
+            price_details[sku] = sku_price_details or {}
+            if sku_price_details is not None:
+                cache.set(cache_keys[sku], sku_price_details, cache_timeout)
+
+        return {
+            mode['sku']: self._format_final_price(mode, price_details[mode['sku']], currency)
+            for mode in modes
+        }
+
+    def _calculate_price_details(self, sku):
+        """
+        Calculate the price details of the given SKU for this user, or return None if they cannot be calculated.
         """
         try:
-            price_details = self.client.baskets.calculate.get(sku=[mode['sku']])
+            return self.client.baskets.calculate.get(sku=[sku])
         except (SlumberBaseException, ConnectionError, Timeout) as exc:
-            LOGGER.exception('Failed to get price details for sku %s due to: %s', mode['sku'], str(exc))
-            price_details = {}
+            LOGGER.exception('Failed to get price details for sku %s due to: %s', sku, str(exc))
+            return None
+
+    @staticmethod
+    def _format_final_price(mode, price_details, currency):
+        """
+        Format the discounted price of the course mode from its price details.
+        """
         price = price_details.get('total_incl_tax', mode['min_price'])
         if price != mode['min_price']:
             return format_price(price, currency)
@@ -13,6 +13,7 @@ from django.core.cache import cache
 
 from enterprise import utils
 from enterprise.api_client.lms import JwtLmsApiClient
+from six.moves.urllib.parse import parse_qs, urlparse  # pylint: disable=import-error
 
 LOGGER = getLogger(__name__)
 
@@ -64,6 +65,48 @@ class EnterpriseApiClient(JwtLmsApiClient):
 
         return course_runs
 
+    def iter_enterprise_course_runs(self, enterprise_customer):
+        """
+        Yield the course runs in the given EnterpriseCustomer's catalogs, one page of results at a time.
+
+        Unlike ``get_enterprise_course_runs``, the responses are neither cached nor kept in memory, and the next
+        page is only requested once the course runs of the previous one have been consumed. A course run which is
+        in several catalogs is only yielded once.
+
+        Arguments:
+            enterprise_customer (Enterprise Customer): Enterprise customer for fetching courses.
+
+        Yields:
+            dict: The details of a course run.
+        """
+        course_run_keys = set()
+        for course_runs in self._iter_enterprise_course_run_pages(enterprise_customer):
+            for course_run_key, course_run in course_runs.items():
+                if course_run_key not in course_run_keys:
+                    course_run_keys.add(course_run_key)
+                    yield course_run
+
+    def _iter_enterprise_course_run_pages(self, enterprise_customer):
+        """
+        Yield a dict with "course run key", "course run" key value pairs for each page of the catalogs' results.
+        """
+        if enterprise_customer.catalog:
+            for courses in self._iterate_pages(
+                    self.ENTERPRISE_CUSTOMER_ENDPOINT,
+                    detail_resource='courses',
+                    resource_id=str(enterprise_customer.uuid),
+            ):
+                yield self.get_course_runs_from_courses(courses)
+
+        for enterprise_customer_catalog in enterprise_customer.enterprise_customer_catalogs.all():
+            for search_results in self._iterate_pages(
+                    self.ENTERPRISE_CUSTOMER_CATALOGS_ENDPOINT,
+                    resource_id=str(enterprise_customer_catalog.uuid),
+                    # we need to fetch data in large chunks so that we do not hit api limit.
+                    querystring={'page_size': 1000},
+            ):
+                yield self.get_course_runs_from_search_results(search_results)
+
     @staticmethod
     def get_course_runs_from_courses(courses):
         """
@@ -136,3 +179,40 @@ class EnterpriseApiClient(JwtLmsApiClient):
                 # Now that we've got a response, cache it.
                 cache.set(cache_key, response, settings.ENTERPRISE_API_CACHE_TIMEOUT)
         return response or default_val
+
+    def _iterate_pages(self, resource, detail_resource=None, resource_id=None, querystring=None):
+        """
+        Iterates over the results of the pages of a call to one of the Enterprise endpoints.
+
+        Each page is only requested once the results of the previous one have been consumed, through
+        ``_load_page``, so that the JWT is refreshed whenever it expires while the pages are iterated over.
+
+        :param resource: The endpoint resource name.
+        :param detail_resource: The sub-resource to append to the path.
+        :param resource_id: The resource ID for the specific detail to get from the endpoint.
+        :param querystring: Optional query string parameters.
+        :return: An iterator over the results of each page returned by the API.
+        """
+        querystring = querystring or {}
+        while True:
+            response = self._load_page(resource, detail_resource, resource_id, querystring)
+            yield response.get('results', [])
+            next_page = response.get('next')
+            if not next_page:
+                return
+            querystring = parse_qs(urlparse(next_page).query, keep_blank_values=True)
+
+    @JwtLmsApiClient.refresh_token
+    def _load_page(self, resource, detail_resource, resource_id, querystring):
+        """
+        Loads a single page of a call to one of the Enterprise endpoints, with the current JWT.
+
+        :param resource: The endpoint resource name.
+        :param detail_resource: The sub-resource to append to the path.
+        :param resource_id: The resource ID for the specific detail to get from the endpoint.
+        :param querystring: The query string parameters of the page.
+        :return: The page returned by the API.
+        """
+        endpoint = getattr(self.client, resource)(resource_id)
+        endpoint = getattr(endpoint, detail_resource) if detail_resource else endpoint
+        return endpoint.get(**querystring)
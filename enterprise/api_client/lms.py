@@ -7,19 +7,22 @@ from __future__ import absolute_import, unicode_literals
 import datetime
 import logging
 from functools import wraps
+from multiprocessing.pool import ThreadPool
 from time import time
 
 from edx_rest_api_client.client import EdxRestApiClient
 from opaque_keys.edx.keys import CourseKey
 from requests import Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, Timeout  # pylint: disable=redefined-builtin
-from slumber.exceptions import HttpNotFoundError, SlumberBaseException
+from slumber.exceptions import HttpClientError, HttpNotFoundError, SlumberBaseException
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
 from enterprise.constants import COURSE_MODE_SORT_ORDER
-from enterprise.utils import NotConnectedToOpenEdX
+from enterprise.utils import NotConnectedToOpenEdX, get_cache_key, traverse_pagination
 
 try:
     from student.models import CourseEnrollment
@@ -51,10 +54,10 @@ class LmsApiClient(object):
         """
         Create an LMS API client, authenticated with the API token from Django settings.
         """
-        session = Session()
-        session.headers = {"X-Edx-Api-Key": settings.EDX_API_KEY}
+        self.session = Session()
+        self.session.headers = {"X-Edx-Api-Key": settings.EDX_API_KEY}
         self.client = EdxRestApiClient(
-            self.API_BASE_URL, append_slash=self.APPEND_SLASH, session=session
+            self.API_BASE_URL, append_slash=self.APPEND_SLASH, session=self.session
         )
 
 
@@ -119,6 +122,31 @@ class EnrollmentApiClient(LmsApiClient):
 
     API_BASE_URL = settings.ENTERPRISE_ENROLLMENT_API_URL
 
+    # Number of requests made concurrently by the bulk methods, when they call the endpoints of single enrollments.
+    # Can be overridden through the ``ENTERPRISE_ENROLLMENT_API_CONCURRENCY`` setting.
+    CONCURRENCY = 8
+
+    # Maximum number of usernames filtered on in each request to the endpoint listing the enrollments of a course.
+    USERNAMES_PER_REQUEST = 100
+
+    def __init__(self, concurrency=None):
+        """
+        Create an Enrollment API client, whose bulk methods use the enrollments list endpoint until it fails.
+
+        The connection pool of the session is sized to the concurrency, so that the concurrent requests reuse their
+        connections to the LMS rather than opening new ones.
+
+        Args:
+            concurrency (int): The number of requests made concurrently by the bulk methods; defaults to the
+                ENTERPRISE_ENROLLMENT_API_CONCURRENCY setting
+        """
+        super(EnrollmentApiClient, self).__init__()
+        if concurrency is None:
+            concurrency = getattr(settings, 'ENTERPRISE_ENROLLMENT_API_CONCURRENCY', self.CONCURRENCY)
+        self.concurrency = max(int(concurrency), 1)
+        self.session.mount(self.API_BASE_URL, HTTPAdapter(pool_maxsize=self.concurrency))
+        self.enrollments_list_available = True
+
     def get_course_details(self, course_id):
         """
         Query the Enrollment API for the course details of the given course_id.
@@ -210,6 +238,106 @@ class EnrollmentApiClient(LmsApiClient):
             }
         )
 
+    def enroll_users_in_course(self, usernames, course_id, mode):
+        """
+        Call the enrollment API to enroll several users in the course specified by course_id.
+
+        The users are enrolled concurrently through the endpoint of single enrollments: the bulk enrollment endpoint
+        of the LMS can neither set the enrollment mode nor be called with the API key.
+
+        Args:
+            usernames (list): The usernames by which the users go on the OpenEdX platform
+            course_id (str): The string value of the course's unique identifier
+            mode (str): The enrollment mode which should be used for the enrollments
+
+        Returns:
+            tuple: A dictionary of the enrollment details of each user who was enrolled, and a dictionary of the
+                error raised for each user who could not be enrolled: an ``HttpClientError`` if the enrollment was
+                refused, or the server error, connection error or timeout the request failed with.
+
+        """
+        def enroll_user(username):
+            """
+            Enroll the user, returning the error raised rather than raising it.
+            """
+            try:
+                return self.enroll_user_in_course(username, course_id, mode), None
+            except (SlumberBaseException, ConnectionError, Timeout) as exc:
+                return None, exc
+
+        enrolled = {}
+        failed = {}
+        usernames = list(usernames)
+        for username, (enrollment, error) in zip(usernames, self._map(enroll_user, usernames)):
+            if error is None:
+                enrolled[username] = enrollment
+            else:
+                failed[username] = error
+        return enrolled, failed
+
+    def get_course_enrollments(self, usernames, course_id):
+        """
+        Query the enrollment API to get information about the enrollments of several users in a course.
+
+        The enrollments are listed in batches through the enrollments list endpoint of the LMS. Should the endpoint
+        be unavailable, or refuse the API key, the enrollments are fetched concurrently one user at a time.
+
+        Args:
+            usernames (list): The usernames by which the users go on the OpenEdX platform
+            course_id (str): The string value of the course's unique identifier
+
+        Returns:
+            dict: The details of the enrollment of each user enrolled in the course, by username.
+
+        """
+        def get_course_enrollment(username):
+            """
+            Get the enrollment of the user in the course, through the endpoint of single enrollments.
+            """
+            return self.get_course_enrollment(username, course_id)
+
+        usernames = list(usernames)
+        enrollments = {}
+        for start in range(0, len(usernames), self.USERNAMES_PER_REQUEST):
+            batch = usernames[start:start + self.USERNAMES_PER_REQUEST]
+            if self.enrollments_list_available:
+                endpoint = self.client.enrollments
+                try:
+                    response = endpoint.get(course_id=course_id, username=','.join(batch))
+                    enrollments.update(
+                        (enrollment['user'], enrollment) for enrollment in traverse_pagination(response, endpoint)
+                    )
+                    continue
+                except HttpClientError as exc:
+                    LOGGER.warning(
+                        'Failed to list the enrollments of course %s, fetching them one user at a time instead: %s',
+                        course_id, str(exc)
+                    )
+                    self.enrollments_list_available = False
+
+            fetched = self._map(get_course_enrollment, batch)
+            enrollments.update((username, enrollment) for username, enrollment in zip(batch, fetched) if enrollment)
+        return enrollments
+
+    def _map(self, func, items):
+        """
+        Call ``func`` with each of the items, concurrently, and return the results in the order of the items.
+
+        The calls share the session of this client: its headers and adapters are left untouched once the client is
+        created, slumber builds a new resource on each attribute lookup, and the urllib3 connection pool is
+        thread-safe, so the session can safely be used from several threads at once.
+        """
+        concurrency = min(self.concurrency, len(items))
+        if concurrency <= 1:
+            return [func(item) for item in items]
+
+        pool = ThreadPool(concurrency)
+        try:
+            return pool.map(func, items)
+        finally:
+            pool.terminate()
+            pool.join()
+
     def get_course_enrollment(self, username, course_id):
         """
         Query the enrollment API to get information about a single course enrollment.
@@ -305,10 +433,18 @@ class ThirdPartyAuthApiClient(LmsApiClient):
 
     API_BASE_URL = settings.LMS_ROOT_URL + '/api/third_party_auth/v0/'
 
+    # Number of usernames looked up per request by ``get_remote_ids``.
+    REMOTE_ID_BATCH_SIZE = 100
+    # Number of seconds remote IDs are cached. Can be overridden through the
+    # ``ENTERPRISE_REMOTE_ID_CACHE_TIMEOUT`` setting.
+    REMOTE_ID_CACHE_TIMEOUT = 60 * 60
+
     def get_remote_id(self, identity_provider, username):
         """
         Retrieve the remote identifier for the given username.
 
+        Remote identifiers which are found are cached for ``REMOTE_ID_CACHE_TIMEOUT`` seconds.
+
         Args:
         * ``identity_provider`` (str): identifier slug for the third-party authentication service used during SSO.
         * ``username`` (str): The username ID identifying the user for which to retrieve the remote name.
@@ -316,17 +452,53 @@ class ThirdPartyAuthApiClient(LmsApiClient):
         Returns:
             string or None: the remote name of the given user.  None if not found.
         """
-        try:
-            returned = self.client.providers(identity_provider).users.get(username=username)
-            results = returned.get('results', [])
-        except HttpNotFoundError:
-            LOGGER.error('remote_id not found for third party provider=%s, username=%s', identity_provider, username)
-            results = []
+        return self.get_remote_ids(identity_provider, [username])[username]
 
-        for row in results:
-            if row.get('username') == username:
-                return row.get('remote_id')
-        return None
+    def get_remote_ids(self, identity_provider, usernames):
+        """
+        Retrieve the remote identifiers of the given usernames.
+
+        The remote identifiers which are not cached are looked up ``REMOTE_ID_BATCH_SIZE`` usernames at a time.
+
+        Args:
+        * ``identity_provider`` (str): identifier slug for the third-party authentication service used during SSO.
+        * ``usernames`` (iterable): The usernames identifying the users for which to retrieve the remote names.
+
+        Returns:
+            dict: Maps each of the given usernames to its remote name, or to None if not found.
+        """
+        usernames = list(set(usernames))
+        cache_keys = {
+            username: get_cache_key(resource='remote_id', identity_provider=identity_provider, username=username)
+            for username in usernames
+        }
+        cached_remote_ids = cache.get_many(list(cache_keys.values()))
+        remote_ids = {username: cached_remote_ids.get(cache_keys[username]) for username in usernames}
+
+        missing_usernames = [username for username in usernames if remote_ids[username] is None]
+        found_remote_ids = {}
+        for index in range(0, len(missing_usernames), self.REMOTE_ID_BATCH_SIZE):
+            batch = missing_usernames[index:index + self.REMOTE_ID_BATCH_SIZE]
+            endpoint = self.client.providers(identity_provider).users
+            try:
+                results = traverse_pagination(endpoint.get(username=batch), endpoint)
+            except HttpNotFoundError:
+                LOGGER.error(
+                    'remote_id not found for third party provider=%s, usernames=%s', identity_provider, batch
+                )
+                results = []
+
+            for row in results:
+                username = row.get('username')
+                if username in missing_usernames and username not in found_remote_ids:
+                    found_remote_ids[username] = row.get('remote_id')
+
+        remote_ids.update(found_remote_ids)
+        cache.set_many(
+            {cache_keys[username]: remote_id for username, remote_id in found_remote_ids.items() if remote_id},
+            getattr(settings, 'ENTERPRISE_REMOTE_ID_CACHE_TIMEOUT', self.REMOTE_ID_CACHE_TIMEOUT),
+        )
+        return remote_ids
 
 
 class GradesApiClient(JwtLmsApiClient):
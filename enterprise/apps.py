@@ -10,6 +10,15 @@ from django.conf import settings
 
 from enterprise.constants import USER_POST_SAVE_DISPATCH_UID
 
+# The models whose records are looked up along with their EnterpriseCustomer, and cached with it.
+ENTERPRISE_CUSTOMER_CACHED_MODELS = (
+    'EnterpriseCustomer',
+    'EnterpriseCustomerUser',
+    'EnterpriseCustomerIdentityProvider',
+    'EnterpriseCustomerBrandingConfiguration',
+    'EnterpriseCustomerCatalog',
+)
+
 
 class EnterpriseConfig(AppConfig):
     """
@@ -31,12 +40,23 @@ class EnterpriseConfig(AppConfig):
         """
         Perform other one-time initialization steps.
         """
-        from enterprise.signals import handle_user_post_save
-        from django.db.models.signals import pre_migrate, post_save
+        from enterprise.signals import handle_enterprise_customer_change, handle_user_post_save
+        from enterprise.utils import end_request_cache, start_request_cache
+        from django.core.signals import request_finished, request_started
+        from django.db.models.signals import post_delete, pre_migrate, post_save
 
         post_save.connect(handle_user_post_save, sender=self.auth_user_model, dispatch_uid=USER_POST_SAVE_DISPATCH_UID)
         pre_migrate.connect(self._disconnect_user_post_save_for_migrations)
 
+        # Memoize the enterprise customer lookups for the duration of each request, and forget the cached
+        # enterprise customers whenever they change.
+        request_started.connect(start_request_cache)
+        request_finished.connect(end_request_cache)
+        for model_name in ENTERPRISE_CUSTOMER_CACHED_MODELS:
+            model = apps.get_model('enterprise', model_name)
+            post_save.connect(handle_enterprise_customer_change, sender=model)
+            post_delete.connect(handle_enterprise_customer_change, sender=model)
+
     def _disconnect_user_post_save_for_migrations(self, sender, **kwargs):  # pylint: disable=unused-argument
         """
         Handle pre_migrate signal - disconnect User post_save handler.
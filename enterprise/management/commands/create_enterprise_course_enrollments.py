@@ -56,7 +56,8 @@ class Command(BaseCommand):
         except EnterpriseCustomer.DoesNotExist:
             raise CommandError('No enterprise customer found for UUID: {uuid}'.format(uuid=enterprise_uuid))
 
-        enterprise_learners = enterprise_customer.enterprise_customer_users.all()
+        enterprise_learners = list(enterprise_customer.enterprise_customer_users.with_users())
+        enrollment_client = EnrollmentApiClient()
         for course_id in course_ids:
             if not self.get_course_details(course_id):
                 LOGGER.warning('Course {course} not found, skipping.'.format(course=course_id))
@@ -64,7 +65,8 @@ class Command(BaseCommand):
 
             enrolled_users_count, ent_course_enrollments_count = self.create_enterprise_course_enrollments(
                 course_id,
-                enterprise_learners
+                enterprise_learners,
+                enrollment_client,
             )
 
             LOGGER.info(
@@ -94,7 +96,7 @@ class Command(BaseCommand):
 
         return None
 
-    def create_enterprise_course_enrollments(self, course_id, enterprise_learners):
+    def create_enterprise_course_enrollments(self, course_id, enterprise_learners, enrollment_client):
         """
         Create EnterpriseCourseEnrollments (if they do not exist) for each provided enterprise
         learner in the provided course if the user is already enrolled in the given course.
@@ -102,17 +104,21 @@ class Command(BaseCommand):
         Arguments:
             course_id (string): The course ID.
             enterprise_learners (list): List of EnterpriseCustomerUsers.
+            enrollment_client (EnrollmentApiClient): The client to fetch the enrollments of the learners with.
 
         Returns:
             tuple: Number of enrolled users in the course, Number of EnterpriseCourseEnrollments created.
         """
         enrolled_users_count = 0
         ent_course_enrollments_count = 0
+        enterprise_learners = [learner for learner in enterprise_learners if learner.user is not None]
+        course_enrollments = enrollment_client.get_course_enrollments(
+            [learner.username for learner in enterprise_learners],
+            course_id,
+        )
         for enterprise_learner in enterprise_learners:
-            course_enrollment = EnrollmentApiClient().get_course_enrollment(enterprise_learner.user.username, course_id)
-
             # If user is enrolled in the course, create EnterpriseCourseEnrollment.
-            if course_enrollment:
+            if course_enrollments.get(enterprise_learner.username):
                 enrolled_users_count += 1
                 __, created = EnterpriseCourseEnrollment.objects.get_or_create(
                     enterprise_customer_user=enterprise_learner,
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Django management command for running the bulk enrollment jobs requested from the manage learners admin page.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import logging
+import time
+
+from django.core.management import BaseCommand
+
+from enterprise.admin.jobs import BulkEnrollmentJobRunner
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Runs the pending bulk enrollment jobs, one at a time, polling for new jobs until it is stopped.
+
+    Several instances of the command can run concurrently, on one or more hosts: each job is claimed by a single
+    worker, and the jobs of a worker which stopped are resumed by another worker.
+    """
+    help = 'Run the pending bulk enrollment jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            action='store',
+            dest='workers',
+            type=int,
+            default=None,
+            help='Number of learners enrolled concurrently. '
+                 'Defaults to the ENTERPRISE_BULK_ENROLLMENT_JOB_WORKERS setting.'
+        )
+        parser.add_argument(
+            '--poll_interval',
+            action='store',
+            dest='poll_interval',
+            type=float,
+            default=10,
+            help='Number of seconds to wait for new jobs, when there is no job to run.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            dest='once',
+            default=False,
+            help='Exit once there is no job to run, instead of waiting for new jobs.'
+        )
+
+    def handle(self, *args, **options):
+        runner = BulkEnrollmentJobRunner(workers=options['workers'])
+        while True:
+            try:
+                job = runner.run_next_job()
+            except Exception:  # pylint: disable=broad-except
+                # The job is left running, and is resumed by a worker once its heartbeat is stale.
+                LOGGER.exception('Failed to run a bulk enrollment job.')
+                job = None
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
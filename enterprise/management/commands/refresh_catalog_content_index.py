@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Django management command for refreshing the local content index of EnterpriseCustomerCatalogs.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import logging
+
+from django.core.management import BaseCommand
+
+from enterprise.models import EnterpriseCustomerCatalog
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the local index of the course runs, courses and programs contained in EnterpriseCustomerCatalogs.
+
+    Meant to be run on a schedule more often than ``ENTERPRISE_CATALOG_CONTENT_INDEX_MAX_AGE`` seconds,
+    so that catalog membership lookups do not need to call the discovery service.
+    """
+    help = 'Refresh the local content index of enterprise customer catalogs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-e',
+            '--enterprise_uuid',
+            action='store',
+            dest='enterprise_uuid',
+            default=None,
+            help='Only refresh the catalogs of the EnterpriseCustomer with this UUID.'
+        )
+        parser.add_argument(
+            '-c',
+            '--catalog_uuid',
+            action='store',
+            dest='catalog_uuid',
+            default=None,
+            help='Only refresh the EnterpriseCustomerCatalog with this UUID.'
+        )
+
+    def handle(self, *args, **options):
+        catalogs = EnterpriseCustomerCatalog.objects.filter(enterprise_customer__active=True)
+        if options.get('enterprise_uuid'):
+            catalogs = catalogs.filter(enterprise_customer__uuid=options['enterprise_uuid'])
+        if options.get('catalog_uuid'):
+            catalogs = catalogs.filter(uuid=options['catalog_uuid'])
+
+        for catalog in catalogs.select_related('enterprise_customer__site'):
+            try:
+                content_items_count = catalog.refresh_content_index()
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception('Failed to refresh the content index of catalog %s.', catalog.uuid)
+                continue
+            LOGGER.info('Indexed %s content items for catalog %s.', content_items_count, catalog.uuid)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprise', '0034_auto_20171023_0727'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnterpriseCustomerCatalogContentItem',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('content_type', models.CharField(max_length=10, choices=[('courserun', 'Course Run'), ('course', 'Course'), ('program', 'Program')])),
+                ('content_key', models.CharField(max_length=255, help_text='The course run key, course key or program UUID of the content item.')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enterprisecustomercatalog',
+            name='content_indexed_at',
+            field=models.DateTimeField(blank=True, null=True, editable=False, help_text='When the local index of the content contained in this catalog was last refreshed.'),
+        ),
+        migrations.AddField(
+            model_name='historicalenterprisecustomercatalog',
+            name='content_indexed_at',
+            field=models.DateTimeField(blank=True, null=True, editable=False, help_text='When the local index of the content contained in this catalog was last refreshed.'),
+        ),
+        migrations.AddField(
+            model_name='enterprisecustomercatalogcontentitem',
+            name='catalog',
+            field=models.ForeignKey(related_name='indexed_content_items', to='enterprise.EnterpriseCustomerCatalog'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='enterprisecustomercatalogcontentitem',
+            unique_together=set([('catalog', 'content_type', 'content_key')]),
+        ),
+    ]
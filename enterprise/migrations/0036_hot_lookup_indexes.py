@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprise', '0035_catalog_content_index'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='enterprisecourseenrollment',
+            index_together=set([('course_id', 'enterprise_customer_user')]),
+        ),
+    ]
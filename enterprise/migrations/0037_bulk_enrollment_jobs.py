@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+import django.db.models.deletion
+import jsonfield.fields
+from django.conf import settings
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('enterprise', '0036_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkEnrollmentJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', model_utils.fields.AutoCreatedField(verbose_name='created', default=django.utils.timezone.now, editable=False)),
+                ('modified', model_utils.fields.AutoLastModifiedField(verbose_name='modified', default=django.utils.timezone.now, editable=False)),
+                ('course_id', models.CharField(max_length=255, blank=True)),
+                ('program_details', jsonfield.fields.JSONField(blank=True, null=True, help_text='The details of the program to enroll the learners in, as returned by the Course Catalog API.')),
+                ('course_mode', models.CharField(max_length=25)),
+                ('notify', models.BooleanField(default=True)),
+                ('status', models.CharField(max_length=20, db_index=True, default='pending', choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed')])),
+                ('worker', models.CharField(max_length=255, blank=True, help_text='The worker which last ran the job.')),
+                ('heartbeat', models.DateTimeField(blank=True, null=True, help_text='The last time the worker running the job reported progress.')),
+                ('enterprise_customer', models.ForeignKey(related_name='bulk_enrollment_jobs', to='enterprise.EnterpriseCustomer')),
+                ('requester', models.ForeignKey(blank=True, null=True, help_text='The user who requested the enrollment, on whose behalf the course details are retrieved.', related_name='+', on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BulkEnrollmentJobLearner',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('user_email', models.EmailField(max_length=254)),
+                ('status', models.CharField(max_length=20, default='pending', choices=[('pending', 'Pending'), ('enrolled', 'Enrolled'), ('pending_registration', 'Enrolled on registration'), ('failed', 'Failed')])),
+                ('message', models.TextField(blank=True)),
+                ('modified', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(related_name='learners', to='enterprise.BulkEnrollmentJob')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='bulkenrollmentjoblearner',
+            unique_together=set([('job', 'user_email')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='bulkenrollmentjoblearner',
+            index_together=set([('job', 'status')]),
+        ),
+    ]
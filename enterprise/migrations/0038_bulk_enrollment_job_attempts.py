@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprise', '0037_bulk_enrollment_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulkenrollmentjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text='The number of times the job was claimed.'),
+        ),
+        migrations.AlterField(
+            model_name='bulkenrollmentjob',
+            name='status',
+            field=models.CharField(max_length=20, db_index=True, default='pending', choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')]),
+        ),
+    ]
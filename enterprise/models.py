@@ -21,8 +21,9 @@ from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.files.storage import default_storage
 from django.core.urlresolvers import reverse
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.template import Context, Template
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.functional import lazy
@@ -35,7 +36,7 @@ from enterprise import utils
 from enterprise.api_client.discovery import CourseCatalogApiServiceClient
 from enterprise.api_client.lms import EnrollmentApiClient, ThirdPartyAuthApiClient, enroll_user_in_course_locally
 from enterprise.constants import json_serialized_course_modes
-from enterprise.utils import get_configuration_value
+from enterprise.utils import clear_enterprise_customer_cache, get_configuration_value
 from enterprise.validators import validate_image_extension, validate_image_size
 from six.moves.urllib.parse import urljoin  # pylint: disable=import-error,ungrouped-imports
 
@@ -252,13 +253,69 @@ class EnterpriseCustomer(TimeStampedModel):
         return False
 
 
-class EnterpriseCustomerUserManager(models.Manager):
+class EnterpriseCustomerUserQuerySet(models.query.QuerySet):
+    """
+    Customized QuerySets for the ``EnterpriseCustomerUser`` model.
+
+    ``with_users`` makes the QuerySet fetch the ``User`` of all its ``EnterpriseCustomerUser`` objects in a single
+    query, when it is evaluated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize a QuerySet which does not fetch the users.
+        """
+        super(EnterpriseCustomerUserQuerySet, self).__init__(*args, **kwargs)
+        self._with_users = False
+
+    def with_users(self):
+        """
+        Return a copy of this QuerySet which fetches the linked users in bulk, along with the results.
+        """
+        clone = self._clone()
+        clone._with_users = True  # pylint: disable=protected-access
+        return clone
+
+    def _clone(self, *args, **kwargs):
+        """
+        Copy the QuerySet, keeping whether it fetches the linked users.
+        """
+        clone = super(EnterpriseCustomerUserQuerySet, self)._clone(*args, **kwargs)
+        clone._with_users = getattr(self, '_with_users', False)  # pylint: disable=protected-access
+        return clone
+
+    def _fetch_all(self):
+        """
+        Fetch the results, and then their linked users if requested.
+        """
+        load_users = self._with_users and self._result_cache is None
+        super(EnterpriseCustomerUserQuerySet, self)._fetch_all()
+        if load_users:
+            EnterpriseCustomerUser.load_users(
+                [result for result in self._result_cache if isinstance(result, EnterpriseCustomerUser)]
+            )
+
+
+class EnterpriseCustomerUserManager(models.Manager.from_queryset(EnterpriseCustomerUserQuerySet)):
+    # pylint: disable=no-member
     """
     Model manager for :class:`.EnterpriseCustomerUser` entity.
 
     This class should contain methods that create, modify or query :class:`.EnterpriseCustomerUser` entities.
     """
 
+    # Number of email addresses looked up, and of links created, in each query of the bulk linking methods.
+    # Can be overridden through the ``ENTERPRISE_BULK_LINK_BATCH_SIZE`` setting.
+    BULK_LINK_BATCH_SIZE = 500
+
+    def _get_bulk_link_batches(self, user_emails):
+        """
+        Split the distinct given email addresses in lists of at most ``BULK_LINK_BATCH_SIZE`` addresses.
+        """
+        batch_size = getattr(settings, 'ENTERPRISE_BULK_LINK_BATCH_SIZE', self.BULK_LINK_BATCH_SIZE)
+        user_emails = sorted(set(user_emails))
+        return [user_emails[start:start + batch_size] for start in range(0, len(user_emails), batch_size)]
+
     def get_link_by_email(self, user_email):
         """
         Return link by email.
@@ -279,6 +336,77 @@ class EnterpriseCustomerUserManager(models.Manager):
 
         return None
 
+    def get_links_by_email(self, user_emails):
+        """
+        Return the links of the given emails, in bulk.
+
+        This is the bulk counterpart of ``get_link_by_email``: the users, their links and the pending links
+        of each batch of emails are each fetched in a single query.
+
+        Returns:
+            dict: Maps each linked email to its :class:`.EnterpriseCustomerUser` or
+                :class:`.PendingEnterpriseCustomerUser` instance. The emails which are not linked are left out.
+        """
+        links = {}
+        for user_emails_batch in self._get_bulk_link_batches(user_emails):
+            user_emails_by_id = dict(User.objects.filter(email__in=user_emails_batch).values_list('id', 'email'))
+            for link in self.filter(user_id__in=list(user_emails_by_id)).select_related('enterprise_customer'):
+                links.setdefault(user_emails_by_id[link.user_id], link)
+
+            pending_links = PendingEnterpriseCustomerUser.objects.filter(
+                user_email__in=[user_email for user_email in user_emails_batch if user_email not in links]
+            ).select_related('enterprise_customer')
+            for pending_link in pending_links:
+                links[pending_link.user_email] = pending_link
+        return links
+
+    def bulk_link_users(self, enterprise_customer, user_emails):
+        """
+        Link the given user emails to Enterprise Customer, in bulk.
+
+        This is the bulk counterpart of ``link_user``: for each batch of emails, the existing users and links
+        are fetched in a single query each, and the missing :class:`.EnterpriseCustomerUser` and
+        :class:`.PendingEnterpriseCustomerUser` instances are created with a single query each. Emails which
+        already have a pending link are left alone.
+
+        Returns:
+            int: The number of links created.
+        """
+        created = 0
+        for user_emails_batch in self._get_bulk_link_batches(user_emails):
+            # Link the oldest user when several users share an email address.
+            user_ids = dict(
+                User.objects.filter(email__in=user_emails_batch).order_by('-id').values_list('email', 'id')
+            )
+            linked_user_ids = set(self.filter(
+                enterprise_customer=enterprise_customer, user_id__in=list(user_ids.values())
+            ).values_list('user_id', flat=True))
+            new_links = [
+                self.model(enterprise_customer=enterprise_customer, user_id=user_id)
+                for user_id in set(user_ids.values()) - linked_user_ids
+            ]
+
+            pending_user_emails = [user_email for user_email in user_emails_batch if user_email not in user_ids]
+            pending_linked_user_emails = set(PendingEnterpriseCustomerUser.objects.filter(
+                user_email__in=pending_user_emails
+            ).values_list('user_email', flat=True))
+            new_pending_links = [
+                PendingEnterpriseCustomerUser(enterprise_customer=enterprise_customer, user_email=user_email)
+                for user_email in pending_user_emails if user_email not in pending_linked_user_emails
+            ]
+
+            with transaction.atomic():
+                if new_links:
+                    self.bulk_create(new_links)
+                if new_pending_links:
+                    PendingEnterpriseCustomerUser.objects.bulk_create(new_pending_links)
+            created += len(new_links) + len(new_pending_links)
+
+        if created:
+            # ``bulk_create`` does not send the ``post_save`` signal which forgets the cached lookups.
+            clear_enterprise_customer_cache(enterprise_customer.uuid)
+        return created
+
     def link_user(self, enterprise_customer, user_email):
         """
         Link user email to Enterprise Customer.
@@ -355,19 +483,48 @@ class EnterpriseCustomerUser(TimeStampedModel):
 
         Return :class:`django.contrib.auth.models.User` instance associated with this
         :class:`EnterpriseCustomerUser` instance via email.
-        """
-        try:
-            return User.objects.get(pk=self.user_id)
-        except User.DoesNotExist:
-            return None
+
+        The user is only fetched once per instance, as long as ``user_id`` does not change; see ``load_users``
+        to fetch the users of many instances at once.
+        """
+        cached_user_id, user = getattr(self, '_cached_user', (None, None))
+        if cached_user_id != self.user_id:
+            user = User.objects.filter(pk=self.user_id).first()
+            self._cached_user = (self.user_id, user)  # pylint: disable=attribute-defined-outside-init
+        return user
+
+    @classmethod
+    def load_users(cls, enterprise_customer_users):
+        """
+        Fetch the users linked to the given instances in a single query, for ``user`` to return them.
+
+        The instances whose user was already fetched are left alone.
+        """
+        enterprise_customer_users = [
+            enterprise_customer_user for enterprise_customer_user in enterprise_customer_users
+            if getattr(enterprise_customer_user, '_cached_user', (None, None))[0] != enterprise_customer_user.user_id
+        ]
+        if not enterprise_customer_users:
+            return
+
+        users = User.objects.in_bulk([
+            enterprise_customer_user.user_id for enterprise_customer_user in enterprise_customer_users
+        ])
+        for enterprise_customer_user in enterprise_customer_users:
+            # pylint: disable=protected-access
+            enterprise_customer_user._cached_user = (
+                enterprise_customer_user.user_id,
+                users.get(enterprise_customer_user.user_id),
+            )
 
     @property
     def user_email(self):
         """
         Return linked user email.
         """
-        if self.user is not None:
-            return self.user.email
+        user = self.user
+        if user is not None:
+            return user.email
         return None
 
     @property
@@ -375,8 +532,9 @@ class EnterpriseCustomerUser(TimeStampedModel):
         """
         Return linked user's username.
         """
-        if self.user is not None:
-            return self.user.username
+        user = self.user
+        if user is not None:
+            return user.username
         return None
 
     @property
@@ -460,17 +618,56 @@ class EnterpriseCustomerUser(TimeStampedModel):
         """
         Retrieve the SSO provider's identifier for this user from the LMS Third Party API.
 
+        The identifier is only retrieved once per instance; see ``load_remote_ids`` to retrieve the identifiers
+        of many users at once.
+
         Returns None if:
         * the user doesn't exist, or
         * the associated EnterpriseCustomer has no identity_provider, or
         * the remote identity is not found.
         """
-        user = self.user
-        identity_provider = self.enterprise_customer.identity_provider
-        if user and identity_provider:
-            client = ThirdPartyAuthApiClient()
-            return client.get_remote_id(self.enterprise_customer.identity_provider, user.username)
-        return None
+        if not hasattr(self, '_remote_id'):
+            self._remote_id = None  # pylint: disable=attribute-defined-outside-init
+            identity_provider = self.enterprise_customer.identity_provider
+            user = self.user if identity_provider else None
+            if user:
+                client = ThirdPartyAuthApiClient()
+                self._remote_id = client.get_remote_id(identity_provider, user.username)
+        return self._remote_id
+
+    @classmethod
+    def load_remote_ids(cls, enterprise_customer_users):
+        """
+        Retrieve the SSO provider's identifiers of the given users in bulk, for ``get_remote_id`` to return them.
+
+        The users are fetched in a single query, and the identifiers of the users of each identity provider are
+        retrieved from the LMS Third Party API in batches.
+        """
+        users_by_identity_provider = collections.defaultdict(list)
+        for enterprise_customer_user in enterprise_customer_users:
+            identity_provider = enterprise_customer_user.enterprise_customer.identity_provider
+            if identity_provider:
+                users_by_identity_provider[identity_provider].append(enterprise_customer_user)
+            else:
+                enterprise_customer_user._remote_id = None  # pylint: disable=protected-access
+
+        if not users_by_identity_provider:
+            return
+
+        cls.load_users([
+            enterprise_customer_user
+            for identity_provider_users in users_by_identity_provider.values()
+            for enterprise_customer_user in identity_provider_users
+        ])
+        client = ThirdPartyAuthApiClient()
+        for identity_provider, identity_provider_users in users_by_identity_provider.items():
+            remote_ids = client.get_remote_ids(
+                identity_provider,
+                [user.username for user in identity_provider_users if user.username is not None],
+            )
+            for enterprise_customer_user in identity_provider_users:
+                # pylint: disable=protected-access
+                enterprise_customer_user._remote_id = remote_ids.get(enterprise_customer_user.username)
 
     def enroll(self, course_run_id, mode):
         """
@@ -766,6 +963,7 @@ class EnterpriseCourseEnrollment(TimeStampedModel):
 
     class Meta(object):
         unique_together = (('enterprise_customer_user', 'course_id',),)
+        index_together = (('course_id', 'enterprise_customer_user'),)
         app_label = 'enterprise'
 
     enterprise_customer_user = models.ForeignKey(
@@ -880,6 +1078,12 @@ class EnterpriseCustomerCatalog(TimeStampedModel):
         help_text=_('Ordered list of enrollment modes which can be displayed to learners for course runs in'
                     ' this catalog.'),
     )
+    content_indexed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text=_('When the local index of the content contained in this catalog was last refreshed.'),
+    )
 
     history = HistoricalRecords()
 
@@ -935,10 +1139,90 @@ class EnterpriseCustomerCatalog(TimeStampedModel):
 
         return response
 
+    def save(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Drop the local content index if the content filter it was built from has changed.
+        """
+        if self.content_indexed_at and not self._state.adding:
+            previous = EnterpriseCustomerCatalog.objects.filter(pk=self.pk).only('content_filter').first()
+            if previous is None or previous.content_filter != self.content_filter:
+                self.content_indexed_at = None
+        super(EnterpriseCustomerCatalog, self).save(*args, **kwargs)
+
+    @property
+    def has_fresh_content_index(self):
+        """
+        Return whether the local content index of this catalog can be used to answer membership lookups.
+
+        The index is considered fresh for ``ENTERPRISE_CATALOG_CONTENT_INDEX_MAX_AGE`` seconds after it
+        was refreshed; past that, membership lookups go to the discovery service.
+        """
+        if not self.content_indexed_at:
+            return False
+        max_age = getattr(settings, 'ENTERPRISE_CATALOG_CONTENT_INDEX_MAX_AGE', 60 * 60 * 24)
+        return (timezone.now() - self.content_indexed_at).total_seconds() < max_age
+
+    @staticmethod
+    def _get_indexed_content_type(content):
+        """
+        Return the index content type of a discovery search result, or None if it is not offered by catalogs.
+        """
+        content_type = content.get('content_type')
+        if content_type == EnterpriseCustomerCatalogContentItem.COURSE_RUN:
+            return content_type if content.get('has_enrollable_seats') else None
+        if content_type == EnterpriseCustomerCatalogContentItem.PROGRAM:
+            return content_type if content.get('is_program_eligible_for_one_click_purchase') else None
+        if content_type == EnterpriseCustomerCatalogContentItem.COURSE:
+            return content_type
+        return None
+
+    def refresh_content_index(self):
+        """
+        Rebuild the local index of the course runs, courses and programs contained in this catalog.
+
+        Returns:
+            int: The number of content items in the refreshed index.
+        """
+        indexed_at = timezone.now()
+        search_results = CourseCatalogApiServiceClient(self.enterprise_customer.site).get_search_results(
+            dict(self.content_filter, page_size=EnterpriseCustomerCatalogContentItem.DISCOVERY_PAGE_SIZE)
+        )
+        content_items = {}
+        for content in search_results or []:
+            content_type = self._get_indexed_content_type(content)
+            id_field_name = 'uuid' if content_type == EnterpriseCustomerCatalogContentItem.PROGRAM else 'key'
+            content_key = content.get(id_field_name)
+            if content_type and content_key:
+                content_items[(content_type, content_key)] = EnterpriseCustomerCatalogContentItem(
+                    catalog=self,
+                    content_type=content_type,
+                    content_key=content_key,
+                )
+
+        if not content_items:
+            # An empty response is more likely to be a discovery service failure than an empty catalog,
+            # so rather than trusting it, leave membership lookups to the discovery service.
+            LOGGER.warning('No content found while refreshing the content index of catalog %s.', self.uuid)
+            indexed_at = None
+
+        with transaction.atomic():
+            self.indexed_content_items.all().delete()
+            EnterpriseCustomerCatalogContentItem.objects.bulk_create(
+                content_items.values(),
+                batch_size=EnterpriseCustomerCatalogContentItem.BULK_CREATE_BATCH_SIZE,
+            )
+            # Use an update query so that refreshing the index does not add a history record.
+            EnterpriseCustomerCatalog.objects.filter(pk=self.pk).update(content_indexed_at=indexed_at)
+        self.content_indexed_at = indexed_at
+
+        return len(content_items)
+
     def contains_content_items(self, content_id_field_name, content_id_values):
         """
         Return True if this catalog contains the items identified by `content_id_field_name` and `content_id_values`.
 
+        A fresh local content index answers the lookup without calling the discovery service.
+
         Arguments:
             content_id_field_name (str): The name of the field on the catalog content item
                                          that stores the item's unique identifier, e.g. "key", "uuid".
@@ -950,7 +1234,16 @@ class EnterpriseCustomerCatalog(TimeStampedModel):
         # Check the content_filter defined for this catalog to see if the
         # unique key is a part of the filter that defines this catalog.
         content_ids_in_catalog = set(self.content_filter.get(content_id_field_name, []))
-        if not content_ids_in_catalog:
+        if not content_ids_in_catalog and self.has_fresh_content_index:
+            content_ids_in_catalog = set(
+                self.indexed_content_items.filter(
+                    content_type__in=EnterpriseCustomerCatalogContentItem.CONTENT_TYPES_BY_ID_FIELD.get(
+                        content_id_field_name, []
+                    ),
+                    content_key__in=content_id_values,
+                ).values_list('content_key', flat=True)
+            )
+        elif not content_ids_in_catalog:
             # Otherwise add the unique key values to the content_filter and query
             # the discovery service for the existence of the content.
             updated_content_filter = self.content_filter.copy()
@@ -1042,6 +1335,64 @@ class EnterpriseCustomerCatalog(TimeStampedModel):
         return utils.update_query_parameters(url, {'catalog': self.uuid})
 
 
+@python_2_unicode_compatible
+class EnterpriseCustomerCatalogContentItem(models.Model):
+    """
+    Local index entry recording that a course run, course or program is contained in an EnterpriseCustomerCatalog.
+
+    The index is rebuilt from the discovery service by ``EnterpriseCustomerCatalog.refresh_content_index``,
+    usually through the ``refresh_catalog_content_index`` management command.
+    """
+
+    COURSE_RUN = 'courserun'
+    COURSE = 'course'
+    PROGRAM = 'program'
+    CONTENT_TYPE_CHOICES = (
+        (COURSE_RUN, 'Course Run'),
+        (COURSE, 'Course'),
+        (PROGRAM, 'Program'),
+    )
+    # Index content types matched by each identifier field accepted by ``contains_content_items``.
+    CONTENT_TYPES_BY_ID_FIELD = {
+        'key': [COURSE_RUN],
+        'uuid': [PROGRAM],
+    }
+
+    DISCOVERY_PAGE_SIZE = 1000
+    BULK_CREATE_BATCH_SIZE = 1000
+
+    catalog = models.ForeignKey(
+        EnterpriseCustomerCatalog,
+        related_name='indexed_content_items',
+        on_delete=models.deletion.CASCADE,
+    )
+    content_type = models.CharField(max_length=10, choices=CONTENT_TYPE_CHOICES)
+    content_key = models.CharField(
+        max_length=255,
+        help_text=_('The course run key, course key or program UUID of the content item.'),
+    )
+
+    class Meta(object):
+        app_label = 'enterprise'
+        unique_together = (('catalog', 'content_type', 'content_key'),)
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return '<EnterpriseCustomerCatalogContentItem {content_type} {content_key} in catalog {catalog_uuid}>'.format(
+            content_type=self.content_type,
+            content_key=self.content_key,
+            catalog_uuid=self.catalog_id,
+        )
+
+    def __repr__(self):
+        """
+        Return uniquely identifying string representation.
+        """
+        return self.__str__()
+
+
 @python_2_unicode_compatible
 class EnrollmentNotificationEmailTemplate(TimeStampedModel):
     """
@@ -1265,3 +1616,214 @@ class EnterpriseCustomerReportingConfiguration(TimeStampedModel):
             self.day_of_week = None
         else:
             raise ValidationError(_('Frequency must be set to either daily, weekly, or monthly.'))
+
+
+class BulkEnrollmentJobManager(models.Manager):
+    """
+    Model manager for :class:`.BulkEnrollmentJob` entity.
+    """
+
+    def claim(self, worker, stale_after, max_attempts):
+        """
+        Claim the oldest job which is waiting to be run, or whose worker stopped running it, for the given worker.
+
+        Each job is claimed through a single conditional ``UPDATE``, so that concurrent workers never run the same
+        job at the same time. The abandoned jobs which were already claimed ``max_attempts`` times are marked as
+        failed instead of being claimed again, so that a job which keeps failing does not keep being retried.
+
+        Arguments:
+            worker (str): Identifier of the worker claiming the job.
+            stale_after (datetime.timedelta): A running job whose heartbeat is older than this is considered
+                abandoned by its worker, and may be claimed again.
+            max_attempts (int): Number of times a job may be claimed before it is marked as failed.
+
+        Returns:
+            BulkEnrollmentJob: The claimed job, or None if there is no job to run.
+        """
+        now = timezone.now()
+        abandoned = models.Q(status=BulkEnrollmentJob.RUNNING, heartbeat__lt=now - stale_after)
+        failed = self.filter(abandoned, attempts__gte=max_attempts).update(status=BulkEnrollmentJob.FAILED)
+        if failed:
+            LOGGER.error('Marked %d bulk enrollment jobs abandoned after %d attempts as failed', failed, max_attempts)
+
+        claimable = models.Q(status=BulkEnrollmentJob.PENDING) | abandoned
+        for job_id in self.filter(claimable).order_by('created').values_list('id', flat=True)[:10]:
+            claimed = self.filter(claimable, id=job_id).update(
+                status=BulkEnrollmentJob.RUNNING, worker=worker, heartbeat=now, attempts=models.F('attempts') + 1
+            )
+            if claimed:
+                return self.get(id=job_id)
+        return None
+
+
+@python_2_unicode_compatible
+class BulkEnrollmentJob(TimeStampedModel):
+    """
+    Enrollment of many learners in a course or a program, requested from the manage learners admin page.
+
+    The job is persisted along with a :class:`.BulkEnrollmentJobLearner` record for each learner, and is run in the
+    background by the ``process_bulk_enrollment_jobs`` management command, which records the result of each learner
+    as it goes.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (COMPLETED, _('Completed')),
+        (FAILED, _('Failed')),
+    )
+
+    enterprise_customer = models.ForeignKey(
+        EnterpriseCustomer,
+        blank=False,
+        null=False,
+        related_name='bulk_enrollment_jobs',
+        on_delete=models.deletion.CASCADE,
+    )
+    requester = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        related_name='+',
+        on_delete=models.deletion.SET_NULL,
+        help_text=_('The user who requested the enrollment, on whose behalf the course details are retrieved.'),
+    )
+    course_id = models.CharField(max_length=255, blank=True)
+    program_details = JSONField(
+        blank=True,
+        null=True,
+        help_text=_('The details of the program to enroll the learners in, as returned by the Course Catalog API.'),
+    )
+    course_mode = models.CharField(max_length=25, blank=False)
+    notify = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    worker = models.CharField(max_length=255, blank=True, help_text=_('The worker which last ran the job.'))
+    heartbeat = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text=_('The last time the worker running the job reported progress.'),
+    )
+    attempts = models.PositiveIntegerField(default=0, help_text=_('The number of times the job was claimed.'))
+
+    objects = BulkEnrollmentJobManager()
+
+    class Meta(object):
+        app_label = 'enterprise'
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return '<BulkEnrollmentJob {ID}>: {enterprise_name} - {enrolled_in}'.format(
+            ID=self.id,
+            enterprise_name=self.enterprise_customer.name,
+            enrolled_in=self.enrolled_in,
+        )
+
+    def __repr__(self):
+        """
+        Return uniquely identifying string representation.
+        """
+        return self.__str__()
+
+    @property
+    def enrolled_in(self):
+        """
+        Return a string identifying the course or the program the learners are enrolled in.
+        """
+        if self.program_details:
+            return self.program_details.get('title', self.program_details.get('uuid', _('the program')))
+        return self.course_id
+
+    @property
+    def progress(self):
+        """
+        Return the number of learners processed, and the total number of learners of the job.
+        """
+        counts = dict(self.learners.values_list('status').annotate(count=models.Count('id')))
+        total = sum(counts.values())
+        return total - counts.get(BulkEnrollmentJobLearner.PENDING, 0), total
+
+    def heartbeat_now(self):
+        """
+        Record that the worker running the job is still making progress.
+
+        Returns:
+            bool: Whether the job is still running on this worker; False if another worker claimed it since.
+        """
+        self.heartbeat = timezone.now()
+        return bool(BulkEnrollmentJob.objects.filter(
+            id=self.id, status=self.RUNNING, worker=self.worker
+        ).update(heartbeat=self.heartbeat))
+
+    def complete(self):
+        """
+        Mark the job as completed.
+
+        Returns:
+            bool: Whether the job was still running on this worker; False if another worker claimed it since.
+        """
+        self.heartbeat = timezone.now()
+        completed = BulkEnrollmentJob.objects.filter(
+            id=self.id, status=self.RUNNING, worker=self.worker
+        ).update(status=self.COMPLETED, heartbeat=self.heartbeat)
+        if completed:
+            self.status = self.COMPLETED
+        return bool(completed)
+
+
+@python_2_unicode_compatible
+class BulkEnrollmentJobLearner(models.Model):
+    """
+    Result of the enrollment of a single learner by a :class:`.BulkEnrollmentJob`.
+    """
+
+    PENDING = 'pending'
+    ENROLLED = 'enrolled'
+    PENDING_REGISTRATION = 'pending_registration'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (ENROLLED, _('Enrolled')),
+        (PENDING_REGISTRATION, _('Enrolled on registration')),
+        (FAILED, _('Failed')),
+    )
+
+    job = models.ForeignKey(
+        BulkEnrollmentJob,
+        blank=False,
+        null=False,
+        related_name='learners',
+        on_delete=models.deletion.CASCADE,
+    )
+    user_email = models.EmailField(null=False, blank=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    message = models.TextField(blank=True)
+    modified = models.DateTimeField(auto_now=True)
+
+    class Meta(object):
+        app_label = 'enterprise'
+        unique_together = (('job', 'user_email'),)
+        index_together = (('job', 'status'),)
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return '<BulkEnrollmentJobLearner {ID}>: {user_email} - {status}'.format(
+            ID=self.id,
+            user_email=self.user_email,
+            status=self.status,
+        )
+
+    def __repr__(self):
+        """
+        Return uniquely identifying string representation.
+        """
+        return self.__str__()
@@ -7,7 +7,13 @@ from __future__ import absolute_import, unicode_literals
 from logging import getLogger
 
 from enterprise.decorators import disable_for_loaddata
-from enterprise.models import EnterpriseCourseEnrollment, EnterpriseCustomerUser, PendingEnterpriseCustomerUser
+from enterprise.models import (
+    EnterpriseCourseEnrollment,
+    EnterpriseCustomer,
+    EnterpriseCustomerUser,
+    PendingEnterpriseCustomerUser,
+)
+from enterprise.utils import clear_enterprise_customer_cache
 
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -60,3 +66,15 @@ def handle_user_post_save(sender, **kwargs):  # pylint: disable=unused-argument
             course_id=enrollment.course_id
         )
     pending_ecu.delete()
+
+
+def handle_enterprise_customer_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Handle changes to an EnterpriseCustomer, or to one of its related records - forget the cached lookups of it.
+    """
+    if isinstance(instance, EnterpriseCustomer):
+        enterprise_customer_uuid = instance.uuid
+    else:
+        enterprise_customer_uuid = instance.enterprise_customer_id
+    if enterprise_customer_uuid:
+        clear_enterprise_customer_cache(enterprise_customer_uuid)
@@ -8,6 +8,7 @@ import datetime
 import hashlib
 import logging
 import re
+import threading
 from uuid import UUID
 
 import analytics
@@ -21,6 +22,7 @@ from six import iteritems  # pylint: disable=ungrouped-imports
 from django.apps import apps
 from django.conf import settings
 from django.core import mail
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
 from django.http import Http404
@@ -305,18 +307,99 @@ def send_email_notification_message(user, enrolled_in, enterprise_customer, emai
     )
 
 
+# The enterprise customers and enterprise customer users looked up while handling the current request of each
+# thread. Lookups are only memoized between the ``request_started`` and ``request_finished`` signals.
+_REQUEST_CACHE = threading.local()
+
+
+def start_request_cache(**kwargs):  # pylint: disable=unused-argument
+    """
+    Start memoizing the enterprise customer lookups made while handling the request which started.
+    """
+    _REQUEST_CACHE.lookups = {}
+
+
+def end_request_cache(**kwargs):  # pylint: disable=unused-argument
+    """
+    Stop memoizing the enterprise customer lookups, and forget the ones made while handling the finished request.
+    """
+    _REQUEST_CACHE.lookups = None
+
+
+def _request_cached(key, lookup):
+    """
+    Return the result of the lookup, memoized under ``key`` for the rest of the current request, if any.
+    """
+    lookups = getattr(_REQUEST_CACHE, 'lookups', None)
+    if lookups is None:
+        return lookup()
+    if key not in lookups:
+        lookups[key] = lookup()
+    return lookups[key]
+
+
+def _get_enterprise_customer_cache_key(uuid):
+    """
+    Return the key under which the ``EnterpriseCustomer`` with the given UUID is cached.
+
+    The key is built from a fixed format, rather than through ``get_cache_key``, so that every process computes
+    the same key, whatever the order of keyword arguments on its version of Python.
+    """
+    return 'enterprise_customer:{uuid}'.format(uuid=UUID(str(uuid)))
+
+
+def clear_enterprise_customer_cache(enterprise_customer_uuid):
+    """
+    Forget the memoized lookups of the current request, and the cached ``EnterpriseCustomer`` with the given UUID.
+    """
+    lookups = getattr(_REQUEST_CACHE, 'lookups', None)
+    if lookups:
+        lookups.clear()
+    cache.delete(_get_enterprise_customer_cache_key(enterprise_customer_uuid))
+
+
+def _fetch_enterprise_customer(uuid):
+    """
+    Fetch the ``EnterpriseCustomer`` with the given UUID, along with its identity provider, branding
+    configuration and catalogs, or return None if there is no such enterprise customer.
+
+    When the ``ENTERPRISE_CUSTOMER_CACHE_TIMEOUT`` setting is set, the enterprise customer is cached for that many
+    seconds; the cached enterprise customer is deleted whenever it, or its related records, are saved or deleted.
+    """
+    cache_timeout = getattr(settings, 'ENTERPRISE_CUSTOMER_CACHE_TIMEOUT', 0)
+    cache_key = _get_enterprise_customer_cache_key(uuid)
+    if cache_timeout:
+        enterprise_customer = cache.get(cache_key)
+        if enterprise_customer is not None:
+            return enterprise_customer
+
+    EnterpriseCustomer = apps.get_model('enterprise', 'EnterpriseCustomer')  # pylint: disable=invalid-name
+    enterprise_customer = EnterpriseCustomer.objects.filter(  # pylint: disable=no-member
+        uuid=uuid,
+    ).select_related(
+        'site',
+        'enterprise_customer_identity_provider',
+        'branding_configuration',
+    ).prefetch_related(
+        'enterprise_customer_catalogs',
+    ).first()
+
+    if cache_timeout and enterprise_customer is not None:
+        cache.set(cache_key, enterprise_customer, cache_timeout)
+    return enterprise_customer
+
+
 def get_enterprise_customer(uuid):
     """
     Get the ``EnterpriseCustomer`` instance associated with ``uuid``.
 
+    The enterprise customer is looked up once per request.
+
     :param uuid: The universally unique ID of the enterprise customer.
     :return: The ``EnterpriseCustomer`` instance, or ``None`` if it doesn't exist.
     """
-    EnterpriseCustomer = apps.get_model('enterprise', 'EnterpriseCustomer')  # pylint: disable=invalid-name
-    try:
-        return EnterpriseCustomer.objects.get(uuid=uuid)  # pylint: disable=no-member
-    except EnterpriseCustomer.DoesNotExist:
-        return None
+    uuid = UUID(str(uuid))
+    return _request_cached(('enterprise_customer', uuid), lambda: _fetch_enterprise_customer(uuid))
 
 
 def get_enterprise_customer_for_user(auth_user):
@@ -335,10 +418,19 @@ def get_enterprise_customer_for_user(auth_user):
 
     """
     EnterpriseCustomerUser = apps.get_model('enterprise', 'EnterpriseCustomerUser')  # pylint: disable=invalid-name
-    try:
-        return EnterpriseCustomerUser.objects.get(user_id=auth_user.id).enterprise_customer  # pylint: disable=no-member
-    except EnterpriseCustomerUser.DoesNotExist:
-        return None
+
+    def lookup():
+        """
+        Look up the enterprise customer of the user.
+        """
+        try:
+            return EnterpriseCustomerUser.objects.select_related(  # pylint: disable=no-member
+                'enterprise_customer',
+            ).get(user_id=auth_user.id).enterprise_customer
+        except EnterpriseCustomerUser.DoesNotExist:
+            return None
+
+    return _request_cached(('enterprise_customer_for_user', auth_user.id), lookup)
 
 
 def get_enterprise_customer_user(user_id, enterprise_uuid):
@@ -354,13 +446,20 @@ def get_enterprise_customer_user(user_id, enterprise_uuid):
 
     """
     EnterpriseCustomerUser = apps.get_model('enterprise', 'EnterpriseCustomerUser')  # pylint: disable=invalid-name
-    try:
-        return EnterpriseCustomerUser.objects.get(  # pylint: disable=no-member
-            enterprise_customer__uuid=enterprise_uuid,
-            user_id=user_id
-        )
-    except EnterpriseCustomerUser.DoesNotExist:
-        return None
+
+    def lookup():
+        """
+        Look up the enterprise customer user.
+        """
+        try:
+            return EnterpriseCustomerUser.objects.get(  # pylint: disable=no-member
+                enterprise_customer__uuid=enterprise_uuid,
+                user_id=user_id
+            )
+        except EnterpriseCustomerUser.DoesNotExist:
+            return None
+
+    return _request_cached(('enterprise_customer_user', user_id, str(enterprise_uuid)), lookup)
 
 
 def get_course_track_selection_url(course_run, query_parameters):
@@ -460,13 +559,14 @@ def get_enterprise_customer_or_404(enterprise_uuid):
         (EnterpriseCustomer): The EnterpriseCustomer given the UUID.
 
     """
-    EnterpriseCustomer = apps.get_model('enterprise', 'EnterpriseCustomer')  # pylint: disable=invalid-name
     try:
-        enterprise_uuid = UUID(enterprise_uuid)
-        return EnterpriseCustomer.objects.get(uuid=enterprise_uuid)  # pylint: disable=no-member
-    except (ValueError, EnterpriseCustomer.DoesNotExist):
+        enterprise_customer = get_enterprise_customer(UUID(enterprise_uuid))
+    except ValueError:
+        enterprise_customer = None
+    if enterprise_customer is None:
         LOGGER.error('Unable to find enterprise customer for UUID: %s', enterprise_uuid)
         raise Http404
+    return enterprise_customer
 
 
 def get_course_id_from_course_run_id(course_run_id):
@@ -536,17 +636,36 @@ def traverse_pagination(response, endpoint):
         list of dict.
 
     """
-    results = response.get('results', [])
+    results = []
+    for page_results in iterate_pagination(response, endpoint):
+        results += page_results
+    return results
+
+
+def iterate_pagination(response, endpoint):
+    """
+    Iterate over the pages of a paginated API response.
+
+    Yields the "results" (list of dict) of each page returned by DRF-powered APIs,
+    only requesting the next page once the previous one has been consumed.
+
+    Arguments:
+        response (Dict): Current response dict from service API
+        endpoint (slumber Resource object): slumber Resource object from edx-rest-api-client
+
+    Yields:
+        list of dict.
+
+    """
+    yield response.get('results', [])
 
     next_page = response.get('next')
     while next_page:
         querystring = parse_qs(urlparse(next_page).query, keep_blank_values=True)
         response = endpoint.get(**querystring)
-        results += response.get('results', [])
+        yield response.get('results', [])
         next_page = response.get('next')
 
-    return results
-
 
 def ungettext_min_max(singular, plural, range_text, min_val, max_val):
     """
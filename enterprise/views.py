@@ -501,16 +501,21 @@ class CourseEnrollmentView(NonAtomicView):
     )
     ENT_DISCOUNT_TEXT_FORMAT = _('Discount provided by {strong_start}{enterprise_customer_name}{strong_end}')
 
-    def set_final_prices(self, modes, request):
+    def set_final_prices(self, modes, request, enterprise_customer):
         """
         Set the final discounted price on each premium mode.
         """
-        result = []
-        for mode in modes:
-            if mode['premium']:
-                mode['final_price'] = EcommerceApiClient(request.user).get_course_final_price(mode)
-            result.append(mode)
-        return result
+        premium_modes = [mode for mode in modes if mode['premium']]
+        if premium_modes:
+            final_prices = EcommerceApiClient(request.user).get_course_final_prices(
+                premium_modes,
+                entitlement_ids=enterprise_customer.enterprise_customer_entitlements.values_list(
+                    'entitlement_id', flat=True
+                ),
+            )
+            for mode in premium_modes:
+                mode['final_price'] = final_prices[mode['sku']]
+        return modes
 
     def get_available_course_modes(self, request, course_run_id, enterprise_catalog):
         """
@@ -684,7 +689,7 @@ class CourseEnrollmentView(NonAtomicView):
             course_image_uri = course_run_image.get('src', '')
 
             # Retrieve the enterprise-discounted price from ecommerce.
-            course_modes = self.set_final_prices(course_modes, request)
+            course_modes = self.set_final_prices(course_modes, request, enterprise_customer)
             premium_modes = [mode for mode in course_modes if mode['premium']]
 
             # Filter audit course modes.
@@ -955,9 +960,9 @@ class ProgramEnrollmentView(NonAtomicView):
     }
 
     @staticmethod
-    def extend_course(course, enterprise_customer):
+    def extend_course_with_details(course, course_details, course_run_details):
         """
-        Extend a course with more details needed for the program landing page.
+        Extend a course with the details needed for the program landing page, using the given course metadata.
 
         In particular, we add the following:
 
@@ -969,17 +974,8 @@ class ProgramEnrollmentView(NonAtomicView):
         * `course_effort`
         * `expected_learning_items`
         * `staff`
+        * `weeks_to_complete`
         """
-        try:
-            catalog_api_client = CourseCatalogApiServiceClient(enterprise_customer.site)
-        except ImproperlyConfigured:
-            raise Http404
-
-        course_run_id = course['course_runs'][0]['key']
-        course_details, course_run_details = catalog_api_client.get_course_and_course_run(course_run_id)
-        if not course_details or not course_run_details:
-            raise Http404
-
         weeks_to_complete = course_run_details['weeks_to_complete']
         course_run_image = course_run_details['image'] or {}
         course.update({
@@ -1005,6 +1001,56 @@ class ProgramEnrollmentView(NonAtomicView):
         })
         return course
 
+    @staticmethod
+    def extend_course_without_details(course):
+        """
+        Extend a course with placeholder details, for courses whose metadata could not be retrieved.
+
+        Only the details available in the program metadata are displayed for such courses.
+        """
+        course_image = course.get('image') or {}
+        course.update({
+            'course_image_uri': course_image.get('src', ''),
+            'course_title': course.get('title', ''),
+            'course_level_type': '',
+            'course_short_description': course.get('short_description') or '',
+            'course_full_description': '',
+            'expected_learning_items': [],
+            'staff': [],
+            'course_effort': '',
+            'weeks_to_complete': '',
+        })
+        return course
+
+    @staticmethod
+    def extend_courses(courses, catalog_api_client):
+        """
+        Extend all the courses of a program with more details needed for the program landing page.
+
+        The metadata of all the courses is retrieved at once. Courses whose metadata could not be retrieved
+        are only extended with placeholder details, unless none of the courses could be retrieved.
+        """
+        course_run_ids = [course['course_runs'][0]['key'] for course in courses]
+        course_metadata = catalog_api_client.get_courses_and_course_runs(course_run_ids)
+
+        unavailable_course_run_ids = []
+        for course, course_run_id in zip(courses, course_run_ids):
+            course_details, course_run_details = course_metadata.get(course_run_id, (None, None))
+            if course_details and course_run_details:
+                ProgramEnrollmentView.extend_course_with_details(course, course_details, course_run_details)
+            else:
+                unavailable_course_run_ids.append(course_run_id)
+                ProgramEnrollmentView.extend_course_without_details(course)
+
+        if unavailable_course_run_ids:
+            if len(unavailable_course_run_ids) == len(courses):
+                raise Http404
+            LOGGER.warning(
+                'Could not retrieve the details of course runs %s for the program landing page.',
+                ', '.join(unavailable_course_run_ids),
+            )
+        return courses
+
     def get_program_details(self, request, program_uuid, enterprise_customer):
         """
         Retrieve fundamental details used by both POST and GET versions of this view.
@@ -1034,10 +1080,9 @@ class ProgramEnrollmentView(NonAtomicView):
         # TODO: Upstream this additional context to the platform's `ProgramDataExtender` so we can avoid this here.
         program_details['enrolled_in_program'] = False
         enrollment_count = 0
+        # We need to extend our course data further for modals and other displays.
+        ProgramEnrollmentView.extend_courses(program_details['courses'], course_catalog_api_client)
         for extended_course in program_details['courses']:
-            # We need to extend our course data further for modals and other displays.
-            extended_course.update(ProgramEnrollmentView.extend_course(extended_course, enterprise_customer))
-
             # We're enrolled in the program if we have certificate-eligible enrollment in even 1 of its courses.
             extended_course_run = extended_course['course_runs'][0]
             if extended_course_run['is_enrolled'] and extended_course_run['upgrade_url'] is None:
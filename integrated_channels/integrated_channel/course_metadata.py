@@ -9,7 +9,7 @@ enterprise customer.
 from __future__ import absolute_import, unicode_literals
 
 import json
-from logging import getLogger
+from logging import DEBUG, getLogger
 
 from enterprise.api_client.enterprise import EnterpriseApiClient
 
@@ -20,6 +20,8 @@ def get_course_runs(user, enterprise_customer):
     """
     List the course runs the given enterprise customer has in its catalog.
 
+    The course runs are retrieved one page at a time, as they are iterated over.
+
     Arguments:
         enterprise_customer: The given Enterprise Customer
 
@@ -28,18 +30,18 @@ def get_course_runs(user, enterprise_customer):
     """
     client = EnterpriseApiClient(user)
 
-    enterprise_course_runs = client.get_enterprise_course_runs(
-        enterprise_customer,
-    )
     LOGGER.info('Retrieving course list for enterprise %s', enterprise_customer.name)
 
-    for course_run in enterprise_course_runs.values():
+    for course_run in client.iter_enterprise_course_runs(enterprise_customer):
         yield course_run
 
 
 class BaseCourseExporter(object):
     """
     Base class for course metadata exporters to implement a "send" method on.
+
+    Course runs are only retrieved and transformed as the courses are iterated over, so that exporting a catalog
+    does not require holding all of its courses in memory.
     """
 
     AVAILABILITY_CURRENT = 'Current'
@@ -55,21 +57,21 @@ class BaseCourseExporter(object):
         self.user = user
         self.enterprise_customer = plugin_configuration.enterprise_customer
         self.plugin_configuration = plugin_configuration
-        self.courses = []
-        for course_run in get_course_runs(self.user, self.enterprise_customer):
-            self.add_course_run(course_run)
 
-    def add_course_run(self, course_run_details):
+    def get_courses(self):
         """
-        Transform the details of a course run, and save it to our courses list.
+        Retrieve the course runs in the catalog, and yield each of them transformed.
         """
-        transformed = self.transform_course_run_details(course_run_details)
-        LOGGER.info(
-            'Sending course with plugin configuration %s: %s',
-            self.plugin_configuration,
-            json.dumps(transformed, indent=4),
-        )
-        self.courses.append(transformed)
+        for course_run in get_course_runs(self.user, self.enterprise_customer):
+            transformed = self.transform_course_run_details(course_run)
+            LOGGER.info(
+                'Sending course with plugin configuration %s: %s',
+                self.plugin_configuration,
+                course_run['key'],
+            )
+            if LOGGER.isEnabledFor(DEBUG):
+                LOGGER.debug('Transformed course %s: %s', course_run['key'], json.dumps(transformed))
+            yield transformed
 
     def transform_course_run_details(self, course_run_details):
         """
@@ -79,13 +81,20 @@ class BaseCourseExporter(object):
             'Processing course with ID %s',
             course_run_details['key']
         )
-        LOGGER.debug(
-            'Parsing course for %s: %s',
-            self.enterprise_customer,
-            json.dumps(course_run_details, indent=4),
-        )
+        if LOGGER.isEnabledFor(DEBUG):
+            LOGGER.debug(
+                'Parsing course for %s: %s',
+                self.enterprise_customer,
+                json.dumps(course_run_details, indent=4),
+            )
         # Add the enterprise customer to the course run details so it can be used in the data transform
         course_run_details['enterprise_customer'] = self.enterprise_customer
+        return self.apply_data_transform(course_run_details)
+
+    def apply_data_transform(self, course_run_details):
+        """
+        Build the course in the format natively supported by the provider, applying each of ``data_transform``.
+        """
         output = {}
         for key, transform in self.data_transform.items():
             output[key] = transform(course_run_details) if transform is not None else course_run_details.get(key)
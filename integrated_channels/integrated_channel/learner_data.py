@@ -8,19 +8,49 @@ enterprise customer.
 """
 from __future__ import absolute_import, unicode_literals
 
+import datetime
+import itertools
+import sys
+import threading
 from logging import getLogger
+from multiprocessing.pool import ThreadPool
 
+import six
 from consent.models import DataSharingConsent
 from slumber.exceptions import HttpNotFoundError
 
+from django.conf import settings
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
-from enterprise.api_client.lms import CertificatesApiClient, CourseApiClient, GradesApiClient
-from enterprise.models import EnterpriseCourseEnrollment
+from enterprise.api_client.lms import CertificatesApiClient, CourseApiClient, EnrollmentApiClient, GradesApiClient
+from enterprise.models import EnterpriseCourseEnrollment, EnterpriseCustomerUser
+# pylint: disable=import-error,wrong-import-order,ungrouped-imports
+from six.moves import queue
+from six.moves.urllib.parse import urlparse
 
 LOGGER = getLogger(__name__)
 
+# Semaphores limiting the number of concurrent LMS API requests made to a single host, keyed on the host name.
+HOST_SEMAPHORES = {}
+HOST_SEMAPHORES_LOCK = threading.Lock()
+
+
+def get_host_semaphore(api_base_url):
+    """
+    Return the semaphore which limits the number of concurrent requests made to the host of the given API URL.
+
+    The limit is set by the ``INTEGRATED_CHANNEL_MAX_CONCURRENT_REQUESTS_PER_HOST`` setting, and is shared by
+    every exporter running in the current process.
+    """
+    host = urlparse(str(api_base_url)).netloc
+    with HOST_SEMAPHORES_LOCK:
+        if host not in HOST_SEMAPHORES:
+            HOST_SEMAPHORES[host] = threading.BoundedSemaphore(
+                getattr(settings, 'INTEGRATED_CHANNEL_MAX_CONCURRENT_REQUESTS_PER_HOST', 8)
+            )
+        return HOST_SEMAPHORES[host]
+
 
 class BaseLearnerExporter(object):
     """
@@ -31,6 +61,13 @@ class BaseLearnerExporter(object):
     GRADE_FAILING = 'Fail'
     GRADE_INCOMPLETE = 'In Progress'
 
+    # Time after the end of a course during which its grades and certificates are still expected to change.
+    COMPLETION_GRACE_PERIOD = datetime.timedelta(days=30)
+
+    # Number of enrollments whose learners and data sharing consent are loaded together, while the enrollments of
+    # the enterprise customer are streamed.
+    ENROLLMENTS_BATCH_SIZE = 400
+
     @property
     def grade_passing(self):
         """
@@ -52,7 +89,7 @@ class BaseLearnerExporter(object):
         """
         return self.GRADE_INCOMPLETE
 
-    def __init__(self, user, plugin_configuration):
+    def __init__(self, user, plugin_configuration, workers=1, since=None):
         """
         Store the data needed to export the learner data to the integrated channel.
 
@@ -60,20 +97,24 @@ class BaseLearnerExporter(object):
 
         * ``user``: User instance with access to the Grades API for the Enterprise Customer's courses.
         * ``plugin_configuration``: EnterpriseCustomerPluginConfiguration instance for the current channel.
+        * ``workers``: Number of threads used to fetch grades and certificates concurrently. With a single
+          worker, everything is fetched serially in the calling thread.
+        * ``since``: datetime of the last export of learner data to the channel. When given, only the enrollments
+          whose learner data could have changed since then are exported.
         """
 
         self.user = user
         self.plugin_configuration = plugin_configuration
         self.enterprise_customer = plugin_configuration.enterprise_customer
         self.get_learner_data_record = plugin_configuration.get_learner_data_record
+        self.workers = max(int(workers), 1)
+        self.since = since
 
         # The Grades API and Certificates API clients require an OAuth2 access token,
         #  so cache the client to allow the token to be reused. Cache other clients for
-        #  general reuse.
-        self.grades_api = None
-        self.certificates_api = None
+        #  general reuse. API clients are not thread-safe, so each worker thread keeps its own.
         self.course_api = None
-        self.course_enrollment_api = None
+        self.api_clients = threading.local()
 
     def collect_learner_data(self):
         """
@@ -86,68 +127,243 @@ class BaseLearnerExporter(object):
           "Course completion" occurs for instructor-paced courses when course certificates are issued, and
           for self-paced courses, when the course end date is passed, or when the learner achieves a passing grade.
         * ``grade``: string grade recorded for the learner in the course.
+
+        Enrollments whose learner data was already transmitted successfully are skipped. With ``since``, so are
+        the enrollments whose learner data could not have changed since the last export.
+
+        The enrollments are streamed, and the consent and usernames of their learners are loaded in bulk for each
+        batch of ``ENROLLMENTS_BATCH_SIZE`` enrollments. The audit mode, grade and certificate lookups are spread
+        over ``workers`` threads, and records are yielded as soon as their lookups complete, so they are not
+        necessarily yielded in enrollment order.
+        """
+        for enterprise_enrollment, completion_data in self._collect_completion_data(self._get_consenting_enrollments()):
+            if completion_data is None:
+                continue
+
+            completed_date, grade, is_passing = completion_data
+            record = self.get_learner_data_record(
+                enterprise_enrollment=enterprise_enrollment,
+                completed_date=completed_date,
+                grade=grade,
+                is_passing=is_passing,
+            )
+            if record:
+                # There are some cases where we won't receive a record from the above
+                # method; right now, that should only happen if we have an Enterprise-linked
+                # user for the integrated channel, and transmission of that user's
+                # data requires an upstream user identifier that we don't have (due to a
+                # failure of SSO or similar). In sucha a case, `get_learner_data_record`
+                # would return None, and we'd simply skip yielding it here.
+                yield record
+
+    def _get_consenting_enrollments(self):
+        """
+        Yield the enrollments of the ``EnterpriseCustomer`` for which the learner granted data sharing consent.
+
+        Yields tuples of the ``EnterpriseCourseEnrollment``, the learner's username and the course details.
         """
+        # Completion data is only sent once per enrollment, so skip the ones already transmitted.
+        transmitted_enrollment_ids = self.plugin_configuration.get_transmitted_enrollment_ids()
+        failed_enrollment_ids = set()
+        if self.since is not None:
+            failed_enrollment_ids = self.plugin_configuration.get_transmitted_enrollment_ids(successful=False)
 
         # Fetch the consenting enrollment data, including the enterprise_customer_user.
         # Order by the course_id, to avoid fetching course API data more than we have to.
         enrollment_queryset = EnterpriseCourseEnrollment.objects.select_related(
-            'enterprise_customer_user'
+            'enterprise_customer_user__enterprise_customer'
         ).filter(
             enterprise_customer_user__enterprise_customer=self.enterprise_customer,
         ).order_by('course_id')
+        enrollment_iterator = (
+            enterprise_enrollment for enterprise_enrollment in enrollment_queryset.iterator()
+            if enterprise_enrollment.id not in transmitted_enrollment_ids
+        )
+
+        # Share a single instance of each learner between their enrollments, so that the
+        # user and the details looked up for a learner are reused for all their enrollments.
+        enterprise_customer_users = {}
 
         # Fetch course details from the Course API, and cache between calls.
         course_details = None
 
-        for enterprise_enrollment in enrollment_queryset:
+        while True:
+            enterprise_enrollments = list(itertools.islice(enrollment_iterator, self.ENROLLMENTS_BATCH_SIZE))
+            if not enterprise_enrollments:
+                return
+
+            new_enterprise_customer_users = []
+            for enterprise_enrollment in enterprise_enrollments:
+                enterprise_customer_user_id = enterprise_enrollment.enterprise_customer_user_id
+                if enterprise_customer_user_id not in enterprise_customer_users:
+                    enterprise_customer_user = enterprise_enrollment.enterprise_customer_user
+                    enterprise_customer_user.enterprise_customer = self.enterprise_customer
+                    enterprise_customer_users[enterprise_customer_user_id] = enterprise_customer_user
+                    new_enterprise_customer_users.append(enterprise_customer_user)
+                enterprise_enrollment.enterprise_customer_user = enterprise_customer_users[enterprise_customer_user_id]
+            EnterpriseCustomerUser.load_users(new_enterprise_customer_users)
+
+            enrollments = [
+                (enterprise_enrollment, enterprise_enrollment.enterprise_customer_user.username)
+                for enterprise_enrollment in enterprise_enrollments
+            ]
+            consents = DataSharingConsent.objects.proxied_get_many(
+                (username, enterprise_enrollment.course_id, self.enterprise_customer)
+                for enterprise_enrollment, username in enrollments
+            )
+            self.load_learner_details(new_enterprise_customer_users)
+
+            for enterprise_enrollment, username in enrollments:
 
-            course_id = enterprise_enrollment.course_id
+                course_id = enterprise_enrollment.course_id
 
-            # Fetch course details from Courses API
-            if course_details is None or course_details['course_id'] != course_id:
-                if self.course_api is None:
-                    self.course_api = CourseApiClient()
-                course_details = self.course_api.get_course_details(course_id)
+                # Fetch course details from Courses API
+                if course_details is None or course_details['course_id'] != course_id:
+                    if self.course_api is None:
+                        self.course_api = CourseApiClient()
+                    course_details = self.course_api.get_course_details(course_id)
 
-            if course_details is None:
-                # Course not found, so we have nothing to report.
-                LOGGER.error("No course details found for enrollment %d: %s",
-                             enterprise_enrollment.pk, course_id)
-                continue
+                if course_details is None:
+                    # Course not found, so we have nothing to report.
+                    LOGGER.error("No course details found for enrollment %d: %s",
+                                 enterprise_enrollment.pk, course_id)
+                    continue
 
-            consent = DataSharingConsent.objects.proxied_get(
-                username=enterprise_enrollment.enterprise_customer_user.username,
-                course_id=enterprise_enrollment.course_id,
-                enterprise_customer=enterprise_enrollment.enterprise_customer_user.enterprise_customer
-            )
+                consent = consents[(username, course_id, self.enterprise_customer)]
+                if not consent.granted:
+                    continue
 
-            if not consent.granted or enterprise_enrollment.audit_reporting_disabled:
-                continue
+                if self.since is not None and not (
+                        enterprise_enrollment.id in failed_enrollment_ids or
+                        self._may_have_changed(enterprise_enrollment, consent, course_details)
+                ):
+                    continue
 
-            # For instructor-paced courses, let the certificate determine course completion
-            if course_details.get('pacing') == 'instructor':
-                completed_date, grade, is_passing = self._collect_certificate_data(enterprise_enrollment)
+                yield enterprise_enrollment, username, course_details
 
-            # For self-paced courses, check the Grades API
-            else:
-                completed_date, grade, is_passing = self._collect_grades_data(enterprise_enrollment, course_details)
+    def _may_have_changed(self, enterprise_enrollment, consent, course_details):
+        """
+        Return whether the learner data of the enrollment could have changed since the last export.
 
-            record = self.get_learner_data_record(
-                enterprise_enrollment=enterprise_enrollment,
-                completed_date=completed_date,
-                grade=grade,
-                is_passing=is_passing,
+        That is the case if the enrollment or its consent was created or modified since then, or if the course
+        had not ended more than ``COMPLETION_GRACE_PERIOD`` before it.
+        """
+        if enterprise_enrollment.created >= self.since or consent.modified >= self.since:
+            return True
+
+        course_end_date = course_details.get('end')
+        if course_end_date is None:
+            return True
+        return parse_datetime(course_end_date) >= self.since - self.COMPLETION_GRACE_PERIOD
+
+    def load_learner_details(self, enterprise_customer_users):
+        """
+        Load the details the integrated channel needs about the given learners in bulk, before their data is exported.
+
+        Called for each batch of enrollments, with the learners who were not in the previous batches. Does nothing
+        by default.
+        """
+        pass
+
+    def _collect_completion_data(self, consenting_enrollments):
+        """
+        Collect the completion data for each of the given enrollments, using up to ``workers`` threads.
+
+        Yields a tuple of the ``EnterpriseCourseEnrollment`` and its completion data for each enrollment,
+        in the order in which the lookups complete. The completion data is None when there is nothing to
+        report for the enrollment.
+        """
+        if self.workers == 1:
+            for consenting_enrollment in consenting_enrollments:
+                yield consenting_enrollment[0], self._collect_enrollment_completion_data(*consenting_enrollment)
+            return
+
+        pool = ThreadPool(self.workers)
+        completed = queue.Queue()
+        # Keep enough enrollments queued to keep every worker busy, without loading them all in memory.
+        max_pending = self.workers * 2
+        pending = 0
+        try:
+            for consenting_enrollment in consenting_enrollments:
+                pool.apply_async(self._run_completion_task, consenting_enrollment, callback=completed.put)
+                pending += 1
+                while pending and (pending >= max_pending or not completed.empty()):
+                    pending -= 1
+                    yield self._get_completion_task_result(completed.get())
+
+            while pending:
+                pending -= 1
+                yield self._get_completion_task_result(completed.get())
+        finally:
+            pool.terminate()
+
+    def _run_completion_task(self, enterprise_enrollment, username, course_details):
+        """
+        Run ``_collect_enrollment_completion_data`` in a worker thread, capturing any exception raised.
+        """
+        try:
+            return enterprise_enrollment, self._collect_enrollment_completion_data(
+                enterprise_enrollment, username, course_details
+            ), None
+        except Exception:  # pylint: disable=broad-except
+            return enterprise_enrollment, None, sys.exc_info()
+
+    @staticmethod
+    def _get_completion_task_result(result):
+        """
+        Return the enrollment and completion data of a completed worker task, re-raising its exception if it failed.
+        """
+        enterprise_enrollment, completion_data, exc_info = result
+        if exc_info is not None:
+            six.reraise(*exc_info)
+        return enterprise_enrollment, completion_data
+
+    def _collect_enrollment_completion_data(self, enterprise_enrollment, username, course_details):
+        """
+        Collect the completion data for a single enrollment.
+
+        Only calls the LMS APIs, so that it can safely run outside of the main thread.
+
+        Returns:
+            tuple: completed_date, grade and is_passing, or None if audit track data is not reported.
+        """
+        if self._is_audit_reporting_disabled(enterprise_enrollment, username):
+            return None
+
+        # For instructor-paced courses, let the certificate determine course completion
+        if course_details.get('pacing') == 'instructor':
+            return self._collect_certificate_data(enterprise_enrollment, username)
+
+        # For self-paced courses, check the Grades API
+        return self._collect_grades_data(enterprise_enrollment, course_details, username)
+
+    def _get_api_client(self, api_client_class, *args):
+        """
+        Return the current thread's instance of the given LMS API client class, creating it if needed.
+        """
+        api_clients = self.api_clients.__dict__
+        if api_client_class not in api_clients:
+            api_clients[api_client_class] = api_client_class(*args)
+        return api_clients[api_client_class]
+
+    def _is_audit_reporting_disabled(self, enterprise_enrollment, username):
+        """
+        Return whether the enrollment is an audit track enrollment which must not be reported.
+
+        Same as ``EnterpriseCourseEnrollment.audit_reporting_disabled``, without any database query.
+        """
+        if enterprise_enrollment.enterprise_customer_user.enterprise_customer.enables_audit_data_reporting:
+            return False
+
+        with get_host_semaphore(EnrollmentApiClient.API_BASE_URL):
+            course_enrollment = self._get_api_client(EnrollmentApiClient).get_course_enrollment(
+                username,
+                enterprise_enrollment.course_id,
             )
-            if record:
-                # There are some cases where we won't receive a record from the above
-                # method; right now, that should only happen if we have an Enterprise-linked
-                # user for the integrated channel, and transmission of that user's
-                # data requires an upstream user identifier that we don't have (due to a
-                # failure of SSO or similar). In sucha a case, `get_learner_data_record`
-                # would return None, and we'd simply skip yielding it here.
-                yield record
+        audit_modes = getattr(settings, 'ENTERPRISE_COURSE_ENROLLMENT_AUDIT_MODES', ['audit', 'honor'])
+        return bool(course_enrollment and course_enrollment.get('mode') in audit_modes)
 
-    def _collect_certificate_data(self, enterprise_enrollment):
+    def _collect_certificate_data(self, enterprise_enrollment, username):
         """
         Collect the learner completion data from the course certificate.
 
@@ -159,6 +375,7 @@ class BaseLearnerExporter(object):
         Args:
             enterprise_enrollment (EnterpriseCourseEnrollment): the enterprise enrollment record for which we need to
             collect completion/grade data
+            username (str): the username of the learner of the enterprise enrollment.
 
         Returns:
             completed_date: Date the course was completed, this is None if course has not been completed.
@@ -166,14 +383,12 @@ class BaseLearnerExporter(object):
             is_passing: Boolean indicating if the grade is a passing grade or not.
         """
 
-        if self.certificates_api is None:
-            self.certificates_api = CertificatesApiClient(self.user)
-
+        certificates_api = self._get_api_client(CertificatesApiClient, self.user)
         course_id = enterprise_enrollment.course_id
-        username = enterprise_enrollment.enterprise_customer_user.user.username
 
         try:
-            certificate = self.certificates_api.get_course_certificate(course_id, username)
+            with get_host_semaphore(CertificatesApiClient.API_BASE_URL):
+                certificate = certificates_api.get_course_certificate(course_id, username)
             completed_date = certificate.get('created_date')
             if completed_date:
                 completed_date = parse_datetime(completed_date)
@@ -191,7 +406,7 @@ class BaseLearnerExporter(object):
 
         return completed_date, grade, is_passing
 
-    def _collect_grades_data(self, enterprise_enrollment, course_details):
+    def _collect_grades_data(self, enterprise_enrollment, course_details, username):
         """
         Collect the learner completion data from the Grades API.
 
@@ -201,20 +416,19 @@ class BaseLearnerExporter(object):
             enterprise_enrollment (EnterpriseCourseEnrollment): the enterprise enrollment record for which we need to
             collect completion/grade data
             course_details (dict): the course details for the course in the enterprise enrollment record.
+            username (str): the username of the learner of the enterprise enrollment.
 
         Returns:
             completed_date: Date the course was completed, this is None if course has not been completed.
             grade: Current grade in the course.
             is_passing: Boolean indicating if the grade is a passing grade or not.
         """
-        if self.grades_api is None:
-            self.grades_api = GradesApiClient(self.user)
-
+        grades_api = self._get_api_client(GradesApiClient, self.user)
         course_id = enterprise_enrollment.course_id
-        username = enterprise_enrollment.enterprise_customer_user.user.username
 
         try:
-            grades_data = self.grades_api.get_course_grade(course_id, username)
+            with get_host_semaphore(GradesApiClient.API_BASE_URL):
+                grades_data = grades_api.get_course_grade(course_id, username)
 
         except HttpNotFoundError:
             # Grade not found, so we have nothing to report.
@@ -4,7 +4,16 @@ Enterprise Integrated Channel management commands.
 """
 from __future__ import absolute_import, unicode_literals
 
+import multiprocessing
+import signal
+import sys
+import time
+from collections import Counter
+from logging import getLogger
+
+from django.conf import settings
 from django.core.management.base import CommandError
+from django.db import connections
 from django.utils.translation import ugettext as _
 
 from enterprise.models import EnterpriseCustomer
@@ -32,6 +41,180 @@ INTEGRATED_CHANNEL_CHOICES = {
     for channel_class in (SAPSuccessFactorsEnterpriseCustomerConfiguration, )
 }
 
+LOGGER = getLogger(__name__)
+
+
+def _run_channel_task(task, args, result_connection):
+    """
+    Run the task of an integrated channel in a child process, and send its result back to the parent process.
+
+    When the process is terminated, the task is interrupted by a ``SystemExit`` exception, so that it can still
+    save what it transmitted so far.
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    try:
+        result_connection.send((ChannelJob.SUCCEEDED, task(*args)))
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception('Task %s failed with arguments %s', task.__name__, args)
+        result_connection.send((ChannelJob.FAILED, None))
+    finally:
+        result_connection.close()
+        connections.close_all()
+
+
+class ChannelJob(object):
+    """
+    The task of a single integrated channel, run in its own process by the ``ParallelChannelRunner``.
+    """
+
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    TIMED_OUT = 'timed out'
+
+    def __init__(self, integrated_channel, args):
+        """
+        Prepare to run the task of the given integrated channel with the given arguments.
+        """
+        self.label = str(integrated_channel)
+        self.host = integrated_channel.get_remote_host()
+        self.args = args
+        self.process = None
+        self.result_connection = None
+        self.started = None
+        self.finished = None
+        self.status = None
+        self.records = None
+
+    @property
+    def duration(self):
+        """
+        Number of seconds the task ran for.
+        """
+        return self.finished - self.started
+
+    def start(self, task):
+        """
+        Start running the task in a child process.
+        """
+        self.result_connection, child_connection = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(
+            target=_run_channel_task,
+            args=(task, self.args, child_connection),
+        )
+        self.started = time.time()
+        self.process.start()
+        child_connection.close()
+
+    def poll(self, timeout=None):
+        """
+        Check whether the task is done, terminating it if it ran for longer than ``timeout`` seconds.
+
+        Returns True once the task is done.
+        """
+        if self.result_connection.poll():
+            try:
+                self.status, self.records = self.result_connection.recv()
+            except EOFError:
+                # The process exited without sending a result.
+                self.status = self.FAILED
+        elif not self.process.is_alive():
+            self.status = self.FAILED
+        elif timeout and time.time() - self.started > timeout:
+            self.process.terminate()
+            self.status = self.TIMED_OUT
+        else:
+            return False
+
+        self.process.join()
+        self.result_connection.close()
+        self.finished = time.time()
+        return True
+
+
+class ParallelChannelRunner(object):
+    """
+    Run a task for each integrated channel in parallel, each in its own process, without a celery broker.
+
+    At most ``processes`` channels run at once, and at most ``max_per_host`` of them transmit to the same remote
+    host; the limit per host is set by the ``INTEGRATED_CHANNEL_MAX_CONCURRENT_CHANNELS_PER_HOST`` setting by
+    default. A channel still running after ``timeout`` seconds is terminated.
+    """
+
+    # Number of seconds between each check for the channels which are done.
+    POLL_INTERVAL = 0.1
+
+    # Default maximum number of channels transmitting to the same remote host at once.
+    MAX_CONCURRENT_CHANNELS_PER_HOST = 2
+
+    def __init__(self, task, processes, timeout=None, max_per_host=None):
+        """
+        Prepare to run the given task for each integrated channel.
+        """
+        self.task = task
+        self.processes = max(processes, 1)
+        self.timeout = timeout
+        self.max_per_host = max_per_host or getattr(
+            settings,
+            'INTEGRATED_CHANNEL_MAX_CONCURRENT_CHANNELS_PER_HOST',
+            self.MAX_CONCURRENT_CHANNELS_PER_HOST,
+        )
+
+    def run(self, channel_args):
+        """
+        Run the task for each of the given (integrated channel, task arguments) pairs, and log a summary.
+
+        Returns the list of ``ChannelJob`` objects, in the order the channels were given.
+        """
+        jobs = [ChannelJob(integrated_channel, args) for integrated_channel, args in channel_args]
+        pending = list(jobs)
+        running = []
+        running_per_host = Counter()
+
+        # The child processes must open their own database connections.
+        connections.close_all()
+
+        while pending or running:
+            for job in list(pending):
+                if len(running) >= self.processes:
+                    break
+                if job.host and running_per_host[job.host] >= self.max_per_host:
+                    continue
+                pending.remove(job)
+                job.start(self.task)
+                running.append(job)
+                running_per_host[job.host] += 1
+
+            time.sleep(self.POLL_INTERVAL)
+
+            for job in list(running):
+                if job.poll(self.timeout):
+                    running.remove(job)
+                    running_per_host[job.host] -= 1
+
+        self.log_summary(jobs)
+        return jobs
+
+    @staticmethod
+    def log_summary(jobs):
+        """
+        Log the duration and the number of records transmitted for each integrated channel.
+        """
+        for job in jobs:
+            LOGGER.info(
+                'Integrated channel %s %s in %.2f seconds, having transmitted %s records',
+                job.label,
+                job.status,
+                job.duration,
+                'an unknown number of' if job.records is None else job.records,
+            )
+        LOGGER.info(
+            'Ran %d integrated channels: %d succeeded, %d failed, %d timed out',
+            len(jobs),
+            sum(1 for job in jobs if job.status == ChannelJob.SUCCEEDED),
+            sum(1 for job in jobs if job.status == ChannelJob.FAILED),
+            sum(1 for job in jobs if job.status == ChannelJob.TIMED_OUT),
+        )
+
 
 class IntegratedChannelCommandMixin(object):
     """
@@ -58,6 +241,24 @@ class IntegratedChannelCommandMixin(object):
                    'Omit this option to transmit to all configured, active integrated channels.'),
             choices=INTEGRATED_CHANNEL_CHOICES.keys(),
         )
+        parser.add_argument(
+            '--processes',
+            dest='processes',
+            type=int,
+            default=0,
+            metavar='PROCESSES',
+            help=_('Transmit data to this many integrated channels in parallel, each in its own process. '
+                   'Omit this option to hand each integrated channel to a celery task instead.'),
+        )
+        parser.add_argument(
+            '--channel_timeout',
+            dest='channel_timeout',
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help=_('Terminate the transmission to an integrated channel after this many seconds. '
+                   'Only applies when the integrated channels are transmitted to in parallel.'),
+        )
 
     @staticmethod
     def _get_enterprise_customer(uuid):
@@ -125,3 +326,21 @@ class IntegratedChannelCommandMixin(object):
             # Gen the learner data to each integrated channel
             for integrated_channel in integrated_channels:
                 yield integrated_channel
+
+    @staticmethod
+    def run_in_parallel(options, task, channel_args):
+        """
+        Run the task for each of the given (integrated channel, task arguments) pairs in parallel processes.
+
+        Raises CommandError if the task failed or timed out for any of the integrated channels.
+        """
+        runner = ParallelChannelRunner(task, options['processes'], timeout=options.get('channel_timeout'))
+        jobs = runner.run(channel_args)
+        unsuccessful = [job for job in jobs if job.status != ChannelJob.SUCCEEDED]
+        if unsuccessful:
+            raise CommandError(
+                _('Transmission failed or timed out for {count} of {total} integrated channels.').format(
+                    count=len(unsuccessful),
+                    total=len(jobs),
+                )
+            )
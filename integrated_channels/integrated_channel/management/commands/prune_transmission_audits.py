@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Prunes the audits of the transmissions made to the integrated channels.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import gzip
+import json
+import os
+from datetime import timedelta
+from logging import getLogger
+
+from integrated_channels.sap_success_factors.models import CatalogTransmissionAudit, LearnerDataTransmissionAudit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+
+LOGGER = getLogger(__name__)
+
+# The audit models to prune, and the field each of their audit trails is kept for.
+AUDIT_MODELS = (
+    (LearnerDataTransmissionAudit, 'enterprise_course_enrollment_id'),
+    (CatalogTransmissionAudit, 'enterprise_customer_uuid'),
+)
+
+
+class Command(BaseCommand):
+    """
+    Delete the transmission audits older than the retention window, in bounded chunks.
+
+    The latest audit, and the latest successful audit, of each enterprise course enrollment and of each
+    enterprise customer's catalog are always kept, whatever their age: the transmissions rely on them to know
+    what was already sent. Optionally, the catalog summaries of the other catalog transmission audits are
+    compacted, since only the latest one is ever read.
+    """
+    help = _('Delete the transmission audits of the integrated channels which are older than the retention window.')
+
+    # Default number of days the transmission audits are kept for. Can be overridden through the
+    # ``INTEGRATED_CHANNEL_AUDIT_RETENTION_DAYS`` setting.
+    RETENTION_DAYS = 90
+
+    def add_arguments(self, parser):
+        """
+        Add the optional --days, --batch_size, --archive_dir and --compact arguments to the parser.
+        """
+        parser.add_argument(
+            '--days',
+            dest='days',
+            type=int,
+            default=None,
+            metavar='DAYS',
+            help=_('Keep the transmission audits created in this many days. '
+                   'Defaults to the INTEGRATED_CHANNEL_AUDIT_RETENTION_DAYS setting.'),
+        )
+        parser.add_argument(
+            '--batch_size',
+            dest='batch_size',
+            type=int,
+            default=1000,
+            metavar='BATCH_SIZE',
+            help=_('Delete at most this many transmission audits in each query.'),
+        )
+        parser.add_argument(
+            '--archive_dir',
+            dest='archive_dir',
+            default=None,
+            metavar='DIRECTORY',
+            help=_('Archive the deleted transmission audits to gzipped JSON lines files in this directory.'),
+        )
+        parser.add_argument(
+            '--compact',
+            dest='compact',
+            action='store_true',
+            default=False,
+            help=_('Also clear the catalog summaries of the catalog transmission audits which are not the latest.'),
+        )
+
+    def handle(self, *args, **options):
+        """
+        Prune the transmission audits.
+        """
+        days = options['days']
+        if days is None:
+            days = getattr(settings, 'INTEGRATED_CHANNEL_AUDIT_RETENTION_DAYS', self.RETENTION_DAYS)
+        cutoff = timezone.now() - timedelta(days=days)
+        batch_size = options['batch_size']
+
+        for model, key_field in AUDIT_MODELS:
+            archive = None
+            if options['archive_dir']:
+                archive = self._open_archive(options['archive_dir'], model)
+            try:
+                pruned = 0
+                for ids in self._iter_prunable_ids(model.objects.filter(created__lt=cutoff), key_field, batch_size):
+                    if archive:
+                        for audit in model.objects.filter(id__in=ids).values():
+                            archive.write(json.dumps(audit, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8'))
+                            archive.write(b'\n')
+                    model.objects.filter(id__in=ids).delete()
+                    pruned += len(ids)
+            finally:
+                if archive:
+                    archive.close()
+            LOGGER.info('Deleted %d %s records created before %s', pruned, model.__name__, cutoff.isoformat())
+
+        if options['compact']:
+            compacted = 0
+            summaries = CatalogTransmissionAudit.objects.exclude(audit_summary='{}')
+            for ids in self._iter_prunable_ids(summaries, 'enterprise_customer_uuid', batch_size):
+                compacted += CatalogTransmissionAudit.objects.filter(id__in=ids).update(audit_summary='{}')
+            LOGGER.info('Cleared the catalog summary of %d CatalogTransmissionAudit records', compacted)
+
+    @staticmethod
+    def _iter_prunable_ids(queryset, key_field, batch_size):
+        """
+        Generate the IDs of the audits of the queryset which may be pruned, in chunks of at most ``batch_size``.
+
+        The latest audit and the latest successful audit for each value of ``key_field`` are left out.
+        """
+        last_id = 0
+        while True:
+            candidates = list(
+                queryset.filter(id__gt=last_id).order_by('id').values_list('id', key_field)[:batch_size]
+            )
+            if not candidates:
+                return
+            last_id = candidates[-1][0]
+
+            audits = queryset.model.objects.filter(
+                **{key_field + '__in': {key for __, key in candidates}}
+            ).values(key_field)
+            kept_ids = set(audits.annotate(latest_id=Max('id')).values_list('latest_id', flat=True))
+            kept_ids.update(
+                audits.filter(error_message='').annotate(latest_id=Max('id')).values_list('latest_id', flat=True)
+            )
+
+            ids = [audit_id for audit_id, __ in candidates if audit_id not in kept_ids]
+            if ids:
+                yield ids
+
+    @staticmethod
+    def _open_archive(archive_dir, model):
+        """
+        Open a new gzipped JSON lines file in the archive directory, for the audits of the given model.
+        """
+        filename = '{model}-{timestamp}.jsonl.gz'.format(
+            model=model._meta.model_name,  # pylint: disable=protected-access
+            timestamp=timezone.now().strftime('%Y%m%d%H%M%S'),
+        )
+        return gzip.open(os.path.join(archive_dir, filename), 'wb')
@@ -54,16 +54,19 @@ class Command(IntegratedChannelCommandMixin, BaseCommand):
 
         channels = self.get_integrated_channels(options, enterprise_customer__catalog__isnull=False)
 
-        for channel in channels:
-            channel_code = channel.channel_code()
-            channel_pk = channel.pk
-            send_data_task.delay(username, channel_code, channel_pk)
+        if options['processes']:
+            channel_args = [(channel, (username, channel.channel_code(), channel.pk)) for channel in channels]
+            self.run_in_parallel(options, transmit_course_data, channel_args)
+        else:
+            for channel in channels:
+                channel_code = channel.channel_code()
+                channel_pk = channel.pk
+                send_data_task.delay(username, channel_code, channel_pk)
 
 
-@celery_task
-def send_data_task(username, channel_code, channel_pk):
+def transmit_course_data(username, channel_code, channel_pk):
     """
-    Task to send course data to each linked integrated channel
+    Send course data to the integrated channel, and return the number of courses which were transmitted.
 
     Arguments:
         channel_code (str): Capitalized identifier for the integrated channel
@@ -78,8 +81,21 @@ def send_data_task(username, channel_code, channel_pk):
         channel,
     )
 
+    return channel.transmit_course_data(user)
+
+
+@celery_task
+def send_data_task(username, channel_code, channel_pk):
+    """
+    Task to send course data to each linked integrated channel
+
+    Arguments:
+        channel_code (str): Capitalized identifier for the integrated channel
+        channel_pk (str): Primary key for identifying integrated channel
+
+    """
     try:
-        channel.transmit_course_data(user)
+        transmit_course_data(username, channel_code, channel_pk)
     except Exception:  # pylint: disable=broad-except
         exception_message = 'Transmission of course metadata failed for user "{username}" and for integrated ' \
                             'channel with code "{channel_code}" and id "{channel_pk}".'.format(
@@ -25,7 +25,7 @@ class Command(IntegratedChannelCommandMixin, BaseCommand):
 
     def add_arguments(self, parser):
         """
-        Add required --api_user argument to the parser.
+        Add required --api_user and optional --workers and --incremental arguments to the parser.
         """
         parser.add_argument(
             '--api_user',
@@ -34,6 +34,21 @@ class Command(IntegratedChannelCommandMixin, BaseCommand):
             metavar='LMS_API_USERNAME',
             help=_('Username of a user authorized to fetch grades from the LMS API.'),
         )
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=1,
+            metavar='WORKERS',
+            help=_('Number of threads used to fetch learner grades and certificates from the LMS API.'),
+        )
+        parser.add_argument(
+            '--incremental',
+            dest='incremental',
+            action='store_true',
+            default=False,
+            help=_('Only transmit the learner data which could have changed since the last transmission.'),
+        )
         super(Command, self).add_arguments(parser)
 
     def handle(self, *args, **options):
@@ -48,15 +63,33 @@ class Command(IntegratedChannelCommandMixin, BaseCommand):
             raise CommandError(_('A user with the username {username} was not found.').format(username=api_username))
 
         # Transmit the learner data to each integrated channel
-        for integrated_channel in self.get_integrated_channels(options):
-            self.transmit_learner_data.delay(api_username, integrated_channel.channel_code(), integrated_channel.pk)
+        channel_args = [
+            (
+                integrated_channel,
+                (
+                    api_username,
+                    integrated_channel.channel_code(),
+                    integrated_channel.pk,
+                    options['workers'],
+                    options['incremental'],
+                ),
+            )
+            for integrated_channel in self.get_integrated_channels(options)
+        ]
+        if options['processes']:
+            self.run_in_parallel(options, self.transmit_learner_data, channel_args)
+        else:
+            for __, args in channel_args:
+                self.transmit_learner_data.delay(*args)
 
     @staticmethod
     @celery_task
-    def transmit_learner_data(username, channel_code, channel_pk):
+    def transmit_learner_data(username, channel_code, channel_pk, workers=1, incremental=False):
         """
         Allows each enterprise customer's integrated channel to collect and transmit data within its own celery task.
+
+        Returns the number of learner data records which were transmitted.
         """
         api_user = User.objects.get(username=username)
         integrated_channel = INTEGRATED_CHANNEL_CHOICES[channel_code].objects.get(pk=channel_pk)
-        integrated_channel.transmit_learner_data(api_user)
+        return integrated_channel.transmit_learner_data(api_user, workers=workers, incremental=incremental)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import model_utils.fields
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enterprise', '0035_catalog_content_index'),
+        ('integrated_channel', '0002_delete_enterpriseintegratedchannel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearnerDataExportWatermark',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', model_utils.fields.AutoCreatedField(verbose_name='created', default=django.utils.timezone.now, editable=False)),
+                ('modified', model_utils.fields.AutoLastModifiedField(verbose_name='modified', default=django.utils.timezone.now, editable=False)),
+                ('channel_code', models.CharField(max_length=30, help_text='Code of the integrated channel.')),
+                ('exported_until', models.DateTimeField(help_text='Time at which the last complete export of learner data started.')),
+                ('enterprise_customer', models.ForeignKey(to='enterprise.EnterpriseCustomer')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='learnerdataexportwatermark',
+            unique_together=set([('channel_code', 'enterprise_customer')]),
+        ),
+    ]
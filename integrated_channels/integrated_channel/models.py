@@ -7,6 +7,8 @@ from __future__ import absolute_import, unicode_literals
 import logging
 
 from django.db import models
+from django.utils import timezone
+from django.utils.encoding import python_2_unicode_compatible
 
 from model_utils.models import TimeStampedModel
 
@@ -44,26 +46,67 @@ class EnterpriseCustomerPluginConfiguration(TimeStampedModel):
         """
         raise NotImplementedError('Implemented in concrete subclass.')
 
-    def get_learner_data_exporter(self, user):
+    def get_learner_data_exporter(self, user, workers=1, since=None):
         """
         Returns the class that can serialize the learner course completion data to the integrated channel.
+
+        ``workers`` is the number of threads the exporter may use to fetch the learner data from the LMS. When
+        ``since`` is given, the exporter only exports the enrollments whose learner data could have changed since
+        that datetime.
         """
         raise NotImplementedError('Implemented in concrete subclass.')
 
+    def get_transmitted_enrollment_ids(self, successful=True):
+        """
+        Returns the set of IDs of the enterprise enrollments whose learner data was successfully transmitted.
+
+        If ``successful`` is False, returns the IDs of the enterprise enrollments for which a transmission failed
+        instead. Integrated channels which do not keep track of their transmissions return an empty set.
+        """
+        return set()
+
     def get_learner_data_transmitter(self):
         """
         Returns the class that can transmit the learner course completion data to the integrated channel.
+
+        The transmitter's ``flush`` method is called once all the learner data was handed to it.
         """
         raise NotImplementedError("Implemented in concrete subclass.")
 
-    def transmit_learner_data(self, user):
+    def transmit_learner_data(self, user, workers=1, incremental=False):
         """
         Iterate over each learner data record and transmit it to the integrated channel.
+
+        If ``incremental`` is True, only the learner data which could have changed since the last transmission is
+        exported. The time at which each transmission started is recorded as the watermark of the next one.
+
+        Returns the number of learner data records which were transmitted.
         """
-        exporter = self.get_learner_data_exporter(user)
+        started = timezone.now()
+        since = None
+        if incremental:
+            since = LearnerDataExportWatermark.objects.filter(
+                channel_code=self.channel_code(),
+                enterprise_customer=self.enterprise_customer,
+            ).values_list('exported_until', flat=True).first()
+
+        exporter = self.get_learner_data_exporter(user, workers=workers, since=since)
         transmitter = self.get_learner_data_transmitter()
-        for learner_data in exporter.collect_learner_data():
-            transmitter.transmit(learner_data)
+        transmitted = 0
+        try:
+            for learner_data in exporter.collect_learner_data():
+                if transmitter.transmit(learner_data) is not None:
+                    transmitted += 1
+        finally:
+            # Save whatever the transmitter still holds, even when the transmission is interrupted.
+            transmitter.flush()
+
+        LearnerDataExportWatermark.objects.update_or_create(
+            channel_code=self.channel_code(),
+            enterprise_customer=self.enterprise_customer,
+            defaults={'exported_until': started},
+        )
+        return transmitted
 
     def get_course_data_exporter(self, user):
         """
@@ -80,7 +123,54 @@ class EnterpriseCustomerPluginConfiguration(TimeStampedModel):
     def transmit_course_data(self, user):
         """
         Compose the details from the concrete subclass to transmit the relevant data.
+
+        Returns the number of courses which were transmitted.
         """
         course_data_exporter = self.get_course_data_exporter(user)
         transmitter = self.get_course_data_transmitter()
-        transmitter.transmit(course_data_exporter)
+        catalog_transmission_audit = transmitter.transmit(course_data_exporter)
+        return catalog_transmission_audit.total_courses if catalog_transmission_audit else 0
+
+    def get_remote_host(self):
+        """
+        Returns the host of the remote system the data is transmitted to, or None if it is not known.
+
+        When the integrated channels are transmitted in parallel, the number of channels transmitting to the same
+        host at once is limited.
+        """
+        return None
+
+
+@python_2_unicode_compatible
+class LearnerDataExportWatermark(TimeStampedModel):
+    """
+    The time up to which the learner data of an enterprise customer was exported to an integrated channel.
+
+    Incremental learner data exports only export the learner data which could have changed since then.
+    """
+
+    channel_code = models.CharField(max_length=30, help_text="Code of the integrated channel.")
+    enterprise_customer = models.ForeignKey(EnterpriseCustomer, blank=False, null=False)
+    exported_until = models.DateTimeField(
+        help_text="Time at which the last complete export of learner data started."
+    )
+
+    class Meta:
+        app_label = 'integrated_channel'
+        unique_together = (('channel_code', 'enterprise_customer'),)
+
+    def __str__(self):
+        """
+        Return human-readable string representation.
+        """
+        return '<LearnerDataExportWatermark for {} of Enterprise {}: {}>'.format(
+            self.channel_code,
+            self.enterprise_customer.name,
+            self.exported_until,
+        )
+
+    def __repr__(self):
+        """
+        Return uniquely identifying string representation.
+        """
+        return self.__str__()
@@ -5,12 +5,18 @@ Client for connecting to SAP SuccessFactors.
 from __future__ import absolute_import, unicode_literals
 
 import datetime
+import threading
 import time
 
 import requests
 
 from django.apps import apps
 
+# OAuth access tokens obtained by the clients of this process and their expiration datetimes, keyed on the
+# SAP SuccessFactors instance, client, company, user and user type they were issued for.
+OAUTH_ACCESS_TOKENS = {}
+OAUTH_ACCESS_TOKENS_LOCK = threading.Lock()
+
 
 class SAPSuccessFactorsAPIClient(object):
     """
@@ -21,6 +27,8 @@ class SAPSuccessFactorsAPIClient(object):
     """
 
     SESSION_TIMEOUT = 5
+    # Number of seconds before its expiration after which a cached access token is not used anymore.
+    ACCESS_TOKEN_EXPIRATION_MARGIN = 60
 
     @staticmethod
     def get_oauth_access_token(url_base, client_id, client_secret, company_id, user_id, user_type):
@@ -71,6 +79,34 @@ class SAPSuccessFactorsAPIClient(object):
         except KeyError:
             raise requests.RequestException(response=response)
 
+    @classmethod
+    def get_cached_oauth_access_token(cls, url_base, client_id, client_secret, company_id, user_id, user_type):
+        """ Returns an OAuth 2.0 access token, only retrieving a new one if no unexpired token is cached.
+
+        Tokens are shared by all the clients of the current process. The arguments and the return value are
+        the same as the ones of ``get_oauth_access_token``.
+        """
+        key = (url_base, client_id, company_id, user_id, user_type)
+        expiration_threshold = datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=cls.ACCESS_TOKEN_EXPIRATION_MARGIN
+        )
+        with OAUTH_ACCESS_TOKENS_LOCK:
+            cached_token = OAUTH_ACCESS_TOKENS.get(key)
+        if cached_token is not None and cached_token[1] > expiration_threshold:
+            return cached_token
+
+        access_token = cls.get_oauth_access_token(url_base, client_id, client_secret, company_id, user_id, user_type)
+        with OAUTH_ACCESS_TOKENS_LOCK:
+            # Drop the expired tokens, so that the cache only grows with the number of active users.
+            expired_keys = [
+                cached_key for cached_key, (__, expires_at) in OAUTH_ACCESS_TOKENS.items()
+                if expires_at <= expiration_threshold
+            ]
+            for expired_key in expired_keys:
+                del OAUTH_ACCESS_TOKENS[expired_key]
+            OAUTH_ACCESS_TOKENS[key] = access_token
+        return access_token
+
     def __init__(self, enterprise_configuration):
         """
         Instantiate a new client.
@@ -93,7 +129,11 @@ class SAPSuccessFactorsAPIClient(object):
 
         self.global_sap_config = SAPSuccessFactorsGlobalConfiguration.current()
         self.enterprise_configuration = enterprise_configuration
+        # Guards the replacement of the session once its token expires, as the session may be shared by threads.
+        self.session_lock = threading.Lock()
         self._create_session()
+        # Session reusing connections for the requests made with the access token of a specific user.
+        self.user_session = requests.Session()
 
     def _create_session(self):
         """
@@ -102,7 +142,7 @@ class SAPSuccessFactorsAPIClient(object):
         session = requests.Session()
         session.timeout = self.SESSION_TIMEOUT
 
-        oauth_access_token, expires_at = SAPSuccessFactorsAPIClient.get_oauth_access_token(
+        oauth_access_token, expires_at = SAPSuccessFactorsAPIClient.get_cached_oauth_access_token(
             self.enterprise_configuration.sapsf_base_url,
             self.enterprise_configuration.key,
             self.enterprise_configuration.secret,
@@ -163,7 +203,7 @@ class SAPSuccessFactorsAPIClient(object):
             model_name='SAPSuccessFactorsEnterpriseCustomerConfiguration'
         )
 
-        oauth_access_token, _ = SAPSuccessFactorsAPIClient.get_oauth_access_token(
+        oauth_access_token, _ = SAPSuccessFactorsAPIClient.get_cached_oauth_access_token(
             self.enterprise_configuration.sapsf_base_url,
             self.enterprise_configuration.key,
             self.enterprise_configuration.secret,
@@ -172,7 +212,7 @@ class SAPSuccessFactorsAPIClient(object):
             SAPSuccessFactorsEnterpriseCustomerConfiguration.USER_TYPE_USER
         )
 
-        response = requests.post(
+        response = self.user_session.post(
             url,
             data=payload,
             headers={
@@ -191,10 +231,12 @@ class SAPSuccessFactorsAPIClient(object):
             url (str): The url to post to.
             payload (str): The json encoded payload to post.
         """
-        now = datetime.datetime.utcnow()
-        if now >= self.expires_at:
-            # Create a new session with a valid token
-            self.session.close()
-            self._create_session()
-        response = self.session.post(url, data=payload)
+        with self.session_lock:
+            now = datetime.datetime.utcnow()
+            if now + datetime.timedelta(seconds=self.ACCESS_TOKEN_EXPIRATION_MARGIN) >= self.expires_at:
+                # Create a new session with a valid token
+                self.session.close()
+                self._create_session()
+            session = self.session
+        response = session.post(url, data=payload)
         return response.status_code, response.text
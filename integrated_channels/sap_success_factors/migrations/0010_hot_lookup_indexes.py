@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sap_success_factors', '0009_sapsuccessfactors_remove_enterprise_enrollment_page_waffle_flag'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='learnerdatatransmissionaudit',
+            name='enterprise_course_enrollment_id',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='catalogtransmissionaudit',
+            index_together=set([('enterprise_customer_uuid', 'created')]),
+        ),
+    ]
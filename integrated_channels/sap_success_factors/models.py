@@ -9,11 +9,14 @@ import json
 from logging import getLogger
 
 from config_models.models import ConfigurationModel
-from integrated_channels.integrated_channel.learner_data import BaseLearnerExporter
 from integrated_channels.integrated_channel.models import EnterpriseCustomerPluginConfiguration
 from integrated_channels.sap_success_factors.transmitters.courses import SuccessFactorsCourseTransmitter
 from integrated_channels.sap_success_factors.transmitters.learner_data import SuccessFactorsLearnerDataTransmitter
-from integrated_channels.sap_success_factors.utils import SapCourseExporter, parse_datetime_to_epoch
+from integrated_channels.sap_success_factors.utils import (
+    SapCourseExporter,
+    SapLearnerExporter,
+    parse_datetime_to_epoch,
+)
 from simple_history.models import HistoricalRecords
 
 from django.db import models
@@ -21,6 +24,10 @@ from django.utils.encoding import python_2_unicode_compatible
 
 from model_utils.models import TimeStampedModel
 
+from enterprise.models import EnterpriseCourseEnrollment
+
+from six.moves.urllib.parse import urlparse  # pylint: disable=import-error,wrong-import-order
+
 LOGGER = getLogger(__name__)
 
 
@@ -106,6 +113,12 @@ class SAPSuccessFactorsEnterpriseCustomerConfiguration(EnterpriseCustomerPluginC
         """
         return 'SAP'
 
+    def get_remote_host(self):
+        """
+        Returns the host of the SAP SuccessFactors instance the data is transmitted to.
+        """
+        return urlparse(self.sapsf_base_url).netloc or None
+
     def get_learner_data_record(self, enterprise_enrollment, completed_date=None, grade=None, is_passing=False):
         """
         Returns a LearnerDataTransmissionAudit initialized from the given enrollment and course completion data.
@@ -138,11 +151,29 @@ class SAPSuccessFactorsEnterpriseCustomerConfiguration(EnterpriseCustomerPluginC
                 enterprise_enrollment.enterprise_customer_user.username
             )
 
-    def get_learner_data_exporter(self, user):
+    def get_learner_data_exporter(self, user, workers=1, since=None):
         """
         Returns a SAP learner data exporter instance.
         """
-        return BaseLearnerExporter(user, self)
+        return SapLearnerExporter(user, self, workers=workers, since=since)
+
+    def get_transmitted_enrollment_ids(self, successful=True):
+        """
+        Returns the set of IDs of the enterprise enrollments whose learner data was successfully transmitted.
+
+        If ``successful`` is False, returns the IDs of the enterprise enrollments for which a transmission failed
+        instead.
+        """
+        audits = LearnerDataTransmissionAudit.objects.filter(
+            enterprise_course_enrollment_id__in=EnterpriseCourseEnrollment.objects.filter(
+                enterprise_customer_user__enterprise_customer=self.enterprise_customer,
+            ).values('id'),
+        )
+        if successful:
+            audits = audits.filter(error_message='')
+        else:
+            audits = audits.exclude(error_message='')
+        return set(audits.values_list('enterprise_course_enrollment_id', flat=True))
 
     def get_learner_data_transmitter(self):
         """
@@ -169,7 +200,7 @@ class LearnerDataTransmissionAudit(models.Model):
     The payload we sent to SuccessFactors at a given point in time for an enterprise course enrollment.
     """
 
-    enterprise_course_enrollment_id = models.PositiveIntegerField(blank=False, null=False)
+    enterprise_course_enrollment_id = models.PositiveIntegerField(blank=False, null=False, db_index=True)
     sapsf_user_id = models.CharField(max_length=255, blank=False, null=False)
     course_id = models.CharField(max_length=255, blank=False, null=False)
     course_completed = models.BooleanField(default=True)
@@ -203,9 +234,19 @@ class LearnerDataTransmissionAudit(models.Model):
     @property
     def provider_id(self):
         '''
-        Fetch ``provider_id`` from global configuration settings
+        Fetch ``provider_id`` from global configuration settings, unless it was set on the record
+        '''
+        provider_id = getattr(self, '_provider_id', None)
+        if provider_id is None:
+            provider_id = SAPSuccessFactorsGlobalConfiguration.current().provider_id
+        return provider_id
+
+    @provider_id.setter
+    def provider_id(self, provider_id):
+        '''
+        Set the ``provider_id`` sent with the record, so that the global configuration is not looked up for it
         '''
-        return SAPSuccessFactorsGlobalConfiguration.current().provider_id
+        self._provider_id = provider_id
 
     def _payload_data(self):
         """
@@ -256,6 +297,7 @@ class CatalogTransmissionAudit(TimeStampedModel):
 
     class Meta:
         app_label = 'sap_success_factors'
+        index_together = (('enterprise_customer_uuid', 'created'),)
 
     def __str__(self):
         """
@@ -6,11 +6,15 @@ from __future__ import absolute_import, unicode_literals
 
 import json
 import logging
+import time
+from itertools import islice
+from multiprocessing.pool import ThreadPool
 
 from integrated_channels.sap_success_factors.transmitters import SuccessFactorsTransmitterBase
 from requests import RequestException
 
 from django.apps import apps
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 
 LOGGER = logging.getLogger(__name__)
@@ -19,8 +23,16 @@ LOGGER = logging.getLogger(__name__)
 class SuccessFactorsCourseTransmitter(SuccessFactorsTransmitterBase):
     """
     This endpoint is intended to carry out an export of course data to SuccessFactors for a given Enterprise.
+
+    Blocks of courses are serialized as they are sent, up to ``SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS`` at a
+    time, and a block failing with a server error is retried up to ``SAP_SUCCESSFACTORS_COURSE_BLOCK_MAX_RETRIES``
+    times, waiting ``RETRY_BACKOFF_SECONDS`` before the first retry and twice as long before each further one.
     """
 
+    BLOCK_WORKERS = 4
+    BLOCK_MAX_RETRIES = 3
+    RETRY_BACKOFF_SECONDS = 1
+
     def transmit_block(self, serialized_payload):
         """
         SAPSuccessFactors can only send 1000 items at a time, so this method sends one "page" at a time.
@@ -32,7 +44,7 @@ class SuccessFactorsCourseTransmitter(SuccessFactorsTransmitterBase):
             status_code (int): An integer status for the HTTP request
             body (str): The SAP SuccessFactors server's response body
         """
-        LOGGER.info(serialized_payload)
+        LOGGER.debug('Sending a course metadata block of %d bytes', len(serialized_payload))
         try:
             status_code, body = self.client.send_course_import(serialized_payload)
         except RequestException as request_exception:
@@ -48,10 +60,73 @@ class SuccessFactorsCourseTransmitter(SuccessFactorsTransmitterBase):
 
         return status_code, body
 
+    def transmit_block_with_retries(self, serialized_payload):
+        """
+        Send a page of courses, retrying it with an exponential backoff while it fails with a server error.
+
+        Args:
+            serialized_payload (bytes): A set of bytes containing a page's worth of data
+
+        Returns:
+            status_code (int): An integer status for the last HTTP request
+            body (str): The SAP SuccessFactors server's response body to the last HTTP request
+        """
+        max_retries = getattr(settings, 'SAP_SUCCESSFACTORS_COURSE_BLOCK_MAX_RETRIES', self.BLOCK_MAX_RETRIES)
+        attempt = 0
+        while True:
+            status_code, body = self.transmit_block(serialized_payload)
+            if attempt >= max_retries or not (status_code >= 500 or status_code == 429):
+                return status_code, body
+            delay = self.RETRY_BACKOFF_SECONDS * 2 ** attempt
+            attempt += 1
+            LOGGER.warning(
+                'Retrying a course metadata block for Enterprise Customer %s in %s seconds (attempt %d of %d)',
+                self.enterprise_configuration.enterprise_customer.name,
+                delay,
+                attempt,
+                max_retries,
+            )
+            time.sleep(delay)
+
+    def transmit_blocks(self, payload):
+        """
+        Send the pages of courses of the exporter, several at a time.
+
+        Args:
+            payload (SapCourseExporter): The OCN course exporter object to send to SAP SuccessFactors
+
+        Yields:
+            status_code (int): An integer status for the HTTP request sending a page
+            body (str): The SAP SuccessFactors server's response body
+            course_keys (list): The keys of the courses of the page
+        """
+        workers = getattr(settings, 'SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS', self.BLOCK_WORKERS)
+        blocks = iter(payload.get_serialized_course_blocks())
+        if workers == 1:
+            for serialized_payload, course_keys in blocks:
+                yield self.transmit_block_with_retries(serialized_payload) + (course_keys,)
+            return
+
+        pool = ThreadPool(workers)
+        try:
+            # Only serialize as many pages as there are workers to send them.
+            window = list(islice(blocks, workers))
+            while window:
+                results = pool.map(self.transmit_block_with_retries, [block[0] for block in window])
+                for (status_code, body), (__, course_keys) in zip(results, window):
+                    yield status_code, body, course_keys
+                window = list(islice(blocks, workers))
+        finally:
+            pool.close()
+            pool.join()
+
     def transmit(self, payload):
         """
         Send a course data import call to SAP SuccessFactors using the client.
 
+        The audit summary saved with the transmission only reflects the pages of courses which were sent
+        successfully, so that the courses of the pages which failed are handled again by the next transmission.
+
         Args:
             payload (SapCourseExporter): The OCN course exporter object to send to SAP SuccessFactors
         """
@@ -62,35 +137,48 @@ class SuccessFactorsCourseTransmitter(SuccessFactorsTransmitterBase):
 
         try:
             last_catalog_transmission = CatalogTransmissionAudit.objects.filter(
-                error_message='',
                 enterprise_customer_uuid=self.enterprise_configuration.enterprise_customer.uuid
             ).latest('created')
         except ObjectDoesNotExist:
-            # This should happen if there have been 0 successful catalog transmissions for this enterprise
+            # This should happen if there have been 0 catalog transmissions for this enterprise
             last_audit_summary = {}
         else:
             last_audit_summary = json.loads(last_catalog_transmission.audit_summary)
 
-        audit_summary = payload.resolve_removed_courses(last_audit_summary)
+        audit_summary = payload.resolve_removed_courses(dict(last_audit_summary))
 
+        total_courses = 0
         total_transmitted = 0
         errors = []
         status_codes = []
-        for serialized_payload, length in payload.get_serialized_data_blocks():
-            status_code, body = self.transmit_block(serialized_payload)
+        for status_code, body, course_keys in self.transmit_blocks(payload):
+            total_courses += len(course_keys)
             status_codes.append(str(status_code))
             error_message = body if status_code >= 400 else ''
             if error_message:
                 errors.append(error_message)
+                # Keep the courses of the failed page as they were after the last transmission.
+                for course_key in course_keys:
+                    if course_key in last_audit_summary:
+                        audit_summary[course_key] = last_audit_summary[course_key]
+                    else:
+                        audit_summary.pop(course_key, None)
             else:
-                total_transmitted += length
+                total_transmitted += len(course_keys)
 
         error_message = ', '.join(errors) if errors else ''
         code_string = ', '.join(status_codes)
 
+        LOGGER.info(
+            'Sent %d of %d courses to SAP SuccessFactors for Enterprise Customer %s',
+            total_transmitted,
+            total_courses,
+            self.enterprise_configuration.enterprise_customer.name,
+        )
+
         catalog_transmission_audit = CatalogTransmissionAudit(
             enterprise_customer_uuid=self.enterprise_configuration.enterprise_customer.uuid,
-            total_courses=len(payload.courses),
+            total_courses=total_courses,
             status=code_string,
             error_message=error_message,
             audit_summary=json.dumps(audit_summary),
@@ -10,6 +10,7 @@ from integrated_channels.sap_success_factors.transmitters import SuccessFactorsT
 from requests import RequestException
 
 from django.apps import apps
+from django.conf import settings
 
 LOGGER = logging.getLogger(__name__)
 
@@ -18,8 +19,37 @@ class SuccessFactorsLearnerDataTransmitter(SuccessFactorsTransmitterBase):
     """
     This endpoint is intended to receive learner data routed from the integrated_channel app that is ready to be
     sent to SuccessFactors.
+
+    The audits of the transmissions are saved in batches of ``SAP_SUCCESSFACTORS_LEARNER_DATA_AUDIT_BATCH_SIZE``
+    records; ``flush`` must be called once done transmitting, to save the audits of the last batch.
     """
 
+    AUDIT_BATCH_SIZE = 100
+
+    def __init__(self, enterprise_configuration):
+        """
+        Initialize the transmitter with no pending audits.
+        """
+        super(SuccessFactorsLearnerDataTransmitter, self).__init__(enterprise_configuration)
+        self.audit_batch_size = getattr(
+            settings,
+            'SAP_SUCCESSFACTORS_LEARNER_DATA_AUDIT_BATCH_SIZE',
+            self.AUDIT_BATCH_SIZE,
+        )
+        self.pending_audits = []
+        self._transmitted_enrollment_ids = None
+
+    @property
+    def transmitted_enrollment_ids(self):
+        """
+        The IDs of the enterprise enrollments whose learner data was already transmitted successfully.
+
+        They are loaded from the database once, and kept up to date with the transmissions made since.
+        """
+        if self._transmitted_enrollment_ids is None:
+            self._transmitted_enrollment_ids = self.enterprise_configuration.get_transmitted_enrollment_ids()
+        return self._transmitted_enrollment_ids
+
     def transmit(self, payload):
         """
         Send a completion status call to SAP SuccessFactors using the client.
@@ -36,16 +66,7 @@ class SuccessFactorsLearnerDataTransmitter(SuccessFactorsTransmitterBase):
             LOGGER.debug('Skipping in progress enterprise enrollment {}'.format(enterprise_enrollment_id))
             return None
 
-        LearnerDataTransmissionAudit = apps.get_model(  # pylint: disable=invalid-name
-            app_label='sap_success_factors',
-            model_name='LearnerDataTransmissionAudit'
-        )
-
-        previous_transmissions = LearnerDataTransmissionAudit.objects.filter(
-            enterprise_course_enrollment_id=enterprise_enrollment_id,
-            error_message=''
-        )
-        if previous_transmissions.exists():
+        if enterprise_enrollment_id in self.transmitted_enrollment_ids:
             # We've already sent a completion status call for this enrollment
             LOGGER.debug('Skipping previously sent enterprise enrollment {}'.format(enterprise_enrollment_id))
             return None
@@ -62,5 +83,24 @@ class SuccessFactorsLearnerDataTransmitter(SuccessFactorsTransmitterBase):
 
         payload.status = str(code)
         payload.error_message = body if code >= 400 else ''
-        payload.save()
+        if not payload.error_message:
+            self.transmitted_enrollment_ids.add(enterprise_enrollment_id)
+
+        self.pending_audits.append(payload)
+        if len(self.pending_audits) >= self.audit_batch_size:
+            self.flush()
         return payload
+
+    def flush(self):
+        """
+        Save the audits of the transmissions which were not saved yet, in a single query.
+        """
+        if not self.pending_audits:
+            return
+
+        LearnerDataTransmissionAudit = apps.get_model(  # pylint: disable=invalid-name
+            app_label='sap_success_factors',
+            model_name='LearnerDataTransmissionAudit'
+        )
+        LearnerDataTransmissionAudit.objects.bulk_create(self.pending_audits)
+        self.pending_audits = []
@@ -5,17 +5,23 @@ Utilities for Enterprise Integrated Channel SAP SuccessFactors.
 from __future__ import absolute_import, unicode_literals
 
 import datetime
+import hashlib
 import json
 import os
+import re
 from logging import getLogger
 
 from integrated_channels.integrated_channel.course_metadata import BaseCourseExporter
+from integrated_channels.integrated_channel.learner_data import BaseLearnerExporter
 
 from django.apps import apps
+from django.conf import settings
 from django.utils import timezone
+from django.utils.http import RFC3986_SUBDELIMS, urlquote
 
 from enterprise.api_client.lms import parse_lms_api_datetime
 from enterprise.django_compatibility import reverse
+from enterprise.models import EnterpriseCustomerUser
 from enterprise.utils import safe_extract_key
 from six.moves.urllib.parse import urlencode, urlunparse  # pylint: disable=import-error,wrong-import-order
 
@@ -143,6 +149,9 @@ SUCCESSFACTORS_OCN_LANGUAGE_CODES = {
 class SapCourseExporter(BaseCourseExporter):  # pylint: disable=abstract-method
     """
     Class to provide data transforms for SAP SuccessFactors course export task.
+
+    Courses are serialized into blocks as they are retrieved, so only the key, status and content hash of each
+    course are kept in memory, for the audit summary.
     """
 
     CHUNK_PAGE_LENGTH = 1000
@@ -151,7 +160,10 @@ class SapCourseExporter(BaseCourseExporter):  # pylint: disable=abstract-method
 
     def __init__(self, user, plugin_configuration):
         self.removed_courses_resolved = False
+        self.previous_audit_summary = {}
+        self.audit_summary = {}
         super(SapCourseExporter, self).__init__(user, plugin_configuration)
+        self.transform_context = SapCourseTransformContext(self.enterprise_customer)
 
     def get_serialized_data_blocks(self):
         """
@@ -161,20 +173,103 @@ class SapCourseExporter(BaseCourseExporter):  # pylint: disable=abstract-method
             bytes: JSON-serialized course metadata structure
             int: Number of records in this batch
         """
-        location = 0
-        total_course_count = len(self.courses)
-        while (location < total_course_count) or not location:
-            this_batch = self.courses[location:location+self.CHUNK_PAGE_LENGTH]
-            location += self.CHUNK_PAGE_LENGTH
-            yield (
-                json.dumps({'ocnCourses': this_batch}, sort_keys=True).encode('utf-8'),
-                len(this_batch)
-            )
+        for serialized_block, course_keys in self.get_serialized_course_blocks():
+            yield serialized_block, len(course_keys)
+
+    def get_serialized_course_blocks(self):
+        """
+        Return serialized blocks of data representing the courses to be POSTed, along with the keys of their courses.
+
+        A block is serialized as soon as enough courses to fill it have been retrieved, and a single empty block
+        is returned when there are no courses to POST.
+
+        Yields:
+            bytes: JSON-serialized course metadata structure
+            list: The keys of the courses in this batch
+        """
+        this_batch = []
+        block_count = 0
+        for course in self.get_courses_to_send():
+            this_batch.append(course)
+            if len(this_batch) == self.CHUNK_PAGE_LENGTH:
+                yield self._serialize_block(this_batch)
+                block_count += 1
+                this_batch = []
+
+        if this_batch or not block_count:
+            yield self._serialize_block(this_batch)
+
+    @staticmethod
+    def _serialize_block(courses):
+        """
+        Serialize a block of courses, and list the keys of its courses.
+        """
+        return (
+            json.dumps({'ocnCourses': courses}, sort_keys=True).encode('utf-8'),
+            [course['courseID'] for course in courses],
+        )
+
+    def get_courses_to_send(self):
+        """
+        Yield the courses to be POSTed.
+
+        Once removed courses are resolved, only the courses which were previously pushed and the new, active
+        courses are added to the audit summary, and those whose content changed since they were last pushed
+        are POSTed. They are followed by the courses which are no longer in the catalog, to mark them inactive.
+        """
+        if not self.removed_courses_resolved:
+            for course in self.get_courses():
+                yield course
+            return
+
+        unchanged_course_count = 0
+        for course in self.get_courses():
+            course_key = course['courseID']
+            course_status = course['status']
+            content_hash = get_course_content_hash(course)
+
+            # Remove the key from previous audit summary so we can process courses that are no longer present,
+            # and keep course records for all previously pushed courses and new, active courses.
+            previous_summary = self.previous_audit_summary.pop(course_key, None)
+            if previous_summary or course_status == self.STATUS_ACTIVE:
+                self.audit_summary[course_key] = {
+                    'in_catalog': True,
+                    'status': course_status,
+                    'content_hash': content_hash,
+                }
+                # Courses which are unchanged since they were last pushed do not need to be pushed again.
+                if previous_summary and previous_summary.get('content_hash') == content_hash:
+                    unchanged_course_count += 1
+                else:
+                    yield course
+
+        LOGGER.info(
+            'Skipping %d courses unchanged since they were last sent with plugin configuration %s',
+            unchanged_course_count,
+            self.plugin_configuration,
+        )
+
+        for course_key, summary in self.previous_audit_summary.items():
+            # Send a course payload so that courses no longer in the catalog are marked inactive.
+            if summary['status'] == self.STATUS_ACTIVE and summary['in_catalog']:
+                self.audit_summary[course_key] = {
+                    'in_catalog': False,
+                    'status': self.STATUS_INACTIVE,
+                }
+                yield get_course_metadata_for_inactivation(
+                    course_key,
+                    self.enterprise_customer,
+                    self.transform_context.provider_id
+                )
 
     def resolve_removed_courses(self, previous_audit_summary):
         """
         Ensures courses that are no longer in the catalog get properly marked as inactive.
 
+        The courses are resolved as the serialized data blocks are generated, so the audit summary returned is only
+        complete once all of them have been generated; the entries of the previous audit summary are removed
+        as their courses are retrieved.
+
         Args:
             previous_audit_summary (dict): The previous audit summary from the last course export.
 
@@ -184,98 +279,156 @@ class SapCourseExporter(BaseCourseExporter):  # pylint: disable=abstract-method
         if self.removed_courses_resolved:
             return {}
 
-        new_audit_summary = {}
-        new_courses = []
-
-        for course in self.courses:
-            course_key = course['courseID']
-            course_status = course['status']
+        self.previous_audit_summary = previous_audit_summary
+        self.removed_courses_resolved = True
+        return self.audit_summary
 
-            # Remove the key from previous audit summary so we can process courses that are no longer present,
-            # and keep course records for all previously pushed courses and new, active courses.
-            if previous_audit_summary.pop(course_key, None) or course_status == self.STATUS_ACTIVE:
-                new_courses.append(course)
-                new_audit_summary[course_key] = {
-                    'in_catalog': True,
-                    'status': course_status,
+    def apply_data_transform(self, course_run_details):
+        """
+        Build the OCN course metadata of a course run, extracting each of its details only once.
+        """
+        context = self.transform_context
+        course_id = course_run_details['key']
+        title = safe_extract_key(course_run_details, 'title')
+        locale = context.get_locale(safe_extract_key(course_run_details, 'content_language', None))
+        start = context.parse_datetime(safe_extract_key(course_run_details, 'start', None), context.min_datetime)
+        end = context.parse_datetime(safe_extract_key(course_run_details, 'end', None), context.max_datetime)
+        return {
+            'courseID': course_id,
+            'providerID': context.provider_id,
+            'status': (
+                self.STATUS_ACTIVE
+                if course_run_details['availability'] in (self.AVAILABILITY_CURRENT, self.AVAILABILITY_UPCOMING)
+                else self.STATUS_INACTIVE
+            ),
+            'title': [
+                {
+                    'locale': locale,
+                    'value': title,
+                },
+            ],
+            'description': [
+                {
+                    'locale': locale,
+                    'value': (safe_extract_key(course_run_details, 'full_description')
+                              or safe_extract_key(course_run_details, 'short_description')
+                              or title),
+                },
+            ],
+            'thumbnailURI': safe_extract_key(safe_extract_key(course_run_details, 'image', {}), 'src'),
+            'content': [
+                {
+                    'providerID': context.provider_id,
+                    'launchURL': context.get_launch_url(
+                        course_id, safe_extract_key(course_run_details, 'enrollment_url')
+                    ),
+                    'contentTitle': title,
+                    'contentID': course_id,
+                    'launchType': 3,
+                    'mobileEnabled': safe_extract_key(course_run_details, 'mobile_available', 'false'),
+                }
+            ],
+            'price': [],
+            'schedule': [
+                {
+                    'startDate': datetime_to_epoch(start),
+                    'endDate': datetime_to_epoch(end),
+                    'active': start <= context.now <= end,
                 }
+            ],
+            'revisionNumber': 1,
+        }
 
-        provider_id = apps.get_model(
+
+class SapCourseTransformContext(object):
+    """
+    The details shared by the transforms of all the courses exported for an Enterprise Customer.
+
+    The global configuration, the launch URL of the Enterprise Customer and the bounds of course schedules are
+    looked up once, when the context is created, rather than for each course.
+    """
+
+    # The course run key the launch URLs of courses are built from, by replacing it with their own key.
+    LAUNCH_URL_PLACEHOLDER = 'course-v1:PLACEHOLDER+PLACEHOLDER+PLACEHOLDER'
+
+    # Maximum number of parsed schedule datetimes kept for reuse by the transforms of further courses.
+    MAX_PARSED_DATETIMES = 10000
+
+    def __init__(self, enterprise_customer):
+        """
+        Look up the details shared by the transforms of the courses.
+        """
+        self.enterprise_customer = enterprise_customer
+        self.provider_id = apps.get_model(
             'sap_success_factors',
             'SAPSuccessFactorsGlobalConfiguration'
         ).current().provider_id
+        self.launch_url_template = get_launch_url(enterprise_customer, self.LAUNCH_URL_PLACEHOLDER)
+        self.course_id_regex = re.compile(r'^{}$'.format(settings.COURSE_ID_PATTERN))
+        self.now = timezone.now()
+        self.min_datetime = parse_lms_api_datetime(UNIX_MIN_DATE_STRING)
+        self.max_datetime = parse_lms_api_datetime(UNIX_MAX_DATE_STRING)
+        self.locales = {}
+        self.datetimes = {}
+
+    def get_launch_url(self, course_id, enrollment_url=None):
+        """
+        Return the launch URL of a course, building it from the launch URL template when it has no enrollment URL.
+        """
+        if enrollment_url:
+            return enrollment_url
+        if self.course_id_regex.match(course_id):
+            return self.launch_url_template.replace(
+                self.LAUNCH_URL_PLACEHOLDER,
+                # Quote the course key the same way reversing the launch URL does.
+                urlquote(course_id, safe=RFC3986_SUBDELIMS + str('/~:@')),
+            )
+        return get_launch_url(self.enterprise_customer, course_id)
 
-        for course_key, summary in previous_audit_summary.items():
-            # Add a course payload to self.courses so that courses no longer in the catalog are marked inactive.
-            if summary['status'] == self.STATUS_ACTIVE and summary['in_catalog']:
-                new_courses.append(get_course_metadata_for_inactivation(
-                    course_key,
-                    self.enterprise_customer,
-                    provider_id
-                ))
+    def get_locale(self, language_code):
+        """
+        Return the SuccessFactors language name of an ISO language code, transforming each code only once.
+        """
+        if language_code not in self.locales:
+            self.locales[language_code] = transform_language_code(language_code)
+        return self.locales[language_code]
 
-                new_audit_summary[course_key] = {
-                    'in_catalog': False,
-                    'status': self.STATUS_INACTIVE,
-                }
+    def parse_datetime(self, datestamp, default):
+        """
+        Parse an ISO-8601 datetime string, or return the default if there is none.
+        """
+        if not datestamp:
+            return default
+        parsed_datetime = self.datetimes.get(datestamp)
+        if parsed_datetime is None:
+            parsed_datetime = parse_lms_api_datetime(datestamp)
+            if len(self.datetimes) < self.MAX_PARSED_DATETIMES:
+                self.datetimes[datestamp] = parsed_datetime
+        return parsed_datetime
 
-        self.courses = new_courses
-        self.removed_courses_resolved = True
-        return new_audit_summary
 
-    data_transform = {
-        'courseID': lambda x: x['key'],
-        'providerID': lambda x: apps.get_model(
+class SapLearnerExporter(BaseLearnerExporter):
+    """
+    Class to export learner data to SAP SuccessFactors.
+    """
+
+    def load_learner_details(self, enterprise_customer_users):
+        """
+        Retrieve the SAP SuccessFactors user IDs of the learners in bulk.
+        """
+        EnterpriseCustomerUser.load_remote_ids(enterprise_customer_users)
+
+    def collect_learner_data(self):
+        """
+        Collect the learner data records, looking up the SAP SuccessFactors provider ID once for all of them.
+        """
+        provider_id = apps.get_model(
             'sap_success_factors',
             'SAPSuccessFactorsGlobalConfiguration'
-        ).current().provider_id,
-        'status': lambda x: (SapCourseExporter.STATUS_ACTIVE
-                             if x['availability'] == BaseCourseExporter.AVAILABILITY_CURRENT
-                             or x['availability'] == BaseCourseExporter.AVAILABILITY_UPCOMING
-                             else SapCourseExporter.STATUS_INACTIVE),
-        'title': lambda x: [
-            {
-                'locale': transform_language_code(safe_extract_key(x, 'content_language', None)),
-                'value': safe_extract_key(x, 'title')
-            },
-        ],
-        'description': lambda x: [
-            {
-                'locale': transform_language_code(safe_extract_key(x, 'content_language', None)),
-                'value': (safe_extract_key(x, 'full_description')
-                          or safe_extract_key(x, 'short_description')
-                          or safe_extract_key(x, 'title')),
-            },
-        ],
-        'thumbnailURI': lambda x: safe_extract_key(safe_extract_key(x, 'image', {}), 'src'),
-        'content': lambda x: [
-            {
-                'providerID': apps.get_model(
-                    'sap_success_factors',
-                    'SAPSuccessFactorsGlobalConfiguration'
-                ).current().provider_id,
-                'launchURL': get_launch_url(
-                    x['enterprise_customer'], x['key'], safe_extract_key(x, 'enrollment_url')
-                ),
-                'contentTitle': safe_extract_key(x, 'title'),
-                'contentID': x['key'],
-                'launchType': 3,
-                'mobileEnabled': safe_extract_key(x, 'mobile_available', 'false'),
-            }
-        ],
-        'price': lambda x: [],
-        'schedule': lambda x: [
-            {
-                'startDate': parse_datetime_to_epoch(safe_extract_key(x, 'start', UNIX_MIN_DATE_STRING)),
-                'endDate': parse_datetime_to_epoch(safe_extract_key(x, 'end', UNIX_MAX_DATE_STRING)),
-                'active': current_time_is_in_interval(
-                    safe_extract_key(x, 'start', UNIX_MIN_DATE_STRING),
-                    safe_extract_key(x, 'end', UNIX_MAX_DATE_STRING)
-                ),
-            }
-        ],
-        'revisionNumber': lambda x: 1,
-    }
+        ).current().provider_id
+        for record in super(SapLearnerExporter, self).collect_learner_data():
+            record.provider_id = provider_id
+            yield record
 
 
 def get_launch_url(enterprise_customer, course_id, enrollment_url=None):
@@ -312,8 +465,14 @@ def parse_datetime_to_epoch(datestamp):
     """
     Convert an ISO-8601 datetime string to a Unix epoch timestamp in milliseconds.
     """
-    parsed_datetime = parse_lms_api_datetime(datestamp)
-    time_since_epoch = parsed_datetime - UNIX_EPOCH
+    return datetime_to_epoch(parse_lms_api_datetime(datestamp))
+
+
+def datetime_to_epoch(datetime_value):
+    """
+    Convert a timezone-aware datetime to a Unix epoch timestamp in milliseconds.
+    """
+    time_since_epoch = datetime_value - UNIX_EPOCH
     return int(time_since_epoch.total_seconds() * 1000)
 
 
@@ -351,6 +510,13 @@ def transform_language_code(code):
     return language_name
 
 
+def get_course_content_hash(course):
+    """
+    Return a digest of the given transformed course metadata, which only changes when the metadata does.
+    """
+    return hashlib.sha256(json.dumps(course, sort_keys=True).encode('utf-8')).hexdigest()
+
+
 def get_course_metadata_for_inactivation(course_id, enterprise_customer, provider_id):
     """
     Provide the minimal course metadata structure for updating a course to be inactive.
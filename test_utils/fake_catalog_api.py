@@ -1124,6 +1124,14 @@ FAKE_SEARCH_ALL_RESULTS_WITH_PAGINATION_1 = {
 }
 
 
+def get_fake_course_runs(count):
+    """
+    Generate the given number of course runs like ``FAKE_COURSE_RUN``, each with its own key.
+    """
+    for index in range(count):
+        yield dict(FAKE_COURSE_RUN, key='course-v1:edX+DemoX+Demo_Course_{}'.format(index))
+
+
 def get_catalog_courses(catalog_id):
     """
     Fake implementation returning catalog courses by ID.
@@ -1233,6 +1241,9 @@ def setup_course_catalog_api_client_mock(
     # Mock course catalog api functions.
     client.get_course_run.return_value = fake_course_run
     client.get_course_and_course_run.return_value = (fake_course, fake_course_run)
+    client.get_courses_and_course_runs.side_effect = lambda course_run_ids, **kwargs: {
+        course_run_id: (fake_course, fake_course_run) for course_run_id in course_run_ids
+    }
     client.get_program_course_keys.return_value = [course['key'] for course in fake_program['courses']]
     client.get_program_by_uuid.return_value = fake_program
     client.get_program_type_by_slug.return_value = fake_program_type
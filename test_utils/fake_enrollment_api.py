@@ -7,7 +7,8 @@ import datetime
 import json
 import re
 
-from edx_rest_api_client.exceptions import HttpClientError, HttpServerError
+from edx_rest_api_client.exceptions import HttpClientError, HttpServerError, SlumberBaseException
+from requests.exceptions import ConnectionError, Timeout  # pylint: disable=redefined-builtin
 
 from django.conf import settings
 
@@ -178,3 +179,22 @@ def enroll_user_in_course(user, course_id, mode):
         "mode": mode,
         "created": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
     }
+
+
+def enroll_users_in_course(enrollment_api_client):
+    """
+    Fake implementation of the bulk enrollment of a mocked client, enrolling each user through its single enrollment.
+    """
+    def enroll_users(usernames, course_id, mode):
+        """
+        Enroll the users one at a time, collecting the errors raised.
+        """
+        enrolled = {}
+        failed = {}
+        for username in usernames:
+            try:
+                enrolled[username] = enrollment_api_client.enroll_user_in_course(username, course_id, mode)
+            except (SlumberBaseException, ConnectionError, Timeout) as exc:
+                failed[username] = exc
+        return enrolled, failed
+    return enroll_users
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the bulk enrollment jobs runner.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import datetime
+import json
+
+import ddt
+import mock
+from edx_rest_api_client.exceptions import HttpClientError, HttpServerError
+from pytest import mark
+from requests.exceptions import ConnectionError, Timeout  # pylint: disable=redefined-builtin
+
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from enterprise.admin.jobs import BulkEnrollmentJobRunner
+from enterprise.django_compatibility import reverse
+from enterprise.models import (
+    BulkEnrollmentJob,
+    BulkEnrollmentJobLearner,
+    EnterpriseCourseEnrollment,
+    PendingEnrollment,
+)
+from test_utils import fake_catalog_api, fake_enrollment_api
+from test_utils.factories import EnterpriseCustomerFactory, UserFactory
+
+
+@ddt.ddt
+@mark.django_db
+class TestBulkEnrollmentJobRunner(TestCase):
+    """
+    Tests for :class:`BulkEnrollmentJobRunner`.
+    """
+
+    def setUp(self):
+        super(TestBulkEnrollmentJobRunner, self).setUp()
+        patcher = mock.patch('enterprise.admin.jobs.EnrollmentApiClient')
+        self.enrollment_api_client = patcher.start().return_value
+        self.enrollment_api_client.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(
+            self.enrollment_api_client
+        )
+        self.addCleanup(patcher.stop)
+        self.enterprise_customer = EnterpriseCustomerFactory()
+        self.requester = UserFactory(is_staff=True)
+        self.course_id = 'course-v1:edX+DemoX+Demo_Course'
+
+    def create_job(self, emails, **kwargs):
+        """
+        Create a job enrolling the given emails.
+        """
+        kwargs.setdefault('course_id', self.course_id)
+        kwargs.setdefault('notify', False)
+        job = BulkEnrollmentJob.objects.create(
+            enterprise_customer=self.enterprise_customer,
+            requester=self.requester,
+            course_mode='audit',
+            **kwargs
+        )
+        for email in emails:
+            BulkEnrollmentJobLearner.objects.create(job=job, user_email=email)
+        return job
+
+    @ddt.data(1, 3)
+    def test_run(self, workers):
+        users = [UserFactory() for __ in range(5)]
+        failing_username = users[2].username
+
+        def enroll_user_in_course(username, course_id, mode):  # pylint: disable=unused-argument
+            """
+            Fail to enroll one of the users.
+            """
+            if username == failing_username:
+                raise HttpClientError(content=json.dumps({'message': 'Enrollment closed'}).encode())
+
+        self.enrollment_api_client.enroll_user_in_course.side_effect = enroll_user_in_course
+        job = self.create_job([user.email for user in users] + ['unregistered@example.com'])
+
+        assert BulkEnrollmentJobRunner(workers=workers).run_next_job() == job
+
+        assert self.enrollment_api_client.enroll_user_in_course.call_count == 5
+        results = {learner.user_email: learner for learner in job.learners.all()}
+        assert results[users[2].email].status == BulkEnrollmentJobLearner.FAILED
+        assert results[users[2].email].message == '{}: Enrollment closed'.format(self.course_id)
+        assert results['unregistered@example.com'].status == BulkEnrollmentJobLearner.PENDING_REGISTRATION
+        assert sum(learner.status == BulkEnrollmentJobLearner.ENROLLED for learner in results.values()) == 4
+        assert sorted(EnterpriseCourseEnrollment.objects.values_list(
+            'enterprise_customer_user__user_id', flat=True
+        )) == sorted(user.id for index, user in enumerate(users) if index != 2)
+        assert PendingEnrollment.objects.get().user.user_email == 'unregistered@example.com'
+
+        job = BulkEnrollmentJob.objects.get()
+        assert job.status == BulkEnrollmentJob.COMPLETED
+        assert job.progress == (6, 6)
+        assert BulkEnrollmentJobRunner(workers=workers).run_next_job() is None
+
+    def test_run_program(self):
+        user = UserFactory()
+        program_details = fake_catalog_api.FAKE_PROGRAM_RESPONSE3
+        job = self.create_job([user.email], course_id='', program_details=program_details)
+        course_run_ids = set(
+            course_run['key'] for course in program_details['courses'] for course_run in course['course_runs']
+        )
+
+        assert BulkEnrollmentJobRunner(workers=1).run_next_job() == job
+
+        assert set(
+            call[0][1] for call in self.enrollment_api_client.enroll_user_in_course.call_args_list
+        ) == course_run_ids
+        assert set(EnterpriseCourseEnrollment.objects.values_list('course_id', flat=True)) == course_run_ids
+        assert job.enrolled_in == program_details['title']
+
+    def test_resume(self):
+        users = [UserFactory() for __ in range(3)]
+        job = self.create_job([user.email for user in users])
+        job.learners.filter(user_email=users[0].email).update(status=BulkEnrollmentJobLearner.ENROLLED)
+        BulkEnrollmentJob.objects.filter(id=job.id).update(
+            status=BulkEnrollmentJob.RUNNING,
+            worker='crashed-worker',
+            heartbeat=timezone.now() - datetime.timedelta(seconds=30),
+        )
+
+        # The job is still running, as far as the other workers can tell.
+        with override_settings(ENTERPRISE_BULK_ENROLLMENT_JOB_STALE_AFTER=60):
+            assert BulkEnrollmentJobRunner(workers=1).run_next_job() is None
+
+        # Until its heartbeat is stale; then only the learners which were not processed yet are enrolled.
+        with override_settings(ENTERPRISE_BULK_ENROLLMENT_JOB_STALE_AFTER=10):
+            assert BulkEnrollmentJobRunner(worker='other-worker', workers=1).run_next_job() == job
+
+        enrolled_usernames = sorted(
+            call[0][0] for call in self.enrollment_api_client.enroll_user_in_course.call_args_list
+        )
+        assert enrolled_usernames == sorted(user.username for user in users[1:])
+        job = BulkEnrollmentJob.objects.get()
+        assert (job.status, job.worker) == (BulkEnrollmentJob.COMPLETED, 'other-worker')
+
+    def test_claim_once(self):
+        job = self.create_job([])
+
+        assert BulkEnrollmentJob.objects.claim('first-worker', datetime.timedelta(minutes=10), 3) == job
+        assert BulkEnrollmentJob.objects.claim('second-worker', datetime.timedelta(minutes=10), 3) is None
+        job = BulkEnrollmentJob.objects.get()
+        assert (job.worker, job.attempts) == ('first-worker', 1)
+
+    @ddt.data(
+        HttpServerError('Server Error 503', content=b'Service Unavailable'),
+        ConnectionError('Connection refused'),
+        Timeout('Read timed out'),
+    )
+    def test_run_with_server_error(self, error):
+        users = [UserFactory() for __ in range(3)]
+        failing_username = users[1].username
+
+        def enroll_user_in_course(username, course_id, mode):  # pylint: disable=unused-argument
+            """
+            Fail to reach the LMS for one of the users.
+            """
+            if username == failing_username:
+                raise error
+
+        self.enrollment_api_client.enroll_user_in_course.side_effect = enroll_user_in_course
+        job = self.create_job([user.email for user in users])
+
+        assert BulkEnrollmentJobRunner(workers=1).run_next_job() == job
+
+        # The other learners of the job are still enrolled.
+        results = {learner.user_email: learner for learner in job.learners.all()}
+        assert results[users[1].email].status == BulkEnrollmentJobLearner.FAILED
+        assert results[users[1].email].message == '{}: {}'.format(self.course_id, error)
+        assert results[users[0].email].status == BulkEnrollmentJobLearner.ENROLLED
+        assert results[users[2].email].status == BulkEnrollmentJobLearner.ENROLLED
+        assert BulkEnrollmentJob.objects.get().status == BulkEnrollmentJob.COMPLETED
+
+    def test_run_with_database_error(self):
+        users = [UserFactory() for __ in range(3)]
+        job = self.create_job([user.email for user in users])
+        get_or_create = EnterpriseCourseEnrollment.objects.get_or_create
+
+        def get_or_create_enrollment(enterprise_customer_user, course_id):
+            """
+            Fail to save the enrollment of one of the users.
+            """
+            if enterprise_customer_user.user_id == users[1].id:
+                raise DatabaseError('Deadlock found')
+            return get_or_create(enterprise_customer_user=enterprise_customer_user, course_id=course_id)
+
+        with mock.patch.object(
+            EnterpriseCourseEnrollment.objects, 'get_or_create', side_effect=get_or_create_enrollment
+        ):
+            BulkEnrollmentJobRunner(workers=1).run_next_job()
+
+        results = {learner.user_email: learner for learner in job.learners.all()}
+        assert (results[users[1].email].status, results[users[1].email].message) == (
+            BulkEnrollmentJobLearner.FAILED, 'Deadlock found'
+        )
+        assert sorted(EnterpriseCourseEnrollment.objects.values_list(
+            'enterprise_customer_user__user_id', flat=True
+        )) == sorted([users[0].id, users[2].id])
+        assert BulkEnrollmentJob.objects.get().status == BulkEnrollmentJob.COMPLETED
+
+    @override_settings(ENTERPRISE_BULK_ENROLLMENT_JOB_STALE_AFTER=10, ENTERPRISE_BULK_ENROLLMENT_JOB_MAX_ATTEMPTS=2)
+    def test_abandoned_job_fails_after_max_attempts(self):
+        job = self.create_job([UserFactory().email])
+        BulkEnrollmentJob.objects.filter(id=job.id).update(
+            status=BulkEnrollmentJob.RUNNING,
+            worker='crashed-worker',
+            heartbeat=timezone.now() - datetime.timedelta(seconds=30),
+            attempts=1,
+        )
+        with mock.patch.object(BulkEnrollmentJobRunner, 'run', side_effect=Exception('LMS is down')):
+            with self.assertRaises(Exception):
+                BulkEnrollmentJobRunner(worker='other-worker', workers=1).run_next_job()
+        job = BulkEnrollmentJob.objects.get()
+        assert (job.status, job.worker, job.attempts) == (BulkEnrollmentJob.RUNNING, 'other-worker', 2)
+
+        # Once its heartbeat is stale again, the job is not claimed a third time.
+        BulkEnrollmentJob.objects.filter(id=job.id).update(heartbeat=timezone.now() - datetime.timedelta(seconds=30))
+        assert BulkEnrollmentJobRunner(worker='third-worker', workers=1).run_next_job() is None
+        job = BulkEnrollmentJob.objects.get()
+        assert (job.status, job.worker) == (BulkEnrollmentJob.FAILED, 'other-worker')
+        assert job.learners.get().status == BulkEnrollmentJobLearner.PENDING
+
+    def test_run_stops_once_claimed_by_another_worker(self):
+        users = [UserFactory() for __ in range(3)]
+        job = self.create_job([user.email for user in users], notify=True)
+
+        def enroll_user_in_course(username, course_id, mode):  # pylint: disable=unused-argument
+            """
+            Let another worker claim the job while the learners are enrolled.
+            """
+            BulkEnrollmentJob.objects.filter(id=job.id).update(worker='other-worker')
+
+        self.enrollment_api_client.enroll_user_in_course.side_effect = enroll_user_in_course
+        with mock.patch.object(BulkEnrollmentJobRunner, '_notify_learners') as mock_notify_learners:
+            assert BulkEnrollmentJobRunner(workers=1).run_next_job() == job
+
+        # The worker saves the batch of learners it enrolled, and then leaves the job to the other worker.
+        assert set(job.learners.values_list('status', flat=True)) == {BulkEnrollmentJobLearner.ENROLLED}
+        assert mock_notify_learners.call_count == 0
+        job = BulkEnrollmentJob.objects.get()
+        assert (job.status, job.worker) == (BulkEnrollmentJob.RUNNING, 'other-worker')
+
+    def test_complete_once_claimed_by_another_worker(self):
+        job = self.create_job([])
+        job = BulkEnrollmentJob.objects.claim('first-worker', datetime.timedelta(minutes=10), 3)
+        BulkEnrollmentJob.objects.filter(id=job.id).update(worker='second-worker')
+
+        assert not job.heartbeat_now()
+        assert not job.complete()
+        assert BulkEnrollmentJob.objects.get().status == BulkEnrollmentJob.RUNNING
+
+    @mock.patch('enterprise.admin.views.CourseCatalogApiClient')
+    def test_notify(self, mock_catalog_api_class):
+        mock_catalog_api_class.return_value.get_course_run.return_value = {
+            'title': 'Demo Course',
+            'start': '2017-01-01T12:00:00Z',
+        }
+        job = self.create_job([UserFactory().email, 'unregistered@example.com'], notify=True)
+
+        with mock.patch('enterprise.admin.views.send_email_notification_message') as mock_send_message:
+            assert BulkEnrollmentJobRunner(workers=1).run_next_job() == job
+
+        mock_catalog_api_class.assert_called_once_with(self.requester, self.enterprise_customer.site)
+        assert mock_send_message.call_count == 2
+
+    @mock.patch('enterprise.admin.views.CourseCatalogApiClient')
+    def test_notify_without_requester(self, mock_catalog_api_class):
+        job = self.create_job([UserFactory().email], notify=True)
+        self.requester.delete()
+        job.refresh_from_db()
+
+        assert BulkEnrollmentJobRunner(workers=1).run_next_job() == job
+
+        assert mock_catalog_api_class.call_count == 0
+        assert BulkEnrollmentJob.objects.get().status == BulkEnrollmentJob.COMPLETED
+
+    @override_settings(ROOT_URLCONF='test_utils.admin_urls')
+    def test_admin(self):
+        job = self.create_job([UserFactory().email, 'unregistered@example.com'])
+        self.requester.set_password('QWERTY')
+        self.requester.is_superuser = True
+        self.requester.is_active = True
+        self.requester.save()
+        assert self.client.login(username=self.requester.username, password='QWERTY')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:enterprise_bulkenrollmentjob_changelist'))
+        assert response.status_code == 200
+        assert '0 / 2' in response.content.decode('utf-8')
+
+        # The progress of the jobs is counted in the query listing them, rather than in a query per job.
+        processed_job = self.create_job(['processed@example.com', 'pending@example.com'])
+        processed_job.learners.filter(user_email='processed@example.com').update(
+            status=BulkEnrollmentJobLearner.FAILED
+        )
+        self.create_job([])
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(reverse('admin:enterprise_bulkenrollmentjob_changelist'))
+        content = response.content.decode('utf-8')
+        assert '1 / 2' in content
+        assert '0 / 0' in content
+
+        response = self.client.get(reverse('admin:enterprise_bulkenrollmentjob_change', args=(job.id,)))
+        assert '0 / 2' in response.content.decode('utf-8')
+        learners_url = '{}?job__id__exact={}'.format(
+            reverse('admin:enterprise_bulkenrollmentjoblearner_changelist'), job.id
+        )
+        assert learners_url in response.content.decode('utf-8')
+
+        response = self.client.get(learners_url)
+        assert response.status_code == 200
+        assert 'unregistered@example.com' in response.content.decode('utf-8')
@@ -7,6 +7,7 @@ from __future__ import absolute_import, unicode_literals
 import unittest
 
 import ddt
+import mock
 from pytest import mark, raises
 
 from django.core.exceptions import ValidationError
@@ -180,6 +181,16 @@ class TestValidateEmailToLink(unittest.TestCase):
             with raises(ValidationError, message=expected_message):
                 exists = validate_email_to_link(email)
 
+    def test_validate_email_to_link_existing_links(self):
+        email = FAKER.email()  # pylint: disable=no-member
+        existing_record = PendingEnterpriseCustomerUserFactory(user_email=email)
+        existing_links = EnterpriseCustomerUser.objects.get_links_by_email([email, 'unlinked@example.com'])
+
+        with mock.patch.object(EnterpriseCustomerUser.objects, 'get_link_by_email') as mock_get_link_by_email:
+            assert validate_email_to_link(email, ignore_existing=True, existing_links=existing_links) == existing_record
+            assert validate_email_to_link('unlinked@example.com', existing_links=existing_links) is False
+        assert not mock_get_link_by_email.called
+
 
 class TestGetCourseRunsFromProgram(unittest.TestCase):
     """
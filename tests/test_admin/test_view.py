@@ -17,13 +17,17 @@ from django.contrib.auth.models import User
 from django.contrib.messages import constants as messages
 from django.core import mail
 from django.test import Client, TestCase, override_settings
+from django.utils.html import escape
 
 from enterprise import admin as enterprise_admin
 from enterprise.admin import EnterpriseCustomerManageLearnersView, TemplatePreviewView
 from enterprise.admin.forms import ManageLearnersForm
+from enterprise.admin.jobs import BulkEnrollmentJobRunner
 from enterprise.admin.utils import ValidationMessages, get_course_runs_from_program
 from enterprise.django_compatibility import reverse
 from enterprise.models import (
+    BulkEnrollmentJob,
+    BulkEnrollmentJobLearner,
     EnrollmentNotificationEmailTemplate,
     EnterpriseCourseEnrollment,
     EnterpriseCustomerUser,
@@ -315,6 +319,67 @@ class TestEnterpriseCustomerManageLearnersViewGet(BaseTestEnterpriseCustomerMana
         response = self.client.get(self.view_url + '?q=longstringthatdoesnthappen')
         self._test_get_response(response, [], [])
 
+    @override_settings(ENTERPRISE_MANAGE_LEARNERS_PAGE_SIZE=2)
+    def test_get_paginated(self):
+        self._login()
+
+        linked_learners = [
+            EnterpriseCustomerUserFactory(enterprise_customer=self.enterprise_customer, user_id=UserFactory().id)
+            for __ in range(5)
+        ]
+        pending_linked_learners = [
+            PendingEnterpriseCustomerUserFactory(enterprise_customer=self.enterprise_customer) for __ in range(3)
+        ]
+
+        response = self.client.get(self.view_url + '?q=')
+        self._test_get_response(response, linked_learners[:2], pending_linked_learners[:2])
+        learners_next_page_url = response.context[self.context_parameters.LEARNERS_NEXT_PAGE_URL]
+        pending_learners_next_page_url = response.context[self.context_parameters.PENDING_LEARNERS_NEXT_PAGE_URL]
+        assert response.context[self.context_parameters.FIRST_PAGE_URL] is None
+        assert escape(learners_next_page_url) in response.content.decode('utf-8')
+
+        # The search keyword and the page of the other table are kept.
+        response = self.client.get(self.view_url + learners_next_page_url)
+        self._test_get_response(response, linked_learners[2:4], pending_linked_learners[:2])
+        learners_next_page_url = response.context[self.context_parameters.LEARNERS_NEXT_PAGE_URL]
+        assert response.context[self.context_parameters.SEARCH_KEYWORD] == ''
+        assert response.context[self.context_parameters.FIRST_PAGE_URL] == '?q='
+
+        response = self.client.get(self.view_url + learners_next_page_url)
+        self._test_get_response(response, linked_learners[4:], pending_linked_learners[:2])
+        assert response.context[self.context_parameters.LEARNERS_NEXT_PAGE_URL] is None
+
+        response = self.client.get(self.view_url + pending_learners_next_page_url)
+        self._test_get_response(response, linked_learners[:2], pending_linked_learners[2:])
+        assert response.context[self.context_parameters.PENDING_LEARNERS_NEXT_PAGE_URL] is None
+
+    def test_get_invalid_page(self):
+        self._login()
+
+        linked_learners = [EnterpriseCustomerUserFactory(enterprise_customer=self.enterprise_customer)]
+
+        response = self.client.get(self.view_url + '?learners_after=invalid')
+        self._test_get_response(response, linked_learners, [])
+
+    @override_settings(ENTERPRISE_MANAGE_LEARNERS_PAGE_SIZE=3)
+    def test_get_fetches_users_in_bulk(self):
+        self._login()
+
+        for __ in range(5):
+            EnterpriseCustomerUserFactory(
+                enterprise_customer=self.enterprise_customer,
+                user_id=UserFactory().id,
+            )
+        response = self.client.get(self.view_url)
+        assert response.status_code == 200
+
+        with mock.patch('enterprise.models.User.objects.filter') as mock_filter:
+            response = self.client.get(self.view_url)
+        assert response.status_code == 200
+        # The users of the learners of the page are fetched in bulk, rather than one by one.
+        assert not mock_filter.called
+        assert all(learner.username for learner in response.context[self.context_parameters.LEARNERS])
+
 
 @ddt.ddt
 @mark.django_db
@@ -493,6 +558,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
             "marketing_url": "http://localhost:8000/courses/course-v1:HarvardX+CoolScience+2016"
         }
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -538,6 +604,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
         }
         catalog_instance = course_catalog_client.return_value
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -606,6 +673,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
         catalog_instance = course_catalog_client.return_value
         catalog_instance.get_course_run.return_value = {}
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -650,6 +718,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
             "marketing_url": "http://localhost:8000/courses/course-v1:HarvardX+CoolScience+2016"
         }
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -687,6 +756,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
             "start": "2017-01-01T12:00:00Z",
         }
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = HttpClientError(
             "Client Error", content=json.dumps({"message": "test"}).encode()
         )
@@ -720,6 +790,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
             "start": "2017-01-01T12:00:00Z",
         }
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = HttpClientError(
             "Client Error", content='This is not JSON'.encode()
         )
@@ -749,6 +820,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
         views_catalog_instance = views_catalog_client.return_value
         views_catalog_instance.get_program_by_uuid.side_effect = fake_catalog_api.get_program_by_uuid
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         catalog_api_instance = catalog_client.return_value
         catalog_api_instance.get_program_by_uuid.side_effect = fake_catalog_api.get_program_by_uuid
@@ -797,6 +869,7 @@ class TestEnterpriseCustomerManageLearnersViewPostSingleUser(BaseTestEnterpriseC
         views_catalog_instance = views_catalog_client.return_value
         views_catalog_instance.get_program_by_uuid.side_effect = fake_catalog_api.get_program_by_uuid
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = HttpClientError(
             "Client Error", content=json.dumps({"message": "test"}).encode()
         )
@@ -1030,6 +1103,7 @@ class TestEnterpriseCustomerManageLearnersViewPostBulkUpload(BaseTestEnterpriseC
             "marketing_url": "http://localhost/course-v1:EnterpriseX+Training+2017"
         }
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -1063,6 +1137,66 @@ class TestEnterpriseCustomerManageLearnersViewPostBulkUpload(BaseTestEnterpriseC
         num_messages = len(mail.outbox)
         assert num_messages == 2
 
+    @override_settings(ENTERPRISE_BULK_ENROLLMENT_JOB_THRESHOLD=2)
+    @mock.patch("enterprise.admin.jobs.EnrollmentApiClient")
+    @mock.patch("enterprise.admin.views.CourseCatalogApiClient")
+    @mock.patch("enterprise.admin.views.EnrollmentApiClient")
+    @mock.patch("enterprise.admin.forms.EnrollmentApiClient")
+    def test_post_link_and_enroll_in_background(self, forms_client, views_client, course_catalog_client, jobs_client):
+        """
+        Test bulk upload with linking, and enrolling through a background job
+        """
+        course_catalog_instance = course_catalog_client.return_value
+        course_catalog_instance.get_course_run.return_value = {
+            "name": "Enterprise Training",
+            "start": "2017-01-01T12:00:00Z",
+            "marketing_url": "http://localhost/course-v1:EnterpriseX+Training+2017"
+        }
+        jobs_instance = jobs_client.return_value
+        jobs_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(jobs_instance)
+        jobs_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
+        forms_instance = forms_client.return_value
+        forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
+        self._login()
+        user = UserFactory.create()
+        unknown_email = FAKER.email()  # pylint: disable=no-member
+        columns = [ManageLearnersForm.CsvColumns.EMAIL]
+        data = [(user.email,), (unknown_email,)]
+        course_id = "course-v1:EnterpriseX+Training+2017"
+        course_mode = "professional"
+
+        response = self._perform_request(columns, data, course=course_id, course_mode=course_mode)
+
+        # The learners are linked, but their enrollment is left to a background job.
+        assert views_client.return_value.enroll_user_in_course.call_count == 0
+        job = BulkEnrollmentJob.objects.get()
+        assert (job.course_id, job.course_mode, job.requester, job.status) == (
+            course_id, course_mode, self.user, BulkEnrollmentJob.PENDING
+        )
+        assert job.progress == (0, 2)
+        scheduled_message = (
+            'The enrollment of 2 learners in {course_id} was scheduled. <a href="{url}">Follow its progress</a>.'
+        ).format(course_id=course_id, url=reverse('admin:enterprise_bulkenrollmentjob_change', args=(job.id,)))
+        self._assert_django_messages(response, set([
+            (messages.SUCCESS, "2 new learners were added to {}.".format(self.enterprise_customer.name)),
+            (messages.INFO, scheduled_message),
+        ]))
+        assert not mail.outbox
+
+        assert BulkEnrollmentJobRunner(workers=1).run_next_job() == job
+
+        jobs_instance.enroll_user_in_course.assert_called_once_with(user.username, course_id, course_mode)
+        assert EnterpriseCourseEnrollment.objects.filter(
+            enterprise_customer_user__user_id=user.id, course_id=course_id
+        ).exists()
+        assert PendingEnterpriseCustomerUser.objects.get().pendingenrollment_set.get().course_id == course_id
+        assert dict(job.learners.values_list('user_email', 'status')) == {
+            user.email: BulkEnrollmentJobLearner.ENROLLED,
+            unknown_email: BulkEnrollmentJobLearner.PENDING_REGISTRATION,
+        }
+        assert BulkEnrollmentJob.objects.get().status == BulkEnrollmentJob.COMPLETED
+        assert len(mail.outbox) == 2
+
     @mock.patch("enterprise.admin.views.CourseCatalogApiClient")
     @mock.patch("enterprise.admin.views.EnrollmentApiClient")
     @mock.patch("enterprise.admin.forms.EnrollmentApiClient")
@@ -1073,6 +1207,7 @@ class TestEnterpriseCustomerManageLearnersViewPostBulkUpload(BaseTestEnterpriseC
         course_catalog_instance = course_catalog_client.return_value
         course_catalog_instance.get_course_run.return_value = {}
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -1127,6 +1262,7 @@ class TestEnterpriseCustomerManageLearnersViewPostBulkUpload(BaseTestEnterpriseC
         catalog_api_instance.get_program_by_uuid.side_effect = fake_catalog_api.get_program_by_uuid
         catalog_api_instance.get_common_course_modes.side_effect = {"professional"}
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         forms_instance = forms_client.return_value
         forms_instance.get_course_details.side_effect = fake_enrollment_api.get_course_details
@@ -1169,6 +1305,7 @@ class TestEnterpriseCustomerManageLearnersViewPostBulkUpload(BaseTestEnterpriseC
         views_catalog_instance = views_catalog_client.return_value
         views_catalog_instance.get_program_by_uuid.side_effect = fake_catalog_api.get_program_by_uuid
         views_instance = views_client.return_value
+        views_instance.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(views_instance)
         views_instance.enroll_user_in_course.side_effect = fake_enrollment_api.enroll_user_in_course
         catalog_api_instance = catalog_client.return_value
         catalog_api_instance.get_program_by_uuid.side_effect = fake_catalog_api.get_program_by_uuid
@@ -11,6 +11,7 @@ from consent.api.v1.views import DataSharingConsentView as DSCView
 from rest_framework.reverse import reverse
 
 from django.conf import settings
+from django.core.cache import cache
 
 from test_utils import (
     FAKE_UUIDS,
@@ -1432,3 +1433,156 @@ class TestConsentAPIViews(APITest, ConsentMixin):
         # Assert that an enterprise course enrollment exists without consent provided.
         if expected_status_code == 200:
             self._assert_consent_not_provided(response)
+
+
+@ddt.ddt
+class TestConsentBatchAPIView(APITest):
+    """
+    Tests for the Consent application's batch Data Sharing API view.
+    """
+
+    path = settings.TEST_SERVER + reverse('data_sharing_consent_batch')
+
+    def setUp(self):
+        discovery_client_class = mock.patch('enterprise.models.CourseCatalogApiServiceClient')
+        self.discovery_client = discovery_client_class.start().return_value
+        self.discovery_client.is_course_in_catalog.return_value = True
+        self.addCleanup(discovery_client_class.stop)
+        program_client_class = mock.patch('consent.helpers.CourseCatalogApiServiceClient')
+        self.program_client = program_client_class.start().return_value
+        self.program_client.get_program_course_keys.return_value = ['edX+DemoX', 'edX+OtherX']
+        self.addCleanup(program_client_class.stop)
+        # Don't count these requests against the API throttle of the other tests.
+        self.addCleanup(cache.clear)
+        super(TestConsentBatchAPIView, self).setUp()
+        self.enterprise_customer = factories.EnterpriseCustomerFactory(uuid=TEST_UUID, catalog=1)
+
+    def create_user(self, username=TEST_USERNAME, password=TEST_PASSWORD, **kwargs):
+        """
+        Create a test user and set its password.
+        """
+        self.user = factories.UserFactory(username=username, is_active=True, id=TEST_USER_ID, **kwargs)
+        self.user.set_password(password)
+        self.user.save()
+
+    def test_missing_params(self):
+        response = self.client.get(self.path, {
+            DSCView.REQUIRED_PARAM_USERNAME: TEST_USERNAME,
+            DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: TEST_UUID,
+        })
+        assert response.status_code == 400
+        assert self.load_json(response.content) == {
+            'error': DSCView.MISSING_REQUIRED_PARAMS_MSG.format("one of 'course_id' or 'program_uuid'")
+        }
+
+    @ddt.data(
+        (False, TEST_USERNAME, 200),
+        (False, '{},other_learner'.format(TEST_USERNAME), 403),
+        (True, '{},other_learner'.format(TEST_USERNAME), 200),
+    )
+    @ddt.unpack
+    def test_permissions(self, is_staff, usernames, expected_status_code):
+        self.user.is_staff = is_staff
+        self.user.save()
+        response = self.client.get(self.path, {
+            DSCView.REQUIRED_PARAM_USERNAME: usernames,
+            DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: TEST_UUID,
+            DSCView.REQUIRED_PARAM_COURSE_ID: TEST_COURSE,
+        })
+        assert response.status_code == expected_status_code
+
+    def test_get(self):
+        self.user.is_staff = True
+        self.user.save()
+        other_course = 'course-v1:edX+OtherX+Other_Course'
+        factories.DataSharingConsentFactory(
+            username=TEST_USERNAME,
+            course_id=TEST_COURSE,
+            enterprise_customer=self.enterprise_customer,
+            granted=True,
+        )
+        factories.DataSharingConsentFactory(
+            username=TEST_USERNAME,
+            course_id='edX+DemoX',
+            enterprise_customer=self.enterprise_customer,
+            granted=True,
+        )
+        factories.EnterpriseCourseEnrollmentFactory(
+            course_id=other_course,
+            enterprise_customer_user=factories.EnterpriseCustomerUserFactory(
+                user_id=factories.UserFactory(username='other_learner').id,
+                enterprise_customer=self.enterprise_customer,
+            ),
+        )
+
+        response = self.client.get(self.path, {
+            DSCView.REQUIRED_PARAM_USERNAME: '{},other_learner'.format(TEST_USERNAME),
+            DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: TEST_UUID,
+            DSCView.REQUIRED_PARAM_COURSE_ID: '{},{}'.format(TEST_COURSE, other_course),
+            DSCView.REQUIRED_PARAM_PROGRAM_UUID: 'fake-program',
+        })
+
+        assert response.status_code == 200
+        results = self.load_json(response.content)['results']
+        assert set(results) == {TEST_USERNAME, 'other_learner'}
+        assert {
+            username: {
+                key: (
+                    result[DSCView.CONSENT_EXISTS],
+                    result[DSCView.CONSENT_GRANTED],
+                    result[DSCView.CONSENT_REQUIRED],
+                ) for key, result in user_results.items()
+            } for username, user_results in results.items()
+        } == {
+            TEST_USERNAME: {
+                TEST_COURSE: (True, True, False),
+                other_course: (False, False, True),
+                'fake-program': (True, False, True),
+            },
+            'other_learner': {
+                TEST_COURSE: (False, False, True),
+                other_course: (True, False, True),
+                'fake-program': (False, False, True),
+            },
+        }
+        assert results[TEST_USERNAME]['fake-program'][DSCView.REQUIRED_PARAM_PROGRAM_UUID] == 'fake-program'
+        assert results['other_learner'][other_course][DSCView.REQUIRED_PARAM_COURSE_ID] == other_course
+
+        # The program's courses and the catalog membership of each course are only fetched once.
+        self.program_client.get_program_course_keys.assert_called_once_with('fake-program')
+        assert sorted(call[0][1] for call in self.discovery_client.is_course_in_catalog.call_args_list) == [
+            TEST_COURSE, other_course, 'edX+DemoX', 'edX+OtherX',
+        ]
+
+    def test_get_no_enterprise_customer(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(self.path, {
+            DSCView.REQUIRED_PARAM_USERNAME: TEST_USERNAME,
+            DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: FAKE_UUIDS[0],
+            DSCView.REQUIRED_PARAM_COURSE_ID: TEST_COURSE,
+        })
+        assert response.status_code == 200
+        assert self.load_json(response.content) == {
+            DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: FAKE_UUIDS[0],
+            'results': {
+                TEST_USERNAME: {
+                    TEST_COURSE: {
+                        DSCView.REQUIRED_PARAM_USERNAME: TEST_USERNAME,
+                        DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: FAKE_UUIDS[0],
+                        DSCView.REQUIRED_PARAM_COURSE_ID: TEST_COURSE,
+                        DSCView.CONSENT_EXISTS: False,
+                        DSCView.CONSENT_GRANTED: False,
+                        DSCView.CONSENT_REQUIRED: False,
+                    },
+                },
+            },
+        }
+
+    def test_post_not_allowed(self):
+        response = self.client.post(self.path, {
+            DSCView.REQUIRED_PARAM_USERNAME: TEST_USERNAME,
+            DSCView.REQUIRED_PARAM_ENTERPRISE_CUSTOMER: TEST_UUID,
+            DSCView.REQUIRED_PARAM_COURSE_ID: TEST_COURSE,
+        })
+        assert response.status_code == 405
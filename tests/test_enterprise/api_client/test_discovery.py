@@ -5,14 +5,16 @@ Tests for the `edx-enterprise` course catalogs api module.
 
 from __future__ import absolute_import, unicode_literals, with_statement
 
+import collections
 import unittest
 
 import ddt
 import mock
 from pytest import raises
-from slumber.exceptions import HttpClientError
+from slumber.exceptions import HttpClientError, HttpNotFoundError
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 
 from enterprise.api_client.discovery import CourseCatalogApiClient, CourseCatalogApiServiceClient
@@ -53,6 +55,7 @@ class TestCourseCatalogApi(CourseDiscoveryApiTestMixin, unittest.TestCase):
 
     def setUp(self):
         super(TestCourseCatalogApi, self).setUp()
+        cache.clear()
         self.user_mock = mock.Mock(spec=User)
         self.get_data_mock = self._make_patch(self._make_catalog_api_location("get_edx_api_data"))
         self.catalog_api_config_mock = self._make_patch(self._make_catalog_api_location("CatalogIntegration"))
@@ -540,6 +543,167 @@ class TestCourseCatalogApi(CourseDiscoveryApiTestMixin, unittest.TestCase):
         self.get_data_mock.side_effect = HttpClientError
         assert self.api._load_data('', default=default) == default  # pylint: disable=protected-access
 
+    def test_get_course_details_cached(self):
+        """
+        Verify get_course_details only calls the discovery service once while the cached response is fresh.
+        """
+        self.get_data_mock.return_value = {'key': 'edX+DemoX'}
+        assert self.api.get_course_details('edX+DemoX') == {'key': 'edX+DemoX'}
+        assert self.api.get_course_details('edX+DemoX') == {'key': 'edX+DemoX'}
+        assert self.get_data_mock.call_count == 1
+
+    def test_uncached_resources_not_cached(self):
+        """
+        Verify list endpoints are always loaded from the discovery service.
+        """
+        self.get_data_mock.return_value = [{'id': 1}]
+        self.api.get_all_catalogs()
+        self.api.get_all_catalogs()
+        assert self.get_data_mock.call_count == 2
+
+    @ddt.data(
+        {'return_value': {}},
+        {'side_effect': HttpNotFoundError},
+    )
+    def test_not_found_cached(self, mock_kwargs):
+        """
+        Verify missing resources are remembered for ``NOT_FOUND_CACHE_TIMEOUT`` seconds.
+        """
+        self.get_data_mock.configure_mock(**mock_kwargs)
+        with mock.patch('enterprise.api_client.discovery.time.time', return_value=1000):
+            assert self.api.get_program_by_uuid('fake-uuid') is None
+            assert self.api.get_program_by_uuid('fake-uuid') is None
+        assert self.get_data_mock.call_count == 1
+
+        expired = 1001 + CourseCatalogApiClient.NOT_FOUND_CACHE_TIMEOUT
+        self.get_data_mock.configure_mock(return_value={'uuid': 'fake-uuid'}, side_effect=None)
+        with mock.patch('enterprise.api_client.discovery.time.time', return_value=expired):
+            assert self.api.get_program_by_uuid('fake-uuid') == {'uuid': 'fake-uuid'}
+        assert self.get_data_mock.call_count == 2
+
+    @ddt.data(
+        {'return_value': {}},
+        {'side_effect': HttpClientError},
+    )
+    def test_stale_response_served_on_failure(self, mock_kwargs):
+        """
+        Verify a stale response is served when it cannot be revalidated.
+        """
+        timeout = CourseCatalogApiClient.CACHE_TIMEOUTS[CourseCatalogApiClient.COURSE_RUNS_ENDPOINT]
+        self.get_data_mock.return_value = {'key': 'course-v1:edX+DemoX+Demo_Course'}
+        with mock.patch('enterprise.api_client.discovery.time.time', return_value=1000):
+            self.api.get_course_run('course-v1:edX+DemoX+Demo_Course')
+
+        self.get_data_mock.configure_mock(**mock_kwargs)
+        with mock.patch('enterprise.api_client.discovery.time.time', return_value=1001 + timeout):
+            assert self.api.get_course_run('course-v1:edX+DemoX+Demo_Course') == {
+                'key': 'course-v1:edX+DemoX+Demo_Course'
+            }
+            # Revalidation is not retried right away.
+            self.api.get_course_run('course-v1:edX+DemoX+Demo_Course')
+        assert self.get_data_mock.call_count == 2
+
+    def test_stale_response_revalidated(self):
+        """
+        Verify a stale response is refreshed by one caller while others keep receiving the stale response.
+        """
+        timeout = CourseCatalogApiClient.CACHE_TIMEOUTS[CourseCatalogApiClient.PROGRAM_TYPES_ENDPOINT]
+        self.get_data_mock.return_value = {'name': 'Old'}
+        with mock.patch('enterprise.api_client.discovery.time.time', return_value=1000):
+            self.api.get_program_type_by_slug('xseries')
+
+        self.get_data_mock.return_value = {'name': 'New'}
+        with mock.patch('enterprise.api_client.discovery.time.time', return_value=1001 + timeout):
+            with mock.patch('enterprise.api_client.discovery.cache.add', return_value=False):
+                assert self.api.get_program_type_by_slug('xseries') == {'name': 'Old'}
+            assert self.get_data_mock.call_count == 1
+            assert self.api.get_program_type_by_slug('xseries') == {'name': 'New'}
+            assert self.api.get_program_type_by_slug('xseries') == {'name': 'New'}
+        assert self.get_data_mock.call_count == 2
+
+    def test_cache_miss_keeps_revalidation_lock(self):
+        """
+        Verify a caller fetching an uncached response leaves alone the revalidation lock held by another caller.
+        """
+        cache_key = self.api._get_cache_key(  # pylint: disable=protected-access
+            CourseCatalogApiClient.COURSES_ENDPOINT, resource_id='edX+DemoX', many=False
+        )
+        lock_key = '{}__revalidate'.format(cache_key)
+        cache.add(lock_key, True)
+        self.get_data_mock.return_value = {'key': 'edX+DemoX'}
+
+        assert self.api.get_course_details('edX+DemoX') == {'key': 'edX+DemoX'}
+        assert cache.get(lock_key) is True
+
+    def test_cache_key_independent_of_kwargs_order(self):
+        """
+        Verify the cache key of a lookup does not depend on the order of its keyword arguments or querystring.
+        """
+        cache_key = self.api._get_cache_key(  # pylint: disable=protected-access
+            CourseCatalogApiClient.COURSES_ENDPOINT,
+            resource_id='edX+DemoX',
+            querystring=collections.OrderedDict([('a', 1), ('b', 2)]),
+            many=False,
+        )
+        assert cache_key == self.api._get_cache_key(  # pylint: disable=protected-access
+            CourseCatalogApiClient.COURSES_ENDPOINT,
+            many=False,
+            querystring=collections.OrderedDict([('b', 2), ('a', 1)]),
+            resource_id='edX+DemoX',
+        )
+        assert cache_key != self.api._get_cache_key(  # pylint: disable=protected-access
+            CourseCatalogApiClient.COURSES_ENDPOINT, resource_id='edX+OtherX', many=False
+        )
+
+    def test_get_courses_and_course_runs(self):
+        """
+        Verify get_courses_and_course_runs fetches the uncached courses in one request, and looks up the courses
+        missing from its response on their own.
+        """
+        cached_course = {'key': 'edX+CachedX', 'course_runs': [{'key': 'course-v1:edX+CachedX+1T2017'}]}
+        listed_course = {'key': 'edX+ListedX', 'course_runs': [{'key': 'course-v1:edX+ListedX+1T2017'}]}
+        unlisted_course = {'key': 'edX+UnlistedX', 'course_runs': [{'key': 'course-v1:edX+UnlistedX+1T2017'}]}
+        self.get_data_mock.return_value = cached_course
+        self.api.get_course_details('edX+CachedX')
+
+        self.get_data_mock.reset_mock()
+        self.get_data_mock.side_effect = [[listed_course], unlisted_course, {}]
+        results = self.api.get_courses_and_course_runs([
+            'course-v1:edX+CachedX+1T2017',
+            'course-v1:edX+ListedX+1T2017',
+            'course-v1:edX+ListedX+2T2017',
+            'course-v1:edX+UnlistedX+1T2017',
+            'course-v1:edX+MissingX+1T2017',
+        ])
+
+        assert results == {
+            'course-v1:edX+CachedX+1T2017': (cached_course, cached_course['course_runs'][0]),
+            'course-v1:edX+ListedX+1T2017': (listed_course, listed_course['course_runs'][0]),
+            'course-v1:edX+ListedX+2T2017': (listed_course, None),
+            'course-v1:edX+UnlistedX+1T2017': (unlisted_course, unlisted_course['course_runs'][0]),
+            'course-v1:edX+MissingX+1T2017': (None, None),
+        }
+        assert self.get_data_mock.call_count == 3
+        batch_call = self.get_data_mock.call_args_list[0]
+        assert batch_call[1]['resource'] == CourseCatalogApiClient.COURSES_ENDPOINT
+        assert batch_call[1]['querystring'] == {'keys': 'edX+ListedX,edX+MissingX,edX+UnlistedX'}
+
+        # The courses retrieved in the batch request are cached like any other course.
+        self.get_data_mock.reset_mock()
+        assert self.api.get_course_details('edX+ListedX') == listed_course
+        assert self.get_data_mock.call_count == 0
+
+    def test_get_courses_and_course_runs_deadline(self):
+        """
+        Verify get_courses_and_course_runs stops looking up courses on their own once its deadline has passed.
+        """
+        self.get_data_mock.return_value = []
+        times = iter([1000, 1000])
+        with mock.patch('enterprise.api_client.discovery.time.time', side_effect=lambda: next(times, 1011)):
+            results = self.api.get_courses_and_course_runs(['course-v1:edX+DemoX+1T2017'], deadline=10)
+        assert results == {'course-v1:edX+DemoX+1T2017': (None, None)}
+        assert self.get_data_mock.call_count == 1
+
 
 class TestCourseCatalogApiServiceClientInitialization(unittest.TestCase):
     """
@@ -584,6 +748,7 @@ class TestCourseCatalogApiService(CourseDiscoveryApiTestMixin, unittest.TestCase
         Set up mocks for the test suite.
         """
         super(TestCourseCatalogApiService, self).setUp()
+        cache.clear()
         self.user_mock = mock.Mock(spec=User)
         self.get_data_mock = self._make_patch(self._make_catalog_api_location("get_edx_api_data"))
         self.jwt_builder_mock = self._make_patch(self._make_catalog_api_location("JwtBuilder"))
@@ -10,8 +10,11 @@ import unittest
 import ddt
 import mock
 from pytest import mark, raises
+from requests.exceptions import Timeout
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
 
 from enterprise.api_client.ecommerce import EcommerceApiClient
 from enterprise.utils import NotConnectedToOpenEdX
@@ -39,6 +42,8 @@ class TestEcommerceApiClient(unittest.TestCase):
     def setUp(self):
         super(TestEcommerceApiClient, self).setUp()
         self.user = factories.UserFactory()
+        cache.clear()
+        self.addCleanup(cache.clear)
 
     def _setup_ecommerce_api_client(self, client_mock, method_name, return_value):
         """
@@ -66,3 +71,57 @@ class TestEcommerceApiClient(unittest.TestCase):
             }
         )
         assert EcommerceApiClient(self.user).get_course_final_price(mode) == '$100'
+
+    @staticmethod
+    def _make_mode(sku, min_price=200, original_price=500):
+        """
+        Build a course mode with the given SKU and prices.
+        """
+        return {'sku': sku, 'min_price': min_price, 'original_price': original_price}
+
+    @mock.patch('enterprise.api_client.ecommerce.ecommerce_api_client')
+    def test_get_course_final_prices(self, ecommerce_api_client_mock):
+        prices = {'verified-sku': 100, 'professional-sku': 200}
+        calculate_mock = ecommerce_api_client_mock.return_value.baskets.calculate.get
+        calculate_mock.side_effect = lambda sku: {'total_incl_tax': prices[sku[0]]}
+        modes = [self._make_mode('verified-sku'), self._make_mode('professional-sku')]
+
+        expected = {'verified-sku': '$100', 'professional-sku': 500}
+        client = EcommerceApiClient(self.user)
+        assert client.get_course_final_prices(modes, entitlement_ids=[1]) == expected
+        assert sorted(call[1]['sku'] for call in calculate_mock.call_args_list) == [
+            ['professional-sku'], ['verified-sku']
+        ]
+
+        # The prices are cached for the user and entitlements.
+        calculate_mock.reset_mock()
+        assert client.get_course_final_prices(modes, entitlement_ids=[1]) == expected
+        assert calculate_mock.call_count == 0
+
+        # A change to the entitlements invalidates the cached prices.
+        assert client.get_course_final_prices(modes, entitlement_ids=[1, 2]) == expected
+        assert calculate_mock.call_count == 2
+
+    @mock.patch('enterprise.api_client.ecommerce.ecommerce_api_client')
+    def test_get_course_final_prices_error(self, ecommerce_api_client_mock):
+        calculate_mock = ecommerce_api_client_mock.return_value.baskets.calculate.get
+        calculate_mock.side_effect = Timeout
+        modes = [self._make_mode('verified-sku')]
+
+        client = EcommerceApiClient(self.user)
+        assert client.get_course_final_prices(modes) == {'verified-sku': 500}
+        # Failed price calculations are not cached.
+        assert client.get_course_final_prices(modes) == {'verified-sku': 500}
+        assert calculate_mock.call_count == 2
+
+    @override_settings(ENTERPRISE_ECOMMERCE_PRICE_CACHE_TIMEOUT=0)
+    @mock.patch('enterprise.api_client.ecommerce.ecommerce_api_client')
+    def test_get_course_final_prices_cache_timeout(self, ecommerce_api_client_mock):
+        calculate_mock = ecommerce_api_client_mock.return_value.baskets.calculate.get
+        calculate_mock.return_value = {'total_incl_tax': 100}
+        modes = [self._make_mode('verified-sku')]
+
+        client = EcommerceApiClient(self.user)
+        assert client.get_course_final_prices(modes) == {'verified-sku': '$100'}
+        assert client.get_course_final_prices(modes) == {'verified-sku': '$100'}
+        assert calculate_mock.call_count == 2
@@ -182,6 +182,73 @@ class TestEnterpriseApiClient(unittest.TestCase, EnterpriseMockMixin, CourseDisc
         course_runs = client.get_enterprise_course_runs(self.enterprise_customer)
         assert len(course_runs) == 4
 
+    @responses.activate
+    @mock.patch('enterprise.api_client.lms.JwtBuilder', mock.Mock())
+    def test_iter_enterprise_course_runs(self):
+        """
+        Verify that the client method `iter_enterprise_course_runs` requests each page as it is consumed.
+        """
+        EnterpriseCustomerCatalogFactory(
+            enterprise_customer=self.enterprise_customer,
+        )
+        uuid = str(self.enterprise_customer.uuid)
+        course_run_ids = ['course-v1:edX+DemoX+Demo_Course_1', 'course-v1:edX+DemoX+Demo_Course_2']
+        self.mock_ent_courses_api_with_pagination(
+            enterprise_uuid=uuid,
+            course_run_ids=course_run_ids
+        )
+
+        # The first course run is in both catalogs.
+        # pylint: disable=invalid-name
+        enterprise_catalog_course_run_ids = ['course-v1:edX+DemoX+Demo_Course_1', 'course-v1:edX+DemoX+Demo_Course_3']
+        enterprise_catalog_uuid = str(self.enterprise_customer.enterprise_customer_catalogs.first().uuid)
+        self.mock_enterprise_customer_catalogs(
+            uuid, enterprise_catalog_uuid, enterprise_catalog_course_run_ids
+        )
+
+        client = enterprise_api.EnterpriseApiClient(self.user)
+        course_runs = client.iter_enterprise_course_runs(self.enterprise_customer)
+        self._assert_num_requests(0)
+        assert next(course_runs)['key'] == course_run_ids[0]
+        self._assert_num_requests(1)
+        assert next(course_runs)['key'] == course_run_ids[1]
+        self._assert_num_requests(2)
+        assert [course_run['key'] for course_run in course_runs] == enterprise_catalog_course_run_ids[1:]
+        self._assert_num_requests(3)
+
+        # The responses are not cached.
+        assert cache.get(get_cache_key(
+            resource='enterprise-customer',
+            querystring={},
+            traverse_pagination=True,
+            resource_id=uuid,
+        )) is None
+
+    @responses.activate
+    @mock.patch('enterprise.api_client.lms.JwtBuilder')
+    def test_iter_enterprise_course_runs_refreshes_token(self, mock_jwt_builder):
+        """
+        Verify that the client method `iter_enterprise_course_runs` refreshes the JWT when it expires between pages.
+        """
+        self.enterprise_customer.enterprise_customer_catalogs.all().delete()
+        uuid = str(self.enterprise_customer.uuid)
+        course_run_ids = ['course-v1:edX+DemoX+Demo_Course_1', 'course-v1:edX+DemoX+Demo_Course_2']
+        self.mock_ent_courses_api_with_pagination(
+            enterprise_uuid=uuid,
+            course_run_ids=course_run_ids
+        )
+        mock_jwt_builder.return_value.build_token.side_effect = ['first-token', 'second-token']
+
+        client = enterprise_api.EnterpriseApiClient(self.user)
+        course_runs = client.iter_enterprise_course_runs(self.enterprise_customer)
+        assert next(course_runs)['key'] == course_run_ids[0]
+        client.expires_at = 0
+        assert [course_run['key'] for course_run in course_runs] == course_run_ids[1:]
+
+        assert [call.request.headers['Authorization'] for call in responses.calls] == [
+            'JWT first-token', 'JWT second-token',
+        ]
+
     @responses.activate
     @mock.patch('enterprise.api_client.lms.JwtBuilder', mock.Mock())
     def test_get_enterprise_course_runs_with_enterprise_catalog_set_to_none(self):
@@ -14,9 +14,12 @@ from pytest import raises
 from slumber.exceptions import HttpNotFoundError
 
 from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
 
 from enterprise.api_client import lms as lms_api
 from enterprise.utils import NotConnectedToOpenEdX
+from six.moves.urllib.parse import parse_qs, urlparse  # pylint: disable=import-error,wrong-import-order
 
 URL_BASE_NAMES = {
     'enrollment': lms_api.EnrollmentApiClient,
@@ -264,6 +267,102 @@ def test_get_course_enrollment_not_found():
     assert actual_response is None
 
 
+@responses.activate
+@override_settings(ENTERPRISE_ENROLLMENT_API_CONCURRENCY=12)
+def test_enroll_users_in_course():
+    course_id = "course-v1:edX+DemoX+Demo_Course"
+    usernames = ["user_{}".format(index) for index in range(15)]
+
+    def enroll(request):
+        """
+        Fail to enroll one of the users.
+        """
+        payload = json.loads(request.body)
+        headers = {"Content-Type": "application/json"}
+        if payload["user"] == "user_2":
+            return 400, headers, json.dumps({"message": "Enrollment closed"})
+        return 200, headers, json.dumps(dict(payload, is_active=True))
+
+    responses.add_callback(responses.POST, _url("enrollment", "enrollment"), callback=enroll)
+    client = lms_api.EnrollmentApiClient()
+    enrolled, failed = client.enroll_users_in_course(usernames, course_id, "audit")
+
+    assert sorted(enrolled) == sorted(username for username in usernames if username != "user_2")
+    assert enrolled["user_0"]["course_details"] == {"course_id": course_id}
+    assert list(failed) == ["user_2"]
+    assert json.loads(failed["user_2"].content.decode()) == {"message": "Enrollment closed"}
+    assert len(responses.calls) == 15
+    # The connection pool of the session is sized to the number of concurrent enrollments.
+    assert client.session.get_adapter(client.API_BASE_URL)._pool_maxsize == 12  # pylint: disable=protected-access
+    assert client.enroll_users_in_course([], course_id, "audit") == ({}, {})
+
+
+@responses.activate
+def test_get_course_enrollments():
+    course_id = "course-v1:edX+DemoX+Demo_Course"
+    usernames = ["user_{}".format(index) for index in range(3)]
+    enrollments = [
+        {"user": username, "course_id": course_id, "mode": "audit", "is_active": True} for username in usernames[:2]
+    ]
+    url = _url("enrollment", "enrollments")
+    responses.add(
+        responses.GET,
+        url,
+        json={"next": url + "?cursor=next", "previous": None, "results": enrollments[:1]},
+        match_querystring=False,
+    )
+    responses.add(
+        responses.GET,
+        url,
+        json={"next": None, "previous": None, "results": enrollments[1:]},
+        match_querystring=False,
+    )
+    responses.add(
+        responses.GET,
+        url,
+        json={"next": None, "previous": None, "results": []},
+        match_querystring=False,
+    )
+    client = lms_api.EnrollmentApiClient()
+    with mock.patch.object(client, "USERNAMES_PER_REQUEST", 2):
+        actual_enrollments = client.get_course_enrollments(usernames, course_id)
+
+    assert actual_enrollments == {enrollment["user"]: enrollment for enrollment in enrollments}
+    queries = [parse_qs(urlparse(call.request.url).query) for call in responses.calls]
+    assert queries == [
+        {"course_id": [course_id], "username": ["user_0,user_1"]},
+        {"cursor": ["next"]},
+        {"course_id": [course_id], "username": ["user_2"]},
+    ]
+
+
+@responses.activate
+def test_get_course_enrollments_fallback():
+    course_id = "course-v1:edX+DemoX+Demo_Course"
+    usernames = ["user_{}".format(index) for index in range(3)]
+    responses.add(responses.GET, _url("enrollment", "enrollments"), status=403, match_querystring=False)
+    for username in usernames[:2]:
+        responses.add(
+            responses.GET,
+            _url("enrollment", "enrollment/{username},{course_id}".format(username=username, course_id=course_id)),
+            json={"user": username, "is_active": True},
+        )
+    responses.add(
+        responses.GET,
+        _url("enrollment", "enrollment/{username},{course_id}".format(username=usernames[2], course_id=course_id)),
+        body="",
+    )
+    client = lms_api.EnrollmentApiClient()
+    with mock.patch.object(client, "USERNAMES_PER_REQUEST", 2):
+        actual_enrollments = client.get_course_enrollments(usernames, course_id)
+
+    assert actual_enrollments == {username: {"user": username, "is_active": True} for username in usernames[:2]}
+    # The enrollments list endpoint is not called again once it failed.
+    list_calls = [call for call in responses.calls if "/enrollments" in call.request.url]
+    assert len(list_calls) == 1
+    assert len(responses.calls) == 4
+
+
 @responses.activate
 def test_is_enrolled_false():
     user = "some_user"
@@ -427,6 +526,73 @@ def test_get_remote_id():
     assert actual_response == "LukeIamYrFather"
 
 
+@responses.activate
+@mock.patch.object(lms_api.ThirdPartyAuthApiClient, 'REMOTE_ID_BATCH_SIZE', 2)
+def test_get_remote_ids():
+    cache.clear()
+    provider_id = "DeathStar"
+    remote_ids = {"Darth": "Vader", "Luke": "Skywalker", "Leia": "Organa"}
+    requested_usernames = []
+
+    def users_callback(request):
+        """
+        Return the remote IDs of the requested usernames, one per page.
+        """
+        query = parse_qs(urlparse(request.url).query)
+        usernames = query['username']
+        page = int(query.get('page', ['1'])[0])
+        if page == 1:
+            requested_usernames.append(sorted(usernames))
+        username = usernames[page - 1]
+        response = {
+            "results": [{"username": username, "remote_id": remote_ids[username]}] if username in remote_ids else [],
+            "next": None,
+        }
+        if page < len(usernames):
+            response["next"] = request.url + "&page={}".format(page + 1)
+        return 200, {}, json.dumps(response)
+
+    responses.add_callback(
+        responses.GET,
+        _url("third_party_auth", "providers/{provider}/users".format(provider=provider_id)),
+        callback=users_callback,
+        content_type='application/json',
+    )
+    client = lms_api.ThirdPartyAuthApiClient()
+    usernames = ["Darth", "Luke", "Leia", "Han"]
+
+    assert client.get_remote_ids(provider_id, usernames) == dict(remote_ids, Han=None)
+    assert sorted(username for batch in requested_usernames for username in batch) == sorted(usernames)
+    assert [len(batch) for batch in requested_usernames] == [2, 2]
+
+    # Found remote IDs are cached; missing ones are looked up again.
+    del requested_usernames[:]
+    assert client.get_remote_ids(provider_id, usernames) == dict(remote_ids, Han=None)
+    assert client.get_remote_id(provider_id, "Luke") == "Skywalker"
+    assert requested_usernames == [["Han"]]
+    cache.clear()
+
+
+@responses.activate
+@override_settings(ENTERPRISE_REMOTE_ID_CACHE_TIMEOUT=0)
+def test_get_remote_id_cache_timeout():
+    cache.clear()
+    username = "Darth"
+    provider_id = "DeathStar"
+    responses.add(
+        responses.GET,
+        _url("third_party_auth", "providers/{provider}/users?username={user}".format(
+            provider=provider_id, user=username
+        )),
+        match_querystring=True,
+        json={"results": [{"username": "Darth", "remote_id": "Vader"}]},
+    )
+    client = lms_api.ThirdPartyAuthApiClient()
+    assert client.get_remote_id(provider_id, username) == "Vader"
+    assert client.get_remote_id(provider_id, username) == "Vader"
+    assert len(responses.calls) == 2
+
+
 def test_jwt_lms_api_client_locally_raises():
     with raises(NotConnectedToOpenEdX):
         client = lms_api.JwtLmsApiClient('user-goes-here')
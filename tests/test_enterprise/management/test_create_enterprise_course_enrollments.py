@@ -107,9 +107,11 @@ class CreateEnterpriseCourseEnrollmentCommandTests(TestCase):
             'name': 'edX Demo Course',
         }
         enrollment_api_client = enrollment_api_client_mock.return_value
-        enrollment_api_client.get_course_enrollment.return_value = {
-            'user': 'john_doe',
-            'is_active': True,
+        enrollment_api_client.get_course_enrollments.return_value = {
+            self.user.username: {
+                'user': self.user.username,
+                'is_active': True,
+            },
         }
         call_command(
             self.command,
@@ -118,6 +120,8 @@ class CreateEnterpriseCourseEnrollmentCommandTests(TestCase):
             commit=False,
         )
 
+        enrollment_api_client.get_course_enrollments.assert_called_once_with([self.user.username], course_id)
+
         expected_enrolled_users_count = 1
         expected_ent_cour_enroll_count = 1
         expected_command_log_message = 'Created {created} missing EnterpriseCourseEnrollments ' \
@@ -147,7 +151,7 @@ class CreateEnterpriseCourseEnrollmentCommandTests(TestCase):
             'name': 'edX Demo Course',
         }
         enrollment_api_client = enrollment_api_client_mock.return_value
-        enrollment_api_client.get_course_enrollment.return_value = None
+        enrollment_api_client.get_course_enrollments.return_value = {}
         call_command(
             self.command,
             enterprise_uuid=self.enterprise_customer.uuid,
@@ -184,9 +188,11 @@ class CreateEnterpriseCourseEnrollmentCommandTests(TestCase):
             'name': 'edX Demo Course',
         }
         enrollment_api_client = enrollment_api_client_mock.return_value
-        enrollment_api_client.get_course_enrollment.return_value = {
-            'user': 'john_doe',
-            'is_active': True,
+        enrollment_api_client.get_course_enrollments.return_value = {
+            self.user.username: {
+                'user': self.user.username,
+                'is_active': True,
+            },
         }
         EnterpriseCourseEnrollmentFactory(
             course_id=course_id,
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the django management command `process_bulk_enrollment_jobs`.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import mock
+from pytest import mark
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from enterprise.models import BulkEnrollmentJob, BulkEnrollmentJobLearner
+from test_utils import fake_enrollment_api
+from test_utils.factories import EnterpriseCustomerFactory, UserFactory
+
+
+@mark.django_db
+@mock.patch('enterprise.admin.jobs.EnrollmentApiClient')
+class ProcessBulkEnrollmentJobsCommandTests(TestCase):
+    """
+    Test command `process_bulk_enrollment_jobs`.
+    """
+    command = 'process_bulk_enrollment_jobs'
+
+    def setUp(self):
+        self.enterprise_customer = EnterpriseCustomerFactory()
+        self.jobs = [
+            BulkEnrollmentJob.objects.create(
+                enterprise_customer=self.enterprise_customer,
+                course_id='course-v1:edX+DemoX+Demo_Course',
+                course_mode='audit',
+                notify=False,
+            ) for __ in range(2)
+        ]
+        for job in self.jobs:
+            BulkEnrollmentJobLearner.objects.create(job=job, user_email=UserFactory().email)
+        super(ProcessBulkEnrollmentJobsCommandTests, self).setUp()
+
+    def test_run_all_jobs(self, mock_enrollment_api_class):
+        enrollment_api_client = mock_enrollment_api_class.return_value
+        enrollment_api_client.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(
+            enrollment_api_client
+        )
+        call_command(self.command, '--once', '--workers', '2')
+
+        assert set(BulkEnrollmentJob.objects.values_list('status', flat=True)) == {BulkEnrollmentJob.COMPLETED}
+        assert mock_enrollment_api_class.return_value.enroll_user_in_course.call_count == 2
+
+    @mock.patch('enterprise.management.commands.process_bulk_enrollment_jobs.time.sleep')
+    def test_failed_job_is_left_running(self, mock_sleep, mock_enrollment_api_class):
+        enrollment_api_client = mock.Mock()
+        enrollment_api_client.enroll_users_in_course.side_effect = fake_enrollment_api.enroll_users_in_course(
+            enrollment_api_client
+        )
+        mock_enrollment_api_class.side_effect = [Exception('LMS is down'), enrollment_api_client]
+        mock_sleep.side_effect = [None, KeyboardInterrupt]
+
+        with self.assertRaises(KeyboardInterrupt):
+            call_command(self.command, '--workers', '1')
+
+        # The command waits after the failure, runs the other job, and then waits for new jobs; the failed job
+        # is left running, to be resumed once its heartbeat is stale.
+        assert sorted(BulkEnrollmentJob.objects.values_list('status', flat=True)) == [
+            BulkEnrollmentJob.COMPLETED, BulkEnrollmentJob.RUNNING,
+        ]
+        assert mock_sleep.call_count == 2
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the django management command `refresh_catalog_content_index`.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import mock
+from pytest import mark
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from enterprise.models import EnterpriseCustomerCatalog
+from test_utils import fake_catalog_api
+from test_utils.factories import EnterpriseCustomerCatalogFactory, EnterpriseCustomerFactory
+
+
+@mark.django_db
+@mock.patch('enterprise.models.CourseCatalogApiServiceClient')
+class RefreshCatalogContentIndexCommandTests(TestCase):
+    """
+    Test command `refresh_catalog_content_index`.
+    """
+    command = 'refresh_catalog_content_index'
+
+    def setUp(self):
+        self.catalog = EnterpriseCustomerCatalogFactory()
+        self.other_catalog = EnterpriseCustomerCatalogFactory()
+        self.inactive_catalog = EnterpriseCustomerCatalogFactory(
+            enterprise_customer=EnterpriseCustomerFactory(active=False)
+        )
+        super(RefreshCatalogContentIndexCommandTests, self).setUp()
+
+    def _get_indexed_catalog_uuids(self):
+        """
+        Return the UUIDs of the catalogs which have a content index.
+        """
+        return set(
+            EnterpriseCustomerCatalog.objects.filter(content_indexed_at__isnull=False).values_list('uuid', flat=True)
+        )
+
+    def test_refresh_all_catalogs(self, mock_catalog_api_class):
+        """
+        Test the content index of all catalogs of active enterprise customers is refreshed.
+        """
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+        ]
+        call_command(self.command)
+        assert self._get_indexed_catalog_uuids() == {self.catalog.uuid, self.other_catalog.uuid}
+
+    def test_refresh_single_catalog(self, mock_catalog_api_class):
+        """
+        Test only the requested catalog is refreshed.
+        """
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+        ]
+        call_command(self.command, catalog_uuid=str(self.other_catalog.uuid))
+        assert self._get_indexed_catalog_uuids() == {self.other_catalog.uuid}
+
+    def test_refresh_enterprise_customer_catalogs(self, mock_catalog_api_class):
+        """
+        Test only the catalogs of the requested enterprise customer are refreshed.
+        """
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+        ]
+        call_command(self.command, enterprise_uuid=str(self.catalog.enterprise_customer.uuid))
+        assert self._get_indexed_catalog_uuids() == {self.catalog.uuid}
+
+    @mock.patch('enterprise.management.commands.refresh_catalog_content_index.LOGGER')
+    def test_refresh_failure(self, logger_mock, mock_catalog_api_class):
+        """
+        Test a failure refreshing one catalog is logged and does not stop the command.
+        """
+        mock_catalog_api_class.return_value.get_search_results.side_effect = [
+            Exception('Discovery is down'),
+            [fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT],
+        ]
+        call_command(self.command)
+        assert len(self._get_indexed_catalog_uuids()) == 1
+        logger_mock.exception.assert_called_once()
@@ -14,6 +14,7 @@ from slumber.exceptions import HttpClientError
 
 from django.conf import settings
 from django.contrib.messages import constants as messages
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.core.urlresolvers import reverse
 from django.http import QueryDict
@@ -64,6 +65,8 @@ class TestCourseEnrollmentView(MessagesMixin, TestCase):
         ]
         self.faker = FakerFactory.create()
         self.provider_id = self.faker.slug()  # pylint: disable=no-member
+        # Final prices are cached per user, and user IDs are reused across tests.
+        cache.clear()
         super(TestCourseEnrollmentView, self).setUp()
 
     def _login(self):
@@ -29,7 +29,12 @@ from test_utils.factories import (
     EnterpriseCustomerUserFactory,
     UserFactory,
 )
-from test_utils.fake_catalog_api import FAKE_PROGRAM_RESPONSE3, setup_course_catalog_api_client_mock
+from test_utils.fake_catalog_api import (
+    FAKE_COURSE,
+    FAKE_COURSE_RUN,
+    FAKE_PROGRAM_RESPONSE3,
+    setup_course_catalog_api_client_mock,
+)
 from test_utils.mixins import MessagesMixin
 
 
@@ -965,22 +970,32 @@ class TestProgramEnrollmentView(MessagesMixin, TestCase):
             fetch_redirect_response=False
         )
 
-    @mock.patch('enterprise.views.CourseCatalogApiServiceClient')
-    def test_extend_course_discovery_error(self, course_catalog_api_client_mock):
+    def test_extend_courses_partial_failure(self):
         """
-        We raise a 404 when there are Discovery API-related errors in the ``extend_course`` function.
+        Courses whose details the Discovery API does not return get placeholder details in ``extend_courses``.
         """
-        course_catalog_api_client_mock.side_effect = ImproperlyConfigured
-        with self.assertRaises(Http404):
-            ProgramEnrollmentView.extend_course({}, EnterpriseCustomerFactory())
+        catalog_api_client = mock.Mock()
+        course_run_ids = [course['course_runs'][0]['key'] for course in self.dummy_program['courses']]
+        catalog_api_client.get_courses_and_course_runs.return_value = {
+            course_run_ids[0]: (FAKE_COURSE, FAKE_COURSE_RUN),
+            course_run_ids[1]: (None, None),
+        }
+        courses = copy.deepcopy(self.dummy_program['courses'])
 
-    @mock.patch('enterprise.views.CourseCatalogApiServiceClient')
-    def test_extend_course_no_course_details_returned_from_discovery(self, course_catalog_api_client_mock):
+        ProgramEnrollmentView.extend_courses(courses, catalog_api_client)
+
+        catalog_api_client.get_courses_and_course_runs.assert_called_once_with(course_run_ids)
+        assert courses[0]['course_title'] == 'edX Demonstration Course'
+        assert courses[0]['weeks_to_complete']
+        assert courses[1]['course_title'] == self.dummy_program['courses'][1]['title']
+        assert courses[1]['course_effort'] == ''
+        assert courses[1]['staff'] == []
+
+    def test_extend_courses_failure(self):
         """
-        We raise a 404 when the Discovery API returns no course details in ``extend_course``.
+        We raise a 404 when the Discovery API returns the details of none of the courses in ``extend_courses``.
         """
-        course_catalog_api_client_mock.return_value.get_course_and_course_run.return_value = None, None
+        catalog_api_client = mock.Mock()
+        catalog_api_client.get_courses_and_course_runs.return_value = {}
         with self.assertRaises(Http404):
-            ProgramEnrollmentView.extend_course(
-                {'course_runs': [{'key': 'edX+DemoX+2017'}]},
-                EnterpriseCustomerFactory())
+            ProgramEnrollmentView.extend_courses(copy.deepcopy(self.dummy_program['courses']), catalog_api_client)
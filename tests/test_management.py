@@ -4,8 +4,15 @@ Test the Enterprise management commands and related functions.
 """
 from __future__ import absolute_import, unicode_literals, with_statement
 
+import gzip
+import json
 import logging
+import os
+import shutil
+import tempfile
+import time
 import unittest
+import uuid
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 
@@ -14,7 +21,12 @@ import responses
 from faker import Factory as FakerFactory
 from freezegun import freeze_time
 from integrated_channels.integrated_channel.learner_data import BaseLearnerExporter
-from integrated_channels.sap_success_factors.models import SAPSuccessFactorsEnterpriseCustomerConfiguration
+from integrated_channels.integrated_channel.management.commands import ChannelJob, ParallelChannelRunner
+from integrated_channels.sap_success_factors.models import (
+    CatalogTransmissionAudit,
+    LearnerDataTransmissionAudit,
+    SAPSuccessFactorsEnterpriseCustomerConfiguration,
+)
 from pytest import mark, raises
 from requests.compat import urljoin
 from testfixtures import LogCapture
@@ -151,6 +163,7 @@ class TestTransmitCoursewareDataManagementCommand(unittest.TestCase, EnterpriseM
         expected_messages = [
             'Processing courses for integrated channel using configuration: '
             '<SAPSuccessFactorsEnterpriseCustomerConfiguration for Enterprise Veridian Dynamics>',
+            'Retrieving course list for enterprise {}'.format(self.enterprise_customer.name),
             'Transmission of course metadata failed for user "C-3PO" and for integrated channel with '
             'code "SAP" and id "1".',
             'Processing courses for integrated channel using configuration: '
@@ -159,13 +172,16 @@ class TestTransmitCoursewareDataManagementCommand(unittest.TestCase, EnterpriseM
             'Processing course with ID {}'.format(course_run_id_for_success),
             'Sending course with plugin configuration <SAPSuccessFactorsEnterprise'
             'CustomerConfiguration for Enterprise Dummy Enterprise>',
-            expected_dump,
+            'Skipping 0 courses unchanged since they were last sent with plugin configuration '
+            '<SAPSuccessFactorsEnterpriseCustomerConfiguration for Enterprise Dummy Enterprise>',
+            'Sent 1 of 1 courses to SAP SuccessFactors for Enterprise Customer Dummy Enterprise',
         ]
 
         with LogCapture(level=logging.INFO) as log_capture:
             call_command('transmit_courseware_data', '--catalog_user', 'C-3PO')
             for index, message in enumerate(expected_messages):
                 assert message in log_capture.records[index].getMessage()
+        fake_sap_client.return_value.send_course_import.assert_called_once_with(expected_dump.encode('utf-8'))
 
     @responses.activate
     @mock.patch('enterprise.api_client.lms.JwtBuilder', mock.Mock())
@@ -225,13 +241,16 @@ class TestTransmitCoursewareDataManagementCommand(unittest.TestCase, EnterpriseM
             'Processing course with ID {}'.format(course_run_ids[1]),
             'Sending course with plugin configuration <SAPSuccessFactorsEnterprise'
             'CustomerConfiguration for Enterprise Veridian Dynamics>',
-            expected_dump,
+            'Skipping 0 courses unchanged since they were last sent with plugin configuration '
+            '<SAPSuccessFactorsEnterpriseCustomerConfiguration for Enterprise Veridian Dynamics>',
+            'Sent 2 of 2 courses to SAP SuccessFactors for Enterprise Customer Veridian Dynamics',
         ]
 
         with LogCapture(level=logging.INFO) as log_capture:
             call_command('transmit_courseware_data', '--catalog_user', 'C-3PO')
             for index, message in enumerate(expected_messages):
                 assert message in log_capture.records[index].getMessage()
+        fake_sap_client.return_value.send_course_import.assert_called_once_with(expected_dump.encode('utf-8'))
 
     @responses.activate
     def test_transmit_courseware_task_no_channel(self):
@@ -536,6 +555,9 @@ def get_expected_output(**expected_completion):
     (dict(), None, True, None, False, dict(completed='false', timestamp='null', grade='In Progress')),
     (dict(), None, True, None, True, dict(completed='true', timestamp=NOW_TIMESTAMP, grade='Pass')),
 
+    # The first incremental transmission sends everything.
+    (dict(incremental=True), None, True, None, True, dict(completed='true', timestamp=NOW_TIMESTAMP, grade='Pass')),
+
     # Self-paced course with future end date sends grade=Pass, or grade=In Progress, depending on current grade.
     (dict(), None, True, FUTURE, False, dict(completed='false', timestamp='null', grade='In Progress')),
     (dict(), None, True, FUTURE, True, dict(completed='true', timestamp=NOW_TIMESTAMP, grade='Pass')),
@@ -565,3 +587,217 @@ def test_transmit_learner_data(caplog, command_kwargs, certificate, self_paced,
 
     expected_output = get_expected_output(**expected_completion)
     assert expected_output in caplog.records[0].message
+
+
+def sleeping_task(seconds, records):
+    """
+    Channel task used by the parallel execution tests, which sleeps before returning its number of records.
+    """
+    time.sleep(seconds)
+    return records
+
+
+def failing_task():
+    """
+    Channel task used by the parallel execution tests, which always fails.
+    """
+    raise Exception('Transmission failed')
+
+
+@mark.django_db
+class TestParallelChannelRunner(unittest.TestCase):
+    """
+    Test the parallel execution of the integrated channel commands.
+    """
+    def setUp(self):
+        self.user = UserFactory(username='C-3PO')
+        self.integrated_channels = [
+            SAPSuccessFactorsEnterpriseCustomerConfiguration.objects.create(
+                enterprise_customer=EnterpriseCustomerFactory(catalog=1, name=name),
+                sapsf_base_url=sapsf_base_url,
+                key='key',
+                secret='secret',
+                active=True,
+            )
+            for name, sapsf_base_url in (
+                ('Veridian Dynamics', 'http://first.successfactors.com/'),
+                ('Initech', 'http://first.successfactors.com/'),
+                ('Globex', 'http://second.successfactors.com/'),
+            )
+        ]
+        super(TestParallelChannelRunner, self).setUp()
+
+    def test_concurrency_per_host(self):
+        runner = ParallelChannelRunner(sleeping_task, 3, max_per_host=1)
+        with LogCapture(level=logging.INFO) as log_capture:
+            jobs = runner.run([
+                (integrated_channel, (0.3, records))
+                for records, integrated_channel in enumerate(self.integrated_channels)
+            ])
+
+        assert [(job.status, job.records) for job in jobs] == [
+            (ChannelJob.SUCCEEDED, 0),
+            (ChannelJob.SUCCEEDED, 1),
+            (ChannelJob.SUCCEEDED, 2),
+        ]
+        # Only one channel transmits to the first host at once, while the channel of the second host runs along.
+        first, second, third = jobs
+        assert second.started >= first.finished
+        assert third.started < first.finished
+        messages = [record.getMessage() for record in log_capture.records]
+        assert messages[0].startswith(
+            'Integrated channel <SAPSuccessFactorsEnterpriseCustomerConfiguration for Enterprise Veridian Dynamics> '
+            'succeeded in '
+        )
+        assert messages[0].endswith('seconds, having transmitted 0 records')
+        assert messages[-1] == 'Ran 3 integrated channels: 3 succeeded, 0 failed, 0 timed out'
+
+    def test_timeout(self):
+        runner = ParallelChannelRunner(sleeping_task, 2, timeout=0.3)
+        start = time.time()
+        jobs = runner.run([(self.integrated_channels[0], (10, 1)), (self.integrated_channels[2], (0, 1))])
+
+        assert time.time() - start < 10
+        assert [(job.status, job.records) for job in jobs] == [
+            (ChannelJob.TIMED_OUT, None),
+            (ChannelJob.SUCCEEDED, 1),
+        ]
+        assert not jobs[0].process.is_alive()
+
+    def test_failure(self):
+        runner = ParallelChannelRunner(failing_task, 2)
+        with LogCapture(level=logging.INFO) as log_capture:
+            jobs = runner.run([(self.integrated_channels[0], ())])
+
+        assert [(job.status, job.records) for job in jobs] == [(ChannelJob.FAILED, None)]
+        messages = [record.getMessage() for record in log_capture.records]
+        assert messages[0].endswith('having transmitted an unknown number of records')
+        assert messages[-1] == 'Ran 1 integrated channels: 0 succeeded, 1 failed, 0 timed out'
+
+    @mock.patch(
+        'integrated_channels.integrated_channel.management.commands.transmit_courseware_data.transmit_course_data'
+    )
+    def test_transmit_courseware_data(self, mock_transmit_course_data):
+        mock_transmit_course_data.return_value = 5
+        with LogCapture(level=logging.INFO) as log_capture:
+            call_command('transmit_courseware_data', '--catalog_user', 'C-3PO', '--processes', '2')
+
+        messages = [record.getMessage() for record in log_capture.records]
+        assert len(messages) == 4
+        assert all(message.endswith('having transmitted 5 records') for message in messages[:3])
+        assert messages[-1] == 'Ran 3 integrated channels: 3 succeeded, 0 failed, 0 timed out'
+
+    @mock.patch(
+        'integrated_channels.integrated_channel.management.commands.transmit_learner_data.Command'
+        '.transmit_learner_data',
+        mock.Mock(side_effect=Exception('Transmission failed')),
+    )
+    def test_transmit_learner_data_failure(self):
+        with raises(CommandError) as excinfo:
+            call_command('transmit_learner_data', '--api_user', 'C-3PO', '--processes', '2', '--channel_timeout', '5')
+        assert str(excinfo.value) == 'Transmission failed or timed out for 3 of 3 integrated channels.'
+
+
+@mark.django_db
+class TestPruneTransmissionAudits(unittest.TestCase):
+    """
+    Test the prune_transmission_audits management command.
+    """
+    def setUp(self):
+        self.enterprise_customer_uuid = uuid.uuid4()
+        # Each enrollment's audits, from oldest to newest, and whether each was successful.
+        self.learner_data_audits = {
+            enrollment_id: [
+                self.create_learner_data_audit(enrollment_id, days, successful) for days, successful in audits
+            ]
+            for enrollment_id, audits in (
+                (1, [(400, True), (300, False), (200, True), (100, False), (10, True)]),
+                (2, [(400, False), (300, True), (200, False)]),
+                (3, [(400, False), (300, False)]),
+            )
+        }
+        self.catalog_audits = [
+            self.create_catalog_audit(days, successful)
+            for days, successful in [(400, True), (300, True), (200, False), (50, True), (10, True)]
+        ]
+        super(TestPruneTransmissionAudits, self).setUp()
+
+    @staticmethod
+    def create_learner_data_audit(enrollment_id, days, successful):
+        """
+        Create a learner data transmission audit for the enrollment, the given number of days ago.
+        """
+        with freeze_time(timezone.now() - timedelta(days=days)):
+            return LearnerDataTransmissionAudit.objects.create(
+                enterprise_course_enrollment_id=enrollment_id,
+                sapsf_user_id='sap_user',
+                course_id=COURSE_ID,
+                completed_timestamp=NOW_TIMESTAMP,
+                grade='Pass',
+                status='200' if successful else '500',
+                error_message='' if successful else 'error occurred',
+            ).id
+
+    def create_catalog_audit(self, days, successful):
+        """
+        Create a catalog transmission audit for the enterprise customer, the given number of days ago.
+        """
+        with freeze_time(timezone.now() - timedelta(days=days)):
+            return CatalogTransmissionAudit.objects.create(
+                enterprise_customer_uuid=self.enterprise_customer_uuid,
+                total_courses=1,
+                status='200' if successful else '500',
+                error_message='' if successful else 'error occurred',
+                audit_summary=json.dumps({COURSE_ID: {'status': 'ACTIVE'}}),
+            ).id
+
+    def test_prune(self):
+        with LogCapture(level=logging.INFO) as log_capture:
+            call_command('prune_transmission_audits', '--batch_size', '2')
+
+        # The audits older than 90 days are deleted, except for the latest, and latest successful, of each trail.
+        enrollment_1, enrollment_2, enrollment_3 = (self.learner_data_audits[key] for key in (1, 2, 3))
+        assert sorted(LearnerDataTransmissionAudit.objects.values_list('id', flat=True)) == sorted([
+            enrollment_1[4],
+            enrollment_2[1], enrollment_2[2],
+            enrollment_3[1],
+        ])
+        assert list(CatalogTransmissionAudit.objects.order_by('id').values_list('id', flat=True)) == \
+            self.catalog_audits[3:]
+        assert [record.getMessage().split(' created before')[0] for record in log_capture.records] == [
+            'Deleted 6 LearnerDataTransmissionAudit records',
+            'Deleted 3 CatalogTransmissionAudit records',
+        ]
+
+    def test_prune_with_retention_window(self):
+        call_command('prune_transmission_audits', '--days', '250')
+
+        assert LearnerDataTransmissionAudit.objects.count() == 6
+        assert CatalogTransmissionAudit.objects.count() == 3
+
+    def test_prune_and_compact(self):
+        call_command('prune_transmission_audits', '--days', '1000', '--compact')
+
+        # Nothing is deleted, but only the latest catalog summary is kept.
+        assert LearnerDataTransmissionAudit.objects.count() == 10
+        assert [
+            json.loads(audit_summary)
+            for audit_summary in CatalogTransmissionAudit.objects.order_by('id').values_list('audit_summary', flat=True)
+        ] == [{}] * 4 + [{COURSE_ID: {'status': 'ACTIVE'}}]
+
+    def test_prune_with_archive(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+
+        call_command('prune_transmission_audits', '--archive_dir', archive_dir)
+
+        archived = {}
+        for filename in os.listdir(archive_dir):
+            with gzip.open(os.path.join(archive_dir, filename), 'rb') as archive:
+                archived[filename.split('-')[0]] = [json.loads(line.decode('utf-8')) for line in archive]
+        assert sorted(archived) == ['catalogtransmissionaudit', 'learnerdatatransmissionaudit']
+        assert [audit['id'] for audit in archived['catalogtransmissionaudit']] == self.catalog_audits[:3]
+        assert archived['catalogtransmissionaudit'][0]['audit_summary'] == json.dumps(
+            {COURSE_ID: {'status': 'ACTIVE'}}
+        )
+        assert len(archived['learnerdatatransmissionaudit']) == 6
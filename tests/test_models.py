@@ -14,9 +14,13 @@ import ddt
 import mock
 from consent.errors import InvalidProxyConsent
 from consent.helpers import get_data_sharing_consent
-from consent.models import DataSharingConsent, ProxyDataSharingConsent
+from consent.models import DataSharingConsent, DataSharingConsentQuerySet, ProxyDataSharingConsent
 from faker import Factory as FakerFactory
-from integrated_channels.integrated_channel.models import EnterpriseCustomerPluginConfiguration
+from freezegun import freeze_time
+from integrated_channels.integrated_channel.models import (
+    EnterpriseCustomerPluginConfiguration,
+    LearnerDataExportWatermark,
+)
 from integrated_channels.sap_success_factors.models import (
     CatalogTransmissionAudit,
     LearnerDataTransmissionAudit,
@@ -30,9 +34,12 @@ from django.core.exceptions import ValidationError
 from django.core.files import File
 from django.core.files.storage import Storage
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.http import QueryDict
 from django.test import override_settings
 from django.test.testcases import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from enterprise.models import (
     EnrollmentNotificationEmailTemplate,
@@ -40,6 +47,7 @@ from enterprise.models import (
     EnterpriseCustomer,
     EnterpriseCustomerBrandingConfiguration,
     EnterpriseCustomerCatalog,
+    EnterpriseCustomerCatalogContentItem,
     EnterpriseCustomerEntitlement,
     EnterpriseCustomerReportingConfiguration,
     EnterpriseCustomerUser,
@@ -295,6 +303,46 @@ class TestEnterpriseCustomerUserManager(unittest.TestCase):
         assert actual_records.count() == 1
         assert EnterpriseCustomerUser.objects.count() == 0, "No pending link records should have been created"
 
+    @override_settings(ENTERPRISE_BULK_LINK_BATCH_SIZE=2)
+    def test_get_links_by_email(self):
+        linked_user = UserFactory(email='linked@example.com')
+        link = EnterpriseCustomerUserFactory(user_id=linked_user.id)
+        pending_link = PendingEnterpriseCustomerUserFactory(user_email='pending@example.com')
+        UserFactory(email='unlinked@example.com')
+        user_emails = ['linked@example.com', 'pending@example.com', 'unlinked@example.com', 'unknown@example.com']
+
+        with CaptureQueriesContext(connection) as queries:
+            links = EnterpriseCustomerUser.objects.get_links_by_email(user_emails)
+            assert links['linked@example.com'].enterprise_customer == link.enterprise_customer
+        assert links == {'linked@example.com': link, 'pending@example.com': pending_link}
+        # The users, links and pending links of each of the two batches of emails.
+        assert len(queries) == 6
+
+    @override_settings(ENTERPRISE_BULK_LINK_BATCH_SIZE=2)
+    def test_bulk_link_users(self):
+        enterprise_customer = EnterpriseCustomerFactory()
+        users = [UserFactory(email='user{}@example.com'.format(index)) for index in range(3)]
+        EnterpriseCustomerUserFactory(enterprise_customer=enterprise_customer, user_id=users[0].id)
+        PendingEnterpriseCustomerUserFactory(enterprise_customer=enterprise_customer, user_email='pending@example.com')
+        user_emails = [user.email for user in users] + ['pending@example.com', 'new@example.com']
+
+        with CaptureQueriesContext(connection) as queries:
+            created = EnterpriseCustomerUser.objects.bulk_link_users(enterprise_customer, user_emails)
+        assert created == 3
+        # Each batch of emails looks up its users, links and pending links, and creates the missing links.
+        assert len([query for query in queries if 'INSERT' in query['sql']]) == 3
+        assert len(queries) < 6 * 3
+
+        assert sorted(EnterpriseCustomerUser.objects.filter(
+            enterprise_customer=enterprise_customer
+        ).values_list('user_id', flat=True)) == sorted(user.id for user in users)
+        assert sorted(PendingEnterpriseCustomerUser.objects.filter(
+            enterprise_customer=enterprise_customer
+        ).values_list('user_email', flat=True)) == ['new@example.com', 'pending@example.com']
+
+        # Linking the same emails again does nothing.
+        assert EnterpriseCustomerUser.objects.bulk_link_users(enterprise_customer, user_emails) == 0
+
     @ddt.data("email1@example.com", "email2@example.com")
     def test_get_link_by_email_linked_user(self, email):
         user = UserFactory(email=email)
@@ -450,6 +498,97 @@ class TestEnterpriseCustomerUser(unittest.TestCase):
         else:
             assert mock_third_party_api.return_value.get_remote_id.call_count == 0
 
+        # The remote ID is only retrieved once.
+        assert enterprise_customer_user.get_remote_id() == expected_value
+        assert mock_third_party_api.return_value.get_remote_id.call_count == int(called)
+
+    @mock.patch('enterprise.models.ThirdPartyAuthApiClient')
+    def test_load_remote_ids(self, mock_third_party_api):
+        enterprise_customer = EnterpriseCustomerFactory()
+        EnterpriseCustomerIdentityProviderFactory(provider_id='fake-identity', enterprise_customer=enterprise_customer)
+        enterprise_customer_users = [
+            EnterpriseCustomerUserFactory(user_id=UserFactory(username=username).id,
+                                          enterprise_customer=enterprise_customer)
+            for username in ('alice', 'bob')
+        ] + [
+            # A user without an identity provider, and a missing user.
+            EnterpriseCustomerUserFactory(user_id=UserFactory(username='carol').id),
+            EnterpriseCustomerUserFactory(user_id=4242, enterprise_customer=enterprise_customer),
+        ]
+        mock_third_party_api.return_value.get_remote_ids.return_value = {'alice': 'remote-alice', 'bob': None}
+
+        EnterpriseCustomerUser.load_remote_ids(enterprise_customer_users)
+
+        mock_third_party_api.return_value.get_remote_ids.assert_called_once_with('fake-identity', mock.ANY)
+        assert sorted(mock_third_party_api.return_value.get_remote_ids.call_args[0][1]) == ['alice', 'bob']
+        with CaptureQueriesContext(connection) as queries:
+            remote_ids = [ecu.get_remote_id() for ecu in enterprise_customer_users]
+        assert remote_ids == ['remote-alice', None, None, None]
+        assert not queries
+        assert mock_third_party_api.return_value.get_remote_id.call_count == 0
+
+    def test_user_property_is_cached(self):
+        user = UserFactory(username='alice', email='alice@example.com')
+        enterprise_customer_user = EnterpriseCustomerUserFactory(user_id=user.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            assert enterprise_customer_user.user == user
+            assert enterprise_customer_user.username == 'alice'
+            assert enterprise_customer_user.user_email == 'alice@example.com'
+        assert len(queries) == 1
+
+        # The user is fetched again once the link changes.
+        other_user = UserFactory(username='bob')
+        enterprise_customer_user.user_id = other_user.id
+        assert enterprise_customer_user.username == 'bob'
+
+    def test_load_users(self):
+        enterprise_customer_users = [
+            EnterpriseCustomerUserFactory(user_id=UserFactory(username=username).id)
+            for username in ('alice', 'bob')
+        ] + [
+            # A missing user.
+            EnterpriseCustomerUserFactory(user_id=4242),
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            EnterpriseCustomerUser.load_users(enterprise_customer_users)
+        assert len(queries) == 1
+
+        with CaptureQueriesContext(connection) as queries:
+            usernames = [ecu.username for ecu in enterprise_customer_users]
+            # Users which were already fetched are not fetched again.
+            EnterpriseCustomerUser.load_users(enterprise_customer_users)
+        assert usernames == ['alice', 'bob', None]
+        assert not queries
+
+    def test_with_users(self):
+        enterprise_customer = EnterpriseCustomerFactory()
+        for username in ('alice', 'bob', 'carol'):
+            EnterpriseCustomerUserFactory(
+                user_id=UserFactory(username=username).id,
+                enterprise_customer=enterprise_customer,
+            )
+
+        queryset = EnterpriseCustomerUser.objects.filter(enterprise_customer=enterprise_customer).with_users()
+        with CaptureQueriesContext(connection) as queries:
+            usernames = [ecu.username for ecu in queryset.order_by('id')[:2]]
+            emails = [ecu.user_email for ecu in queryset.filter(user_id__isnull=False)]
+            assert queryset.count() == 3
+            user_ids = list(queryset.values_list('user_id', flat=True))
+        assert usernames == ['alice', 'bob']
+        assert len(emails) == 3
+        assert len(user_ids) == 3
+        # A query for each page of results and its users, and one for the count and the values.
+        assert len(queries) == 6
+
+        with CaptureQueriesContext(connection) as queries:
+            usernames = [ecu.username for ecu in EnterpriseCustomerUser.objects.filter(
+                enterprise_customer=enterprise_customer
+            )]
+        assert sorted(usernames) == ['alice', 'bob', 'carol']
+        assert len(queries) == 4
+
     @ddt.data(
         (
             True,
@@ -944,6 +1083,97 @@ class TestEnterpriseCustomerCatalog(unittest.TestCase):
         enrollment_url = enterprise_catalog.get_program_enrollment_url(program_uuid=program_uuid)
         assert_url(enrollment_url, expected_program_enrollment_url)
 
+    @mock.patch('enterprise.models.CourseCatalogApiServiceClient')
+    def test_refresh_content_index(self, mock_catalog_api_class):
+        """
+        Test ``refresh_content_index`` indexes enrollable course runs, courses and eligible programs.
+        """
+        unenrollable_course_run = dict(fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT, key='course-v1:edX+Old+2010')
+        unenrollable_course_run['has_enrollable_seats'] = False
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+            fake_catalog_api.FAKE_SEARCH_ALL_SHORT_COURSE_RESULT,
+            fake_catalog_api.FAKE_SEARCH_ALL_PROGRAM_RESULT_1,
+            unenrollable_course_run,
+        ]
+        catalog = EnterpriseCustomerCatalogFactory(content_filter={'partner': 'edx'})
+
+        assert catalog.refresh_content_index() == 3
+        assert catalog.has_fresh_content_index
+        assert sorted(catalog.indexed_content_items.values_list('content_type', 'content_key')) == sorted([
+            (EnterpriseCustomerCatalogContentItem.COURSE_RUN, fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT['key']),
+            (EnterpriseCustomerCatalogContentItem.COURSE, fake_catalog_api.FAKE_SEARCH_ALL_SHORT_COURSE_RESULT['key']),
+            (EnterpriseCustomerCatalogContentItem.PROGRAM, fake_catalog_api.FAKE_SEARCH_ALL_PROGRAM_RESULT_1['uuid']),
+        ])
+        mock_catalog_api_class.return_value.get_search_results.assert_called_once_with(
+            {'partner': 'edx', 'page_size': EnterpriseCustomerCatalogContentItem.DISCOVERY_PAGE_SIZE}
+        )
+
+        # Refreshing replaces the previous index.
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_PROGRAM_RESULT_1,
+        ]
+        assert catalog.refresh_content_index() == 1
+        assert catalog.indexed_content_items.count() == 1
+
+        # An empty response does not produce a usable index.
+        mock_catalog_api_class.return_value.get_search_results.return_value = []
+        assert catalog.refresh_content_index() == 0
+        assert not catalog.has_fresh_content_index
+        assert not EnterpriseCustomerCatalog.objects.get(uuid=catalog.uuid).content_indexed_at
+
+    @mock.patch('enterprise.models.CourseCatalogApiServiceClient')
+    def test_contains_content_items_uses_content_index(self, mock_catalog_api_class):
+        """
+        Test ``contains_content_items`` answers from a fresh content index without calling the discovery service.
+        """
+        catalog = EnterpriseCustomerCatalogFactory()
+        course_run_key = fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT['key']
+        program_uuid = fake_catalog_api.FAKE_SEARCH_ALL_PROGRAM_RESULT_1['uuid']
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+            fake_catalog_api.FAKE_SEARCH_ALL_SHORT_COURSE_RESULT,
+            fake_catalog_api.FAKE_SEARCH_ALL_PROGRAM_RESULT_1,
+        ]
+        catalog.refresh_content_index()
+        mock_catalog_api_class.reset_mock()
+
+        assert catalog.contains_content_items('key', [course_run_key])
+        # Like the discovery service lookup, course keys do not match the course runs of the course.
+        assert not catalog.contains_content_items('key', [course_run_key, 'edX+DemoX'])
+        assert not catalog.contains_content_items('key', [course_run_key, 'course-v1:edX+Other+2017'])
+        assert catalog.contains_content_items('uuid', [program_uuid])
+        assert not catalog.contains_content_items('uuid', [course_run_key])
+        assert not catalog.contains_content_items('key', [program_uuid])
+        mock_catalog_api_class.return_value.get_search_results.assert_not_called()
+
+        # A stale index is not used.
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+        ]
+        with override_settings(ENTERPRISE_CATALOG_CONTENT_INDEX_MAX_AGE=0):
+            assert catalog.contains_content_items('key', [course_run_key])
+        mock_catalog_api_class.return_value.get_search_results.assert_called_once()
+
+    @mock.patch('enterprise.models.CourseCatalogApiServiceClient')
+    def test_content_filter_change_drops_content_index(self, mock_catalog_api_class):
+        """
+        Test changing the content filter of a catalog stops its content index from being used.
+        """
+        mock_catalog_api_class.return_value.get_search_results.return_value = [
+            fake_catalog_api.FAKE_SEARCH_ALL_COURSE_RESULT,
+        ]
+        catalog = EnterpriseCustomerCatalogFactory()
+        catalog.refresh_content_index()
+
+        catalog.title = 'Renamed'
+        catalog.save()
+        assert catalog.has_fresh_content_index
+
+        catalog.content_filter = {'partner': 'edx'}
+        catalog.save()
+        assert not catalog.has_fresh_content_index
+
 
 @mark.django_db
 @ddt.ddt
@@ -1024,6 +1254,89 @@ class TestDataSharingConsentManager(unittest.TestCase):
         assert isinstance(same_dsc, DataSharingConsent)
         assert dsc == same_dsc
 
+    def test_get_many(self):
+        """
+        Test that ``proxied_get_many`` resolves course run and course records like ``proxied_get``, in one query.
+        """
+        enterprise_customer = EnterpriseCustomerFactory()
+        run_consent = DataSharingConsentFactory(
+            enterprise_customer=enterprise_customer,
+            username='lowly_bob',
+            course_id='course-v1:edX+DemoX+Demo_Course',
+        )
+        course_consent = DataSharingConsentFactory(
+            enterprise_customer=enterprise_customer,
+            username='lowly_bob',
+            course_id='edX+DemoX',
+        )
+        lookups = [
+            ('lowly_bob', 'course-v1:edX+DemoX+Demo_Course', enterprise_customer),
+            ('lowly_bob', 'course-v1:edX+DemoX+Demo_Course2', enterprise_customer),
+            ('lowly_bob', 'edX+DemoX', enterprise_customer),
+            ('lowly_bob', 'course-v1:edX+Other+Demo_Course', enterprise_customer),
+            ('optimistic_bob', 'course-v1:edX+DemoX+Demo_Course', enterprise_customer),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            consents = DataSharingConsent.objects.proxied_get_many(lookups)
+
+        assert len(queries) == 1
+
+        assert consents[lookups[0]] == run_consent
+        assert consents[lookups[1]] == course_consent
+        assert consents[lookups[2]] == course_consent
+        for lookup in lookups[3:]:
+            assert isinstance(consents[lookup], ProxyDataSharingConsent)
+            assert (consents[lookup].username, consents[lookup].course_id) == lookup[:2]
+            assert consents[lookup].enterprise_customer == enterprise_customer
+            assert not consents[lookup].exists
+
+    def test_get_many_in_batches(self):
+        """
+        Test that ``proxied_get_many`` fetches the records in batches of course IDs, for each enterprise customer.
+        """
+        enterprise_customer = EnterpriseCustomerFactory()
+        other_enterprise_customer = EnterpriseCustomerFactory()
+        course_ids = ['course-v1:edX+Course{}+Run'.format(index) for index in range(2)]
+        consents = {}
+        for username in ('bob', 'alice', 'eve'):
+            for course_id in course_ids:
+                consents[(username, course_id)] = DataSharingConsentFactory(
+                    enterprise_customer=enterprise_customer,
+                    username=username,
+                    course_id=course_id,
+                )
+        DataSharingConsentFactory(enterprise_customer=enterprise_customer, username='mallory', course_id=course_ids[0])
+        other_consent = DataSharingConsentFactory(
+            enterprise_customer=other_enterprise_customer,
+            username='bob',
+            course_id='edX+Course0',
+        )
+        lookups = [
+            (username, course_id, enterprise_customer) for username, course_id in consents
+        ] + [('bob', course_ids[0], other_enterprise_customer)]
+
+        with mock.patch.object(DataSharingConsentQuerySet, 'LOOKUP_BATCH_SIZE', 2):
+            with CaptureQueriesContext(connection) as queries:
+                resolved_consents = DataSharingConsent.objects.proxied_get_many(lookups)
+
+        # The 4 course and course run IDs of the first customer take 2 queries, without filtering on the 3 usernames,
+        # and the 2 of the other customer take another one.
+        assert len(queries) == 3
+        assert sum('"username" IN' in query['sql'] for query in queries) == 1
+        for (username, course_id), consent in consents.items():
+            assert resolved_consents[(username, course_id, enterprise_customer)] == consent
+        assert resolved_consents[('bob', course_ids[0], other_enterprise_customer)] == other_consent
+        assert len(resolved_consents) == len(lookups)
+
+    def test_get_many_no_lookups(self):
+        """
+        Test that ``proxied_get_many`` does not query the database when given nothing to look up.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            assert DataSharingConsent.objects.proxied_get_many([]) == {}
+
+        assert not queries
+
 
 @ddt.ddt
 class TestProxyDataSharingConsent(TransactionTestCase):
@@ -1095,6 +1408,36 @@ class TestProxyDataSharingConsent(TransactionTestCase):
                 mock.MagicMock(username='different_username', enterprise_customer='otherthing'),
             )
 
+    @mock.patch('enterprise.models.EnterpriseCustomer.catalog_contains_course', return_value=False)
+    def test_from_children_shares_lookups(self, mock_catalog_contains_course):
+        """
+        Test that the children of a ``ProxyDataSharingConsent`` look up the user and each course's catalog once.
+        """
+        enterprise_customer = self.proxy_dsc.enterprise_customer
+        UserFactory(username='lowly_bob')
+        course_ids = [
+            'course-v1:edX+DemoX+Demo_Course',
+            'course-v1:edX+OtherX+Demo_Course',
+            'course-v1:edX+DemoX+Demo_Course',
+        ]
+        children = [
+            ProxyDataSharingConsent(enterprise_customer=enterprise_customer, username='lowly_bob', course_id=course_id)
+            for course_id in course_ids
+        ]
+
+        program_consent = ProxyDataSharingConsent.from_children('fake-program-id', *children)
+        serialized = program_consent.serialize()
+
+        assert serialized['exists'] is False
+        assert serialized['consent_required'] is False
+        assert all(child.shared_lookups is program_consent.shared_lookups for child in children)
+        assert program_consent.shared_lookups.counts == {
+            'user_queries': 1,
+            'enrollment_queries': 2,
+            'catalog_lookups': 2,
+        }
+        assert sorted(call[0][0] for call in mock_catalog_contains_course.call_args_list) == sorted(course_ids[:2])
+
     @ddt.data(
         (
             'my_program_id',
@@ -1336,8 +1679,7 @@ class TestSAPSuccessFactorsEnterpriseCustomerConfiguration(unittest.TestCase):
     def test_channel_code(self):
         assert self.config.channel_code() == 'SAP'
 
-    @mock.patch(
-        'integrated_channels.sap_success_factors.transmitters.learner_data.SuccessFactorsLearnerDataTransmitter')
+    @mock.patch('integrated_channels.sap_success_factors.models.SuccessFactorsLearnerDataTransmitter')
     @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
     @mock.patch('enterprise.models.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CertificatesApiClient')
@@ -1397,6 +1739,68 @@ class TestSAPSuccessFactorsEnterpriseCustomerConfiguration(unittest.TestCase):
         self.config.transmit_learner_data('dummy-user')
         assert mock_transmitter_instance.transmit.called_with(transmission_audit)
 
+    @mock.patch(
+        'integrated_channels.sap_success_factors.models.'
+        'SAPSuccessFactorsEnterpriseCustomerConfiguration.get_learner_data_transmitter'
+    )
+    @mock.patch(
+        'integrated_channels.sap_success_factors.models.'
+        'SAPSuccessFactorsEnterpriseCustomerConfiguration.get_learner_data_exporter'
+    )
+    def test_transmit_learner_data_watermark(self, mock_get_exporter, mock_get_transmitter):
+        self.config.save()
+        mock_get_exporter.return_value.collect_learner_data.return_value = ['record']
+        first_run = datetime.datetime(2017, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        second_run = first_run + datetime.timedelta(days=1)
+
+        # Without a previous transmission, incremental transmissions export everything.
+        with freeze_time(first_run):
+            self.config.transmit_learner_data('dummy-user', incremental=True)
+        mock_get_exporter.assert_called_with('dummy-user', workers=1, since=None)
+        mock_get_transmitter.return_value.transmit.assert_called_with('record')
+
+        with freeze_time(second_run):
+            self.config.transmit_learner_data('dummy-user', workers=2, incremental=True)
+        mock_get_exporter.assert_called_with('dummy-user', workers=2, since=first_run)
+
+        # Full transmissions ignore the watermark, but still move it forward.
+        self.config.transmit_learner_data('dummy-user')
+        mock_get_exporter.assert_called_with('dummy-user', workers=1, since=None)
+        watermark = LearnerDataExportWatermark.objects.get(enterprise_customer=self.enterprise_customer)
+        assert watermark.channel_code == 'SAP'
+        assert watermark.exported_until > second_run
+
+    def test_transmit_learner_data_failure_keeps_watermark(self):
+        with mock.patch.object(self.config, 'get_learner_data_exporter') as mock_get_exporter:
+            mock_get_exporter.return_value.collect_learner_data.side_effect = ValueError('LMS API failure')
+            with raises(ValueError):
+                self.config.transmit_learner_data('dummy-user', incremental=True)
+        assert not LearnerDataExportWatermark.objects.exists()
+
+    def test_get_transmitted_enrollment_ids(self):
+        enterprise_customer_user = EnterpriseCustomerUserFactory(enterprise_customer=self.enterprise_customer)
+        other_enterprise_customer_user = EnterpriseCustomerUserFactory()
+        enrollments = [
+            EnterpriseCourseEnrollmentFactory(enterprise_customer_user=enterprise_customer_user)
+            for __ in range(3)
+        ]
+        other_enrollment = EnterpriseCourseEnrollmentFactory(enterprise_customer_user=other_enterprise_customer_user)
+        for enrollment, error_message in ((enrollments[0], ''), (enrollments[1], 'error'), (other_enrollment, '')):
+            LearnerDataTransmissionAudit.objects.create(
+                enterprise_course_enrollment_id=enrollment.id,
+                sapsf_user_id='sap_user',
+                course_id=enrollment.course_id,
+                completed_timestamp=1486755998000,
+                grade='Pass',
+                status='400' if error_message else '200',
+                error_message=error_message,
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            assert self.config.get_transmitted_enrollment_ids() == {enrollments[0].id}
+        assert len(queries) == 1
+        assert self.config.get_transmitted_enrollment_ids(successful=False) == {enrollments[1].id}
+
 
 @mark.django_db
 @ddt.ddt
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that the lookups on the tables which grow without bound are supported by indexes.
+"""
+
+from __future__ import absolute_import, unicode_literals
+
+import unittest
+import uuid
+
+from consent.models import DataSharingConsent
+from integrated_channels.sap_success_factors.models import CatalogTransmissionAudit, LearnerDataTransmissionAudit
+from pytest import mark
+
+from django.db import connection
+
+from enterprise.models import EnterpriseCourseEnrollment
+
+
+@mark.django_db
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Query plans are only checked on the SQLite test database.')
+class TestQueryPlans(unittest.TestCase):
+    """
+    Check the query plans of the hot lookups on the audit, enrollment and consent tables.
+    """
+
+    def assert_uses_indexes(self, queryset):
+        """
+        Assert that the query of the given queryset searches each of its tables through an index.
+
+        A table which is scanned, or rows which have to be sorted in a temporary b-tree, would make the query
+        slower as the table grows.
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        assert plan
+        for detail in plan:
+            assert detail.startswith('SEARCH'), plan
+            assert 'USING' in detail and 'INDEX' in detail, plan
+            assert 'TEMP B-TREE' not in detail, plan
+
+    def test_transmitted_learner_data_lookup(self):
+        self.assert_uses_indexes(
+            LearnerDataTransmissionAudit.objects.filter(enterprise_course_enrollment_id__in=[1, 2], error_message='')
+        )
+
+    def test_latest_catalog_transmission_lookup(self):
+        self.assert_uses_indexes(
+            CatalogTransmissionAudit.objects.filter(enterprise_customer_uuid=uuid.uuid4()).order_by('-created')[:1]
+        )
+
+    def test_enterprise_enrollment_lookup(self):
+        self.assert_uses_indexes(
+            EnterpriseCourseEnrollment.objects.filter(course_id='course-v1:edX+DemoX+Demo_Course')
+        )
+        self.assert_uses_indexes(
+            EnterpriseCourseEnrollment.objects.filter(
+                course_id__in=['course-v1:edX+DemoX+Demo_Course'],
+                enterprise_customer_user__user_id__in=[1, 2],
+                enterprise_customer_user__enterprise_customer=uuid.uuid4(),
+            )
+        )
+
+    def test_data_sharing_consent_lookup(self):
+        self.assert_uses_indexes(
+            DataSharingConsent.objects.filter(enterprise_customer=uuid.uuid4(), username='bob', granted=True)
+        )
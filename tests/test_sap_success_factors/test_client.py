@@ -12,7 +12,7 @@ import unittest
 import requests
 import responses
 from flaky import flaky
-from integrated_channels.sap_success_factors.client import SAPSuccessFactorsAPIClient
+from integrated_channels.sap_success_factors.client import OAUTH_ACCESS_TOKENS, SAPSuccessFactorsAPIClient
 from integrated_channels.sap_success_factors.models import (
     SAPSuccessFactorsEnterpriseCustomerConfiguration,
     SAPSuccessFactorsGlobalConfiguration,
@@ -28,6 +28,8 @@ class TestSAPSuccessFactorsAPIClient(unittest.TestCase):
     @mark.django_db
     def setUp(self):
         super(TestSAPSuccessFactorsAPIClient, self).setUp()
+        OAUTH_ACCESS_TOKENS.clear()
+        self.addCleanup(OAUTH_ACCESS_TOKENS.clear)
         self.oauth_api_path = "learning/oauth-api/rest/v1/token"
         self.completion_status_api_path = "learning/odatav4/public/admin/ocn/v1/current-user/item/learning-event"
         self.course_api_path = "learning/odatav4/public/admin/ocn/v1/OcnCourses"
@@ -246,3 +248,57 @@ class TestSAPSuccessFactorsAPIClient(unittest.TestCase):
         assert responses.calls[0].request.url == self.url_base + self.oauth_api_path  # pylint: disable=no-member
         assert responses.calls[1].request.url == self.url_base + self.oauth_api_path  # pylint: disable=no-member
         assert responses.calls[2].request.url == self.url_base + self.course_api_path  # pylint: disable=no-member
+
+    @mark.django_db
+    @responses.activate  # pylint: disable=no-member
+    def test_send_completion_status_reuses_access_tokens(self):
+        responses.add(  # pylint: disable=no-member
+            responses.POST,  # pylint: disable=no-member
+            self.url_base + self.oauth_api_path,
+            json=self.expected_token_response_body,
+            status=200
+        )
+        responses.add(  # pylint: disable=no-member
+            responses.POST,  # pylint: disable=no-member
+            self.url_base + self.completion_status_api_path,
+            json={"success": "true"},
+            status=200
+        )
+
+        sap_client = SAPSuccessFactorsAPIClient(self.enterprise_config)
+        for sap_user_id in ('user1', 'user2', 'user1'):
+            sap_client.send_completion_status(sap_user_id, json.dumps({"userID": sap_user_id}))
+        # Another client of the same configuration reuses the tokens of the first one.
+        SAPSuccessFactorsAPIClient(self.enterprise_config).send_completion_status('user2', '{}')
+
+        oauth_calls = [
+            call for call in responses.calls  # pylint: disable=no-member
+            if call.request.url == self.url_base + self.oauth_api_path
+        ]
+        # One token for the admin session, and one for each of the users.
+        assert len(oauth_calls) == 3
+        assert len(responses.calls) == 7  # pylint: disable=no-member
+
+    @mark.django_db
+    @responses.activate  # pylint: disable=no-member
+    def test_get_cached_oauth_access_token_expiration(self):
+        responses.add(  # pylint: disable=no-member
+            responses.POST,  # pylint: disable=no-member
+            self.url_base + self.oauth_api_path,
+            json={"expires_in": SAPSuccessFactorsAPIClient.ACCESS_TOKEN_EXPIRATION_MARGIN, "access_token": "old"},
+            status=200
+        )
+        responses.add(  # pylint: disable=no-member
+            responses.POST,  # pylint: disable=no-member
+            self.url_base + self.oauth_api_path,
+            json={"expires_in": self.expires_in, "access_token": "new"},
+            status=200
+        )
+        args = (self.url_base, self.client_id, self.client_secret, self.company_id, self.user_id, self.user_type)
+
+        # The first token expires too soon to be reused.
+        assert SAPSuccessFactorsAPIClient.get_cached_oauth_access_token(*args)[0] == "old"
+        assert SAPSuccessFactorsAPIClient.get_cached_oauth_access_token(*args)[0] == "new"
+        assert SAPSuccessFactorsAPIClient.get_cached_oauth_access_token(*args)[0] == "new"
+        assert len(responses.calls) == 2  # pylint: disable=no-member
+        assert list(OAUTH_ACCESS_TOKENS.values())[0][0] == "new"
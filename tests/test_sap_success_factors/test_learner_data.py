@@ -5,18 +5,25 @@ Tests for the `edx-enterprise` learner_data export classes.
 from __future__ import absolute_import, unicode_literals
 
 import datetime
+import json
 import unittest
 
 import ddt
 import mock
 from freezegun import freeze_time
 from integrated_channels.integrated_channel.learner_data import BaseLearnerExporter
-from integrated_channels.sap_success_factors.models import SAPSuccessFactorsEnterpriseCustomerConfiguration
+from consent.models import DataSharingConsent
+from integrated_channels.sap_success_factors.models import (
+    LearnerDataTransmissionAudit,
+    SAPSuccessFactorsEnterpriseCustomerConfiguration,
+    SAPSuccessFactorsGlobalConfiguration,
+)
 from pytest import mark
 from slumber.exceptions import HttpNotFoundError
 
 from django.utils import timezone
 
+from enterprise.models import EnterpriseCourseEnrollment
 from test_utils.factories import (
     DataSharingConsentFactory,
     EnterpriseCourseEnrollmentFactory,
@@ -55,7 +62,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
             enterprise_customer=self.enterprise_customer,
             granted=True,
         )
-        config = SAPSuccessFactorsEnterpriseCustomerConfiguration(
+        self.config = config = SAPSuccessFactorsEnterpriseCustomerConfiguration(
             enterprise_customer=self.enterprise_customer,
             sapsf_base_url='enterprise.successfactors.com',
             key='key',
@@ -69,6 +76,9 @@ class TestBaseLearnerExporter(unittest.TestCase):
         self.tpa_client = tpa_client_mock.start().return_value
         # Default remote ID
         self.tpa_client.get_remote_id.return_value = 'fake-remote-id'
+        self.tpa_client.get_remote_ids.side_effect = lambda identity_provider, usernames: {
+            username: self.tpa_client.get_remote_id.return_value for username in usernames
+        }
         self.addCleanup(tpa_client_mock.stop)
         self.exporter = config.get_learner_data_exporter('dummy-user')
         assert isinstance(self.exporter, BaseLearnerExporter)
@@ -78,7 +88,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         learner_data = list(self.exporter.collect_learner_data())
         assert not learner_data
 
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     def test_collect_learner_data_without_consent(self, mock_course_api, mock_grades_api, mock_enrollment_api):
@@ -117,7 +127,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         learner_data = list(self.exporter.collect_learner_data())
         assert not learner_data
 
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CertificatesApiClient')
     def test_learner_data_instructor_paced_no_certificate(
@@ -151,7 +161,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         assert report.completed_timestamp is None
         assert report.grade == BaseLearnerExporter.GRADE_INCOMPLETE
 
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CertificatesApiClient')
     def test_learner_data_instructor_paced_no_certificate_null_sso_id(
@@ -180,7 +190,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         learner_data = list(self.exporter.collect_learner_data())
         assert not learner_data
 
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CertificatesApiClient')
     def test_learner_data_instructor_paced_with_certificate(
@@ -223,7 +233,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         assert report.completed_timestamp == self.NOW_TIMESTAMP
         assert report.grade == BaseLearnerExporter.GRADE_PASSING
 
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     def test_learner_data_self_paced_no_grades(self, mock_course_api, mock_grades_api, mock_enrollment_api):
@@ -270,7 +280,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         (False, TOMORROW, None, BaseLearnerExporter.GRADE_INCOMPLETE),
     )
     @ddt.unpack
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     def test_learner_data_self_paced_course(self, passing, end_date, expected_completion, expected_grade,
@@ -314,7 +324,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         ('instructor', BaseLearnerExporter.GRADE_PASSING),
     )
     @ddt.unpack
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CertificatesApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
@@ -430,7 +440,7 @@ class TestBaseLearnerExporter(unittest.TestCase):
         (False, False, 'verified', 1),
     )
     @ddt.unpack
-    @mock.patch('enterprise.models.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
     @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
     def test_learner_data_audit_data_reporting(
@@ -481,3 +491,329 @@ class TestBaseLearnerExporter(unittest.TestCase):
             assert report.course_id == self.course_id
             assert report.course_completed
             assert report.grade == BaseLearnerExporter.GRADE_PASSING
+
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_course_level_consent(self, mock_course_api, mock_grades_api, mock_enrollment_api):
+        course_run_id = 'course-v1:edX+DemoX+DemoCourse2'
+        enrollment = EnterpriseCourseEnrollmentFactory(
+            enterprise_customer_user=self.enterprise_customer_user,
+            course_id=course_run_id,
+        )
+        DataSharingConsentFactory(
+            username=self.user.username,
+            course_id='edX+DemoX',
+            enterprise_customer=self.enterprise_customer,
+            granted=True,
+        )
+        mock_course_api.return_value.get_course_details.return_value = dict(
+            pacing='self',
+            course_id=course_run_id,
+        )
+        mock_grades_api.return_value.get_course_grade.return_value = dict(passed=True)
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        with freeze_time(self.NOW):
+            learner_data = list(self.exporter.collect_learner_data())
+
+        assert [report.enterprise_course_enrollment_id for report in learner_data] == [enrollment.id]
+
+    @ddt.data(1, 2, 4)
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_multiple_workers(self, workers, mock_course_api, mock_grades_api, mock_enrollment_api):
+        enrollments = []
+        for index in range(5):
+            user = UserFactory(username='learner{}'.format(index))
+            enrollments.append(EnterpriseCourseEnrollmentFactory(
+                enterprise_customer_user=EnterpriseCustomerUserFactory(
+                    user_id=user.id,
+                    enterprise_customer=self.enterprise_customer,
+                ),
+                course_id=self.course_id,
+            ))
+            DataSharingConsentFactory(
+                username=user.username,
+                course_id=self.course_id,
+                enterprise_customer=self.enterprise_customer,
+                granted=index != 0,
+            )
+        mock_course_api.return_value.get_course_details.return_value = dict(
+            pacing='self',
+            course_id=self.course_id,
+        )
+        mock_grades_api.return_value.get_course_grade.side_effect = lambda course_id, username: dict(
+            passed=username != 'learner1',
+        )
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        self.exporter.workers = workers
+        with freeze_time(self.NOW):
+            learner_data = list(self.exporter.collect_learner_data())
+
+        assert {report.enterprise_course_enrollment_id: report.grade for report in learner_data} == {
+            enrollments[1].id: BaseLearnerExporter.GRADE_INCOMPLETE,
+            enrollments[2].id: BaseLearnerExporter.GRADE_PASSING,
+            enrollments[3].id: BaseLearnerExporter.GRADE_PASSING,
+            enrollments[4].id: BaseLearnerExporter.GRADE_PASSING,
+        }
+        assert mock_grades_api.return_value.get_course_grade.call_count == 4
+
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_multiple_workers_error(self, mock_course_api, mock_grades_api, mock_enrollment_api):
+        EnterpriseCourseEnrollmentFactory(
+            enterprise_customer_user=self.enterprise_customer_user,
+            course_id=self.course_id,
+        )
+        mock_course_api.return_value.get_course_details.return_value = dict(
+            pacing='self',
+            course_id=self.course_id,
+        )
+        mock_grades_api.return_value.get_course_grade.side_effect = ValueError('Grades API failure')
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        self.exporter.workers = 2
+        with self.assertRaisesRegexp(ValueError, 'Grades API failure'):
+            list(self.exporter.collect_learner_data())
+
+    @staticmethod
+    def _create_transmission_audit(enterprise_enrollment, error_message=''):
+        """
+        Record a transmission of the learner data of the given enrollment.
+        """
+        return LearnerDataTransmissionAudit.objects.create(
+            enterprise_course_enrollment_id=enterprise_enrollment.id,
+            sapsf_user_id='sap_user',
+            course_id=enterprise_enrollment.course_id,
+            completed_timestamp=1486755998000,
+            grade='Pass',
+            status='400' if error_message else '200',
+            error_message=error_message,
+        )
+
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_skips_transmitted_enrollments(self, mock_course_api, mock_grades_api, mock_enrollment_api):
+        transmitted_enrollment = EnterpriseCourseEnrollmentFactory(
+            enterprise_customer_user=self.enterprise_customer_user,
+            course_id=self.course_id,
+        )
+        self._create_transmission_audit(transmitted_enrollment)
+        course_id = 'course-v1:edX+DemoX+OtherCourse'
+        enrollment = EnterpriseCourseEnrollmentFactory(
+            enterprise_customer_user=self.enterprise_customer_user,
+            course_id=course_id,
+        )
+        DataSharingConsentFactory(
+            username=self.user.username,
+            course_id=course_id,
+            enterprise_customer=self.enterprise_customer,
+            granted=True,
+        )
+        mock_course_api.return_value.get_course_details.side_effect = lambda course_id: dict(
+            pacing='self',
+            course_id=course_id,
+        )
+        mock_grades_api.return_value.get_course_grade.return_value = dict(passed=True)
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        with freeze_time(self.NOW):
+            learner_data = list(self.exporter.collect_learner_data())
+
+        assert [report.enterprise_course_enrollment_id for report in learner_data] == [enrollment.id]
+        mock_grades_api.return_value.get_course_grade.assert_called_once_with(course_id, self.user.username)
+
+    @ddt.data(
+        # Nothing changed since the course ended.
+        (False, False, -60, False, False),
+        # The last transmission failed.
+        (False, False, -60, True, True),
+        # The enrollment is new.
+        (True, False, -60, False, True),
+        # The consent was given since the last export.
+        (False, True, -60, False, True),
+        # The course has no end date.
+        (False, False, None, False, True),
+        # The course ended recently, so its grades may still change.
+        (False, False, -10, False, True),
+    )
+    @ddt.unpack
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_incremental(
+            self,
+            new_enrollment,
+            new_consent,
+            course_end_days,
+            failed_transmission,
+            expected_export,
+            mock_course_api,
+            mock_grades_api,
+            mock_enrollment_api,
+    ):
+        last_export = self.YESTERDAY
+        before_last_export = last_export - datetime.timedelta(days=60)
+        enrollment = EnterpriseCourseEnrollmentFactory(
+            enterprise_customer_user=self.enterprise_customer_user,
+            course_id=self.course_id,
+        )
+        EnterpriseCourseEnrollment.objects.filter(pk=enrollment.pk).update(
+            created=self.NOW if new_enrollment else before_last_export
+        )
+        DataSharingConsent.objects.filter(pk=self.data_sharing_consent.pk).update(
+            modified=self.NOW if new_consent else before_last_export
+        )
+        if failed_transmission:
+            self._create_transmission_audit(enrollment, error_message='error')
+
+        course_details = dict(pacing='self', course_id=self.course_id)
+        if course_end_days is not None:
+            course_details['end'] = (self.NOW + datetime.timedelta(days=course_end_days)).isoformat()
+        mock_course_api.return_value.get_course_details.return_value = course_details
+        mock_grades_api.return_value.get_course_grade.return_value = dict(passed=True)
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        exporter = self.config.get_learner_data_exporter('dummy-user', since=last_export)
+        with freeze_time(self.NOW):
+            learner_data = list(exporter.collect_learner_data())
+
+        expected_enrollment_ids = [enrollment.id] if expected_export else []
+        assert [report.enterprise_course_enrollment_id for report in learner_data] == expected_enrollment_ids
+        assert mock_grades_api.return_value.get_course_grade.call_count == len(expected_enrollment_ids)
+
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_loads_remote_ids(self, mock_course_api, mock_grades_api, mock_enrollment_api):
+        course_ids = ['course-v1:edX+DemoX+Course{}'.format(index) for index in range(3)]
+        other_user = UserFactory(username='R2D2')
+        other_enterprise_customer_user = EnterpriseCustomerUserFactory(
+            user_id=other_user.id,
+            enterprise_customer=self.enterprise_customer,
+        )
+        for user, enterprise_customer_user in ((self.user, self.enterprise_customer_user),
+                                               (other_user, other_enterprise_customer_user)):
+            for course_id in course_ids:
+                EnterpriseCourseEnrollmentFactory(
+                    enterprise_customer_user=enterprise_customer_user,
+                    course_id=course_id,
+                )
+                DataSharingConsentFactory(
+                    username=user.username,
+                    course_id=course_id,
+                    enterprise_customer=self.enterprise_customer,
+                    granted=True,
+                )
+        self.tpa_client.get_remote_ids.side_effect = lambda identity_provider, usernames: {
+            username: 'remote-{}'.format(username) for username in usernames if username != 'R2D2'
+        }
+        mock_course_api.return_value.get_course_details.side_effect = lambda course_id: dict(
+            pacing='self',
+            course_id=course_id,
+        )
+        mock_grades_api.return_value.get_course_grade.return_value = dict(passed=True)
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        with freeze_time(self.NOW):
+            learner_data = list(self.exporter.collect_learner_data())
+
+        # The remote IDs of all the learners are looked up at once.
+        self.tpa_client.get_remote_ids.assert_called_once_with(self.idp.provider_id, mock.ANY)
+        assert sorted(self.tpa_client.get_remote_ids.call_args[0][1]) == ['C3PO', 'R2D2']
+        assert self.tpa_client.get_remote_id.call_count == 0
+        assert sorted(report.course_id for report in learner_data) == course_ids
+        assert {report.sapsf_user_id for report in learner_data} == {'remote-C3PO'}
+
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_in_batches(self, mock_course_api, mock_grades_api, mock_enrollment_api):
+        course_ids = ['course-v1:edX+DemoX+Course{}'.format(index) for index in range(3)]
+        other_user = UserFactory(username='R2D2')
+        other_enterprise_customer_user = EnterpriseCustomerUserFactory(
+            user_id=other_user.id,
+            enterprise_customer=self.enterprise_customer,
+        )
+        for user, enterprise_customer_user in ((self.user, self.enterprise_customer_user),
+                                               (other_user, other_enterprise_customer_user)):
+            for course_id in course_ids[:2]:
+                EnterpriseCourseEnrollmentFactory(
+                    enterprise_customer_user=enterprise_customer_user,
+                    course_id=course_id,
+                )
+            DataSharingConsentFactory(
+                username=user.username,
+                course_id='edX+DemoX',
+                enterprise_customer=self.enterprise_customer,
+                granted=user == self.user,
+            )
+        EnterpriseCourseEnrollmentFactory(
+            enterprise_customer_user=other_enterprise_customer_user,
+            course_id=course_ids[2],
+        )
+        mock_course_api.return_value.get_course_details.side_effect = lambda course_id: dict(
+            pacing='self',
+            course_id=course_id,
+        )
+        mock_grades_api.return_value.get_course_grade.return_value = dict(passed=True)
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        with mock.patch.object(self.exporter, 'ENROLLMENTS_BATCH_SIZE', 3):
+            with freeze_time(self.NOW):
+                learner_data = list(self.exporter.collect_learner_data())
+
+        # The enrollments are processed in batches, and the remote IDs of the learners are looked up in the batch
+        # they first appear in.
+        assert [sorted(call[0][1]) for call in self.tpa_client.get_remote_ids.call_args_list] == [['C3PO', 'R2D2']]
+        assert sorted(report.course_id for report in learner_data) == course_ids[:2]
+        assert {report.sapsf_user_id for report in learner_data} == {'fake-remote-id'}
+
+    @mock.patch('integrated_channels.integrated_channel.learner_data.EnrollmentApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.GradesApiClient')
+    @mock.patch('integrated_channels.integrated_channel.learner_data.CourseApiClient')
+    def test_learner_data_provider_id(self, mock_course_api, mock_grades_api, mock_enrollment_api):
+        SAPSuccessFactorsGlobalConfiguration.objects.create(
+            completion_status_api_path='',
+            course_api_path='',
+            oauth_api_path='',
+            provider_id='SAP_PROVIDER',
+            enabled=True,
+        )
+        for index in range(3):
+            course_id = 'course-v1:edX+DemoX+Course{}'.format(index)
+            EnterpriseCourseEnrollmentFactory(
+                enterprise_customer_user=self.enterprise_customer_user,
+                course_id=course_id,
+            )
+            DataSharingConsentFactory(
+                username=self.user.username,
+                course_id=course_id,
+                enterprise_customer=self.enterprise_customer,
+                granted=True,
+            )
+        mock_course_api.return_value.get_course_details.side_effect = lambda course_id: dict(
+            pacing='self',
+            course_id=course_id,
+        )
+        mock_grades_api.return_value.get_course_grade.return_value = dict(passed=True)
+        mock_enrollment_api.return_value.get_course_enrollment.return_value = dict(mode='verified')
+
+        with mock.patch.object(
+            SAPSuccessFactorsGlobalConfiguration,
+            'current',
+            wraps=SAPSuccessFactorsGlobalConfiguration.current,
+        ) as mock_current:
+            with freeze_time(self.NOW):
+                learner_data = list(self.exporter.collect_learner_data())
+            payloads = [json.loads(report.serialize()) for report in learner_data]
+
+        # The global configuration is looked up once for all the records.
+        assert mock_current.call_count == 1
+        assert len(payloads) == 3
+        assert {payload['providerID'] for payload in payloads} == {'SAP_PROVIDER'}
@@ -8,6 +8,7 @@ import datetime
 import json
 import unittest
 
+import ddt
 import mock
 from integrated_channels.sap_success_factors.models import (
     CatalogTransmissionAudit,
@@ -19,9 +20,18 @@ from integrated_channels.sap_success_factors.transmitters import courses, learne
 from pytest import mark
 from requests import RequestException
 
-from test_utils.factories import EnterpriseCustomerFactory
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from test_utils.factories import (
+    EnterpriseCourseEnrollmentFactory,
+    EnterpriseCustomerFactory,
+    EnterpriseCustomerUserFactory,
+)
 
 
+@ddt.ddt
 class TestSuccessFactorsCourseTransmitter(unittest.TestCase):
     """
     Test SuccessFactorsCourseTransmitter.
@@ -60,8 +70,10 @@ class TestSuccessFactorsCourseTransmitter(unittest.TestCase):
         client_mock_instance.send_course_import.return_value = 200, '{"success":"true"}'
         track_selection_reverse_mock.return_value = '/course_modes/choose/course-v1:edX+DemoX+Demo_Course/'
 
-        course_exporter_mock = mock.MagicMock(courses=self.payload)
-        course_exporter_mock.get_serialized_data_blocks.return_value = [(json.dumps(self.payload), 2)]
+        course_exporter_mock = mock.MagicMock()
+        course_exporter_mock.get_serialized_course_blocks.return_value = [
+            (json.dumps(self.payload), ['course1', 'course2'])
+        ]
         course_exporter_mock.resolve_removed_courses.return_value = {}
 
         transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
@@ -71,23 +83,27 @@ class TestSuccessFactorsCourseTransmitter(unittest.TestCase):
 
         client_mock_instance.send_course_import.assert_called_with(json.dumps(self.payload))
         course_exporter_mock.resolve_removed_courses.assert_called_with({})
-        course_exporter_mock.get_serialized_data_blocks.assert_called()
+        course_exporter_mock.get_serialized_course_blocks.assert_called()
         assert catalog_transmission_audit.enterprise_customer_uuid == self.enterprise_config.enterprise_customer.uuid
         assert catalog_transmission_audit.total_courses == len(self.payload)
         assert catalog_transmission_audit.status == '200'
         assert catalog_transmission_audit.error_message == ''
 
     @mark.django_db
+    @override_settings(SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS=1)
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.courses.time.sleep')
     @mock.patch('integrated_channels.sap_success_factors.utils.reverse')
     @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
-    def test_transmit_failure(self, client_mock, track_selection_reverse_mock):
+    def test_transmit_failure(self, client_mock, track_selection_reverse_mock, sleep_mock):
         client_mock.get_oauth_access_token.return_value = "token", datetime.datetime.utcnow()
         client_mock_instance = client_mock.return_value
         client_mock_instance.send_course_import.side_effect = RequestException('error occurred')
         track_selection_reverse_mock.return_value = '/course_modes/choose/course-v1:edX+DemoX+Demo_Course/'
 
-        course_exporter_mock = mock.MagicMock(courses=self.payload)
-        course_exporter_mock.get_serialized_data_blocks.return_value = [(json.dumps(self.payload), 2)]
+        course_exporter_mock = mock.MagicMock()
+        course_exporter_mock.get_serialized_course_blocks.return_value = [
+            (json.dumps(self.payload), ['course1', 'course2'])
+        ]
         course_exporter_mock.resolve_removed_courses.return_value = {}
 
         transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
@@ -95,7 +111,9 @@ class TestSuccessFactorsCourseTransmitter(unittest.TestCase):
         catalog_transmission_audit = transmitter.transmit(course_exporter_mock)
 
         client_mock_instance.send_course_import.assert_called_with(json.dumps(self.payload))
-        course_exporter_mock.get_serialized_data_blocks.assert_called()
+        assert client_mock_instance.send_course_import.call_count == 4
+        assert sleep_mock.call_args_list == [mock.call(1), mock.call(2), mock.call(4)]
+        course_exporter_mock.get_serialized_course_blocks.assert_called()
         course_exporter_mock.resolve_removed_courses.assert_called_with({})
         assert catalog_transmission_audit.enterprise_customer_uuid == self.enterprise_config.enterprise_customer.uuid
         assert catalog_transmission_audit.total_courses == len(self.payload)
@@ -124,8 +142,10 @@ class TestSuccessFactorsCourseTransmitter(unittest.TestCase):
         client_mock_instance = client_mock.return_value
         client_mock_instance.send_course_import.return_value = 200, '{"success":"true"}'
 
-        course_exporter_mock = mock.MagicMock(courses=self.payload)
-        course_exporter_mock.get_serialized_data_blocks.return_value = [(json.dumps(self.payload), 2)]
+        course_exporter_mock = mock.MagicMock()
+        course_exporter_mock.get_serialized_course_blocks.return_value = [
+            (json.dumps(self.payload), ['course1', 'course2'])
+        ]
         course_exporter_mock.resolve_removed_courses.return_value = {}
 
         transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
@@ -135,13 +155,135 @@ class TestSuccessFactorsCourseTransmitter(unittest.TestCase):
 
         client_mock_instance.send_course_import.assert_called_with(json.dumps(self.payload))
         course_exporter_mock.resolve_removed_courses.assert_called_with(audit_summary)
-        course_exporter_mock.get_serialized_data_blocks.assert_called()
+        course_exporter_mock.get_serialized_course_blocks.assert_called()
         assert catalog_transmission_audit.enterprise_customer_uuid == self.enterprise_config.enterprise_customer.uuid
         assert catalog_transmission_audit.total_courses == len(self.payload)
         assert catalog_transmission_audit.status == '200'
         assert catalog_transmission_audit.error_message == ''
 
 
+    def _make_course_exporter(self, block_course_keys, audit_summary):
+        """
+        Build a course exporter mock sending each given list of course keys as a block.
+        """
+        blocks = [[{'courseID': course_key} for course_key in course_keys] for course_keys in block_course_keys]
+        course_exporter_mock = mock.MagicMock()
+        course_exporter_mock.get_serialized_course_blocks.return_value = [
+            (json.dumps(block), [course['courseID'] for course in block]) for block in blocks
+        ]
+        course_exporter_mock.resolve_removed_courses.return_value = audit_summary
+        return course_exporter_mock
+
+    @mark.django_db
+    @override_settings(SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS=1)
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.courses.time.sleep')
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
+    def test_transmit_retries_failed_block(self, client_mock, sleep_mock):
+        client_mock_instance = client_mock.return_value
+        client_mock_instance.send_course_import.side_effect = [
+            (503, 'unavailable'),
+            RequestException('error occurred'),
+            (200, '{"success":"true"}'),
+        ]
+        course_exporter_mock = self._make_course_exporter([['course1']], {})
+
+        transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
+        catalog_transmission_audit = transmitter.transmit(course_exporter_mock)
+
+        assert client_mock_instance.send_course_import.call_count == 3
+        assert sleep_mock.call_args_list == [mock.call(1), mock.call(2)]
+        assert catalog_transmission_audit.status == '200'
+        assert catalog_transmission_audit.error_message == ''
+
+    @mark.django_db
+    @override_settings(SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS=1)
+    @override_settings(SAP_SUCCESSFACTORS_COURSE_BLOCK_MAX_RETRIES=1)
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.courses.time.sleep')
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
+    def test_transmit_gives_up_retrying(self, client_mock, sleep_mock):
+        client_mock_instance = client_mock.return_value
+        client_mock_instance.send_course_import.return_value = 503, 'unavailable'
+        course_exporter_mock = self._make_course_exporter([['course1']], {})
+
+        transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
+        catalog_transmission_audit = transmitter.transmit(course_exporter_mock)
+
+        assert client_mock_instance.send_course_import.call_count == 2
+        assert sleep_mock.call_count == 1
+        assert catalog_transmission_audit.status == '503'
+        assert catalog_transmission_audit.error_message == 'unavailable'
+
+    @mark.django_db
+    @override_settings(SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS=1)
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.courses.time.sleep')
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
+    def test_transmit_does_not_retry_client_error(self, client_mock, sleep_mock):
+        client_mock_instance = client_mock.return_value
+        client_mock_instance.send_course_import.return_value = 400, 'bad request'
+        course_exporter_mock = self._make_course_exporter([['course1']], {})
+
+        transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
+        catalog_transmission_audit = transmitter.transmit(course_exporter_mock)
+
+        assert client_mock_instance.send_course_import.call_count == 1
+        sleep_mock.assert_not_called()
+        assert catalog_transmission_audit.status == '400'
+
+    @mark.django_db
+    @ddt.data(1, 2, 4)
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
+    def test_transmit_partial_failure(self, workers, client_mock):
+        previous_audit_summary = {
+            'course2': {'in_catalog': True, 'status': 'ACTIVE'},
+            'removed_course': {'in_catalog': True, 'status': 'ACTIVE'},
+        }
+        CatalogTransmissionAudit.objects.create(
+            enterprise_customer_uuid=self.enterprise_config.enterprise_customer.uuid,
+            total_courses=2,
+            status='200',
+            error_message='',
+            audit_summary=json.dumps(previous_audit_summary),
+        )
+        audit_summary = {
+            'course1': {'in_catalog': True, 'status': 'ACTIVE'},
+            'course2': {'in_catalog': True, 'status': 'INACTIVE'},
+            'course3': {'in_catalog': True, 'status': 'ACTIVE'},
+            'removed_course': {'in_catalog': False, 'status': 'INACTIVE'},
+        }
+        course_exporter_mock = self._make_course_exporter(
+            [['course1'], ['course2', 'course3'], ['removed_course']],
+            audit_summary,
+        )
+        failed_payload = json.dumps([{'courseID': 'course2'}, {'courseID': 'course3'}])
+        client_mock_instance = client_mock.return_value
+        client_mock_instance.send_course_import.side_effect = lambda payload: (
+            (400, 'bad request') if payload == failed_payload else (200, '{"success":"true"}')
+        )
+
+        transmitter = courses.SuccessFactorsCourseTransmitter(self.enterprise_config)
+        with override_settings(SAP_SUCCESSFACTORS_COURSE_BLOCK_WORKERS=workers):
+            catalog_transmission_audit = transmitter.transmit(course_exporter_mock)
+
+        assert client_mock_instance.send_course_import.call_count == 3
+        assert catalog_transmission_audit.status == '200, 400, 200'
+        assert catalog_transmission_audit.error_message == 'bad request'
+        # The courses of the failed block are left as they were after the previous transmission.
+        assert json.loads(catalog_transmission_audit.audit_summary) == {
+            'course1': {'in_catalog': True, 'status': 'ACTIVE'},
+            'course2': {'in_catalog': True, 'status': 'ACTIVE'},
+            'removed_course': {'in_catalog': False, 'status': 'INACTIVE'},
+        }
+
+        # The next transmission starts from the partially failed one.
+        course_exporter_mock = self._make_course_exporter([['course2', 'course3']], {})
+        client_mock_instance.send_course_import.side_effect = None
+        client_mock_instance.send_course_import.return_value = 200, '{"success":"true"}'
+        transmitter.transmit(course_exporter_mock)
+        course_exporter_mock.resolve_removed_courses.assert_called_with(
+            json.loads(catalog_transmission_audit.audit_summary)
+        )
+
+
 class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
     """
     Test SuccessFactorsLearnerDataTransmitter.
@@ -156,13 +298,36 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
             oauth_api_path=""
         )
 
+        enterprise_customer = EnterpriseCustomerFactory()
         self.enterprise_config = SAPSuccessFactorsEnterpriseCustomerConfiguration(
+            enterprise_customer=enterprise_customer,
             key="client_id",
             sapsf_base_url="http://test.successfactors.com/",
             sapsf_company_id="company_id",
             sapsf_user_id="user_id",
             secret="client_secret"
         )
+        self.enrollment_ids = [
+            EnterpriseCourseEnrollmentFactory(
+                enterprise_customer_user=EnterpriseCustomerUserFactory(enterprise_customer=enterprise_customer),
+            ).id
+            for __ in range(5)
+        ]
+
+    def get_payload(self, enterprise_course_enrollment_id, **kwargs):
+        """
+        Return learner data for the given enterprise enrollment, to transmit.
+        """
+        return LearnerDataTransmissionAudit(
+            enterprise_course_enrollment_id=enterprise_course_enrollment_id,
+            sapsf_user_id='sap_user',
+            course_id='course-v1:edX+DemoX+DemoCourse',
+            course_completed=True,
+            completed_timestamp=1486755998,
+            instructor_name='Professor Professorson',
+            grade='Pass',
+            **kwargs
+        )
 
     @mark.django_db
     @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
@@ -171,7 +336,7 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
         client_mock_instance = client_mock.return_value
 
         payload = LearnerDataTransmissionAudit(
-            enterprise_course_enrollment_id=5,
+            enterprise_course_enrollment_id=self.enrollment_ids[0],
             sapsf_user_id='sap_user',
             course_id='course-v1:edX+DemoX+DemoCourse',
             course_completed=True,
@@ -199,7 +364,7 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
         client_mock_instance = client_mock.return_value
 
         previous_payload = LearnerDataTransmissionAudit(
-            enterprise_course_enrollment_id=5,
+            enterprise_course_enrollment_id=self.enrollment_ids[0],
             sapsf_user_id='sap_user',
             course_id='course-v1:edX+DemoX+DemoCourse',
             course_completed=True,
@@ -211,7 +376,7 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
         previous_payload.save()
 
         payload = LearnerDataTransmissionAudit(
-            enterprise_course_enrollment_id=5,
+            enterprise_course_enrollment_id=self.enrollment_ids[0],
             sapsf_user_id='sap_user',
             course_id='course-v1:edX+DemoX+DemoCourse',
             course_completed=True,
@@ -233,7 +398,7 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
         client_mock_instance.send_completion_status.return_value = 200, '{"success":"true"}'
 
         payload = LearnerDataTransmissionAudit(
-            enterprise_course_enrollment_id=5,
+            enterprise_course_enrollment_id=self.enrollment_ids[0],
             sapsf_user_id='sap_user',
             course_id='course-v1:edX+DemoX+DemoCourse',
             course_completed=True,
@@ -258,7 +423,7 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
         client_mock_instance.send_completion_status.side_effect = RequestException('error occurred')
 
         payload = LearnerDataTransmissionAudit(
-            enterprise_course_enrollment_id=5,
+            enterprise_course_enrollment_id=self.enrollment_ids[0],
             sapsf_user_id='sap_user',
             course_id='course-v1:edX+DemoX+DemoCourse',
             course_completed=True,
@@ -274,3 +439,60 @@ class TestSuccessFactorsLearnerDataTransmitter(unittest.TestCase):
         )
         assert transmission_audit.status == '500'
         assert transmission_audit.error_message == 'error occurred'
+
+    @mark.django_db
+    @override_settings(SAP_SUCCESSFACTORS_LEARNER_DATA_AUDIT_BATCH_SIZE=2)
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
+    def test_transmit_saves_audits_in_batches(self, client_mock):
+        client_mock_instance = client_mock.return_value
+        client_mock_instance.send_completion_status.return_value = 200, '{"success":"true"}'
+        self.get_payload(self.enrollment_ids[0], status='200', error_message='').save()
+        self.get_payload(self.enrollment_ids[1], status='500', error_message='error occurred').save()
+
+        transmitter = learner_data.SuccessFactorsLearnerDataTransmitter(self.enterprise_config)
+        with CaptureQueriesContext(connection) as captured_queries:
+            transmitted = [
+                transmitter.transmit(self.get_payload(enrollment_id))
+                for enrollment_id in self.enrollment_ids + self.enrollment_ids[-1:]
+            ]
+            transmitter.flush()
+
+        # The successful transmissions are loaded once, and the audits are saved two at a time.
+        audit_queries = [
+            query['sql'] for query in captured_queries.captured_queries
+            if 'sap_success_factors_learnerdatatransmissionaudit' in query['sql']
+        ]
+        assert len(audit_queries) == 3
+        assert len([query for query in audit_queries if 'INSERT INTO' in query]) == 2
+        assert [payload is not None for payload in transmitted] == [False, True, True, True, True, False]
+        assert client_mock_instance.send_completion_status.call_count == 4
+        assert transmitter.pending_audits == []
+        assert sorted(
+            LearnerDataTransmissionAudit.objects.filter(status='200').values_list(
+                'enterprise_course_enrollment_id',
+                flat=True,
+            )
+        ) == sorted(self.enrollment_ids)
+
+    @mark.django_db
+    @mock.patch('integrated_channels.sap_success_factors.transmitters.SAPSuccessFactorsAPIClient')
+    def test_transmit_learner_data_saves_audits_when_interrupted(self, client_mock):
+        client_mock.return_value.send_completion_status.return_value = 200, '{"success":"true"}'
+        self.enterprise_config.active = True
+        self.enterprise_config.save()
+
+        def collect_learner_data():
+            """
+            Learner data whose collection fails after the first record.
+            """
+            yield self.get_payload(self.enrollment_ids[0])
+            raise Exception('Collection failed')
+
+        with mock.patch.object(self.enterprise_config, 'get_learner_data_exporter') as exporter_mock:
+            exporter_mock.return_value.collect_learner_data.side_effect = collect_learner_data
+            with self.assertRaises(Exception):
+                self.enterprise_config.transmit_learner_data(mock.Mock())
+
+        assert list(
+            LearnerDataTransmissionAudit.objects.values_list('enterprise_course_enrollment_id', flat=True)
+        ) == self.enrollment_ids[:1]
@@ -5,18 +5,35 @@ Tests for the `edx-enterprise` utility functions.
 from __future__ import absolute_import, unicode_literals
 
 import datetime
+import json
+import os
+import time
 import unittest
 
 import ddt
 import mock
 from faker import Factory as FakerFactory
 from integrated_channels.integrated_channel.course_metadata import BaseCourseExporter
-from integrated_channels.sap_success_factors.models import SAPSuccessFactorsEnterpriseCustomerConfiguration
-from integrated_channels.sap_success_factors.utils import SapCourseExporter, get_launch_url
+from integrated_channels.sap_success_factors import utils as sap_utils
+from integrated_channels.sap_success_factors.models import (
+    SAPSuccessFactorsEnterpriseCustomerConfiguration,
+    SAPSuccessFactorsGlobalConfiguration,
+)
+from integrated_channels.sap_success_factors.utils import (
+    SapCourseExporter,
+    SapCourseTransformContext,
+    get_course_content_hash,
+    get_launch_url,
+)
 from pytest import mark, raises
 
 from django.core import mail
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.http import Http404
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from enterprise import utils
 from enterprise.models import (
@@ -27,6 +44,7 @@ from enterprise.models import (
 )
 from test_utils import TEST_UUID, assert_url, create_items
 from test_utils.factories import (
+    EnterpriseCustomerCatalogFactory,
     EnterpriseCustomerFactory,
     EnterpriseCustomerIdentityProviderFactory,
     EnterpriseCustomerUserFactory,
@@ -34,6 +52,7 @@ from test_utils.factories import (
     SiteFactory,
     UserFactory,
 )
+from test_utils.fake_catalog_api import get_fake_course_runs
 
 
 def mock_get_available_idps(idps):
@@ -122,7 +141,9 @@ class TestEnterpriseUtils(unittest.TestCase):
                 "enterprise_customer_catalogs",
                 "enterprise_enrollment_template",
                 "enterprisecustomerreportingconfiguration",
+                "bulk_enrollment_jobs",
                 "enterprise_customer_consent",
+                "learnerdataexportwatermark",
                 "sapsuccessfactorsenterprisecustomerconfiguration",
                 "created",
                 "modified",
@@ -269,6 +290,86 @@ class TestEnterpriseUtils(unittest.TestCase):
         )
         assert utils.get_enterprise_customer_user(user.id, enterprise_customer.uuid) == enterprise_customer_user
 
+    def _create_enterprise_customer_with_related_records(self):
+        """
+        Create an enterprise customer with an identity provider, a branding configuration and a catalog.
+        """
+        enterprise_customer = EnterpriseCustomerFactory()
+        EnterpriseCustomerIdentityProviderFactory(enterprise_customer=enterprise_customer, provider_id='saml-idp')
+        EnterpriseCustomerBrandingConfiguration(enterprise_customer=enterprise_customer).save()
+        EnterpriseCustomerCatalogFactory(enterprise_customer=enterprise_customer)
+        return enterprise_customer
+
+    def _get_enterprise_customer_details(self, enterprise_uuid):
+        """
+        Look up the enterprise customer the way the enterprise views do, and access its related records.
+        """
+        enterprise_customer = utils.get_enterprise_customer_or_404(str(enterprise_uuid))
+        return (
+            enterprise_customer.identity_provider,
+            enterprise_customer.branding_configuration.id,
+            len(enterprise_customer.enterprise_customer_catalogs.all()),
+        )
+
+    def test_enterprise_customer_lookups_memoized_per_request(self):
+        enterprise_customer = self._create_enterprise_customer_with_related_records()
+        user = UserFactory()
+        self.addCleanup(request_finished.send, sender=None)
+        request_started.send(sender=None)
+
+        with CaptureQueriesContext(connection) as captured_queries:
+            for __ in range(3):
+                details = self._get_enterprise_customer_details(enterprise_customer.uuid)
+                assert utils.get_enterprise_customer(enterprise_customer.uuid) is \
+                    utils.get_enterprise_customer_or_404(str(enterprise_customer.uuid))
+                assert utils.get_enterprise_customer_user(user.id, enterprise_customer.uuid) is None
+                assert utils.get_enterprise_customer_for_user(user) is None
+
+        # The customer with its related records, its catalogs, and each of the user lookups are queried once.
+        assert details[0] == 'saml-idp'
+        assert details[2] == 1
+        assert len(captured_queries) == 4
+
+        # The request cache is cleared as soon as the enterprise customer users change.
+        enterprise_customer_user = EnterpriseCustomerUserFactory(
+            user_id=user.id,
+            enterprise_customer=enterprise_customer,
+        )
+        assert utils.get_enterprise_customer_user(user.id, enterprise_customer.uuid) == enterprise_customer_user
+        assert utils.get_enterprise_customer_for_user(user) == enterprise_customer
+
+        # Nothing is memoized after the request finished.
+        request_finished.send(sender=None)
+        with CaptureQueriesContext(connection) as captured_queries:
+            for __ in range(2):
+                self._get_enterprise_customer_details(enterprise_customer.uuid)
+        assert len(captured_queries) == 4
+
+    @override_settings(ENTERPRISE_CUSTOMER_CACHE_TIMEOUT=60)
+    def test_enterprise_customer_cached_across_requests(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        enterprise_customer = self._create_enterprise_customer_with_related_records()
+
+        with CaptureQueriesContext(connection) as captured_queries:
+            for __ in range(3):
+                details = self._get_enterprise_customer_details(enterprise_customer.uuid)
+        assert details == ('saml-idp', enterprise_customer.branding_configuration.id, 1)
+        assert len(captured_queries) == 2
+        assert cache.get('enterprise_customer:{}'.format(enterprise_customer.uuid)) == enterprise_customer
+
+        # Changes to the enterprise customer, or to its related records, evict it from the cache.
+        EnterpriseCustomerIdentityProvider.objects.filter(enterprise_customer=enterprise_customer).delete()
+        assert self._get_enterprise_customer_details(enterprise_customer.uuid)[0] is None
+
+        enterprise_customer.name = 'Renamed Enterprise'
+        enterprise_customer.save()
+        assert utils.get_enterprise_customer_or_404(str(enterprise_customer.uuid)).name == 'Renamed Enterprise'
+
+        enterprise_customer.delete()
+        with raises(Http404):
+            utils.get_enterprise_customer_or_404(str(enterprise_customer.uuid))
+
     @ddt.data(
         (
             {'class': PendingEnterpriseCustomerUserFactory, 'user_email': 'john@smith.com'},
@@ -1121,6 +1222,17 @@ def get_transformed_course_metadata(course_id, status):
     }
 
 
+def get_course_summary(course_id, status):
+    """
+    Return the expected audit summary of a transformed course for TestSAPSuccessFactorsUtils tests.
+    """
+    return {
+        'in_catalog': True,
+        'status': status,
+        'content_hash': get_course_content_hash(get_transformed_course_metadata(course_id, status)),
+    }
+
+
 @mark.django_db
 @ddt.ddt
 class TestSAPSuccessFactorsUtils(unittest.TestCase):
@@ -1156,7 +1268,7 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             {},
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
             },
             # expected courses
             [
@@ -1176,8 +1288,8 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             },
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
-                'course2': {'in_catalog': True, 'status': 'INACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
+                'course2': get_course_summary('course2', 'INACTIVE'),
             },
             # expected courses
             [
@@ -1198,8 +1310,8 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             },
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
-                'course2': {'in_catalog': True, 'status': 'INACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
+                'course2': get_course_summary('course2', 'INACTIVE'),
             },
             # expected courses
             [
@@ -1219,7 +1331,7 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             },
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
             },
             # expected courses
             [
@@ -1238,7 +1350,7 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             },
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
                 'course2': {'in_catalog': False, 'status': 'INACTIVE'},
             },
             # expected courses
@@ -1274,8 +1386,8 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             },
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
-                'course2': {'in_catalog': True, 'status': 'ACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
+                'course2': get_course_summary('course2', 'ACTIVE'),
             },
             # expected courses
             [
@@ -1295,8 +1407,8 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
             },
             # expected audit summary
             {
-                'course1': {'in_catalog': True, 'status': 'ACTIVE'},
-                'course2': {'in_catalog': True, 'status': 'ACTIVE'},
+                'course1': get_course_summary('course1', 'ACTIVE'),
+                'course2': get_course_summary('course2', 'ACTIVE'),
             },
             # expected courses
             [
@@ -1304,6 +1416,27 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
                 get_transformed_course_metadata('course2', SapCourseExporter.STATUS_ACTIVE),
             ],
         ),
+        (
+            # course runs
+            [
+                {'key': 'course1', 'availability': 'Current'},
+                {'key': 'course2', 'availability': 'Current'},
+            ],
+            # previous audit summary
+            {
+                'course1': get_course_summary('course1', 'ACTIVE'),
+                'course2': dict(get_course_summary('course2', 'ACTIVE'), content_hash='outdated'),
+            },
+            # expected audit summary
+            {
+                'course1': get_course_summary('course1', 'ACTIVE'),
+                'course2': get_course_summary('course2', 'ACTIVE'),
+            },
+            # expected courses
+            [
+                get_transformed_course_metadata('course2', SapCourseExporter.STATUS_ACTIVE),
+            ],
+        ),
     )
     @ddt.unpack
     def test_resolve_removed_courses(
@@ -1320,13 +1453,112 @@ class TestSAPSuccessFactorsUtils(unittest.TestCase):
         course_exporter = SapCourseExporter(self.user, self.plugin_configuration)
 
         audit_summary = course_exporter.resolve_removed_courses(previous_audit_summary)
+        courses = [
+            course
+            for serialized_block, __ in course_exporter.get_serialized_course_blocks()
+            for course in json.loads(serialized_block.decode('utf-8'))['ocnCourses']
+        ]
         assert audit_summary == expected_audit_summary
         assert course_exporter.removed_courses_resolved
-        assert course_exporter.courses == expected_courses
+        assert courses == expected_courses
 
         second_audit_summary = course_exporter.resolve_removed_courses(previous_audit_summary)
         assert second_audit_summary == {}
 
+    @mock.patch('integrated_channels.integrated_channel.course_metadata.get_course_runs')
+    @mock.patch('integrated_channels.sap_success_factors.utils.get_launch_url')
+    def test_serialized_course_blocks_are_streamed(self, get_course_url_mock, get_course_runs_mock):
+        get_course_url_mock.return_value = ''
+        retrieved_course_keys = []
+
+        def get_course_runs(user, enterprise_customer):  # pylint: disable=unused-argument
+            """
+            Record each course run as it is retrieved.
+            """
+            for index in range(5):
+                retrieved_course_keys.append('course{}'.format(index))
+                yield {'key': 'course{}'.format(index), 'availability': 'Current'}
+
+        get_course_runs_mock.side_effect = get_course_runs
+        course_exporter = SapCourseExporter(self.user, self.plugin_configuration)
+        course_exporter.CHUNK_PAGE_LENGTH = 2
+        audit_summary = course_exporter.resolve_removed_courses({})
+        blocks = course_exporter.get_serialized_course_blocks()
+
+        # Course runs are only retrieved as the blocks they belong to are generated.
+        assert not retrieved_course_keys
+        serialized_block, course_keys = next(blocks)
+        assert course_keys == ['course0', 'course1']
+        assert retrieved_course_keys == ['course0', 'course1']
+        assert [course['courseID'] for course in json.loads(serialized_block.decode('utf-8'))['ocnCourses']] == [
+            'course0', 'course1'
+        ]
+        assert [course_keys for __, course_keys in blocks] == [['course2', 'course3'], ['course4']]
+        assert audit_summary == {
+            'course{}'.format(index): get_course_summary('course{}'.format(index), 'ACTIVE') for index in range(5)
+        }
+
+    @mock.patch('integrated_channels.integrated_channel.course_metadata.get_course_runs')
+    def test_serialized_data_blocks_without_courses(self, get_course_runs_mock):
+        get_course_runs_mock.return_value = []
+        course_exporter = SapCourseExporter(self.user, self.plugin_configuration)
+        assert list(course_exporter.get_serialized_data_blocks()) == [(b'{"ocnCourses": []}', 0)]
+
+    def _export_catalog(self, get_course_runs_mock, num_courses):
+        """
+        Export a catalog of ``num_courses`` courses, and return the size of each block and the lookup mocks.
+        """
+        get_course_runs_mock.return_value = get_fake_course_runs(num_courses)
+        with mock.patch.object(
+            SAPSuccessFactorsGlobalConfiguration,
+            'current',
+            wraps=SAPSuccessFactorsGlobalConfiguration.current,
+        ) as mock_current, mock.patch.object(
+            sap_utils,
+            'get_launch_url',
+            wraps=sap_utils.get_launch_url,
+        ) as mock_get_launch_url:
+            course_exporter = SapCourseExporter(self.user, self.plugin_configuration)
+            block_sizes = [len(course_keys) for __, course_keys in course_exporter.get_serialized_course_blocks()]
+        return block_sizes, mock_current, mock_get_launch_url
+
+    @mock.patch.object(SapCourseExporter, 'CHUNK_PAGE_LENGTH', 10)
+    @mock.patch('integrated_channels.integrated_channel.course_metadata.get_course_runs')
+    def test_export_catalog_looks_up_shared_details_once(self, get_course_runs_mock):
+        """
+        The details shared by the courses of a catalog are only looked up once, whatever its size.
+        """
+        block_sizes, mock_current, mock_get_launch_url = self._export_catalog(get_course_runs_mock, 25)
+
+        assert block_sizes == [10, 10, 5]
+        assert mock_current.call_count == 1
+        assert mock_get_launch_url.call_count == 1
+
+    @mark.skipif(
+        not os.environ.get('ENTERPRISE_BENCHMARKS'),
+        reason='Benchmarks only run when the ENTERPRISE_BENCHMARKS environment variable is set.',
+    )
+    @mock.patch('integrated_channels.integrated_channel.course_metadata.get_course_runs')
+    def test_export_large_catalog_benchmark(self, get_course_runs_mock):
+        """
+        Benchmark the export of a 50,000 course catalog, which must take less than a minute.
+        """
+        start = time.time()
+        block_sizes, __, __ = self._export_catalog(get_course_runs_mock, 50000)
+
+        assert time.time() - start < 60
+        assert block_sizes == [SapCourseExporter.CHUNK_PAGE_LENGTH] * 50
+
+    @ddt.data(
+        'course-v1:edX+DemoX+Demo_Course',
+        'edX/DemoX/Demo_Course',
+        'course-v1:edX+DemoX+Demo Course~2017',
+    )
+    def test_transform_context_launch_url(self, course_id):
+        transform_context = SapCourseTransformContext(self.customer)
+        assert transform_context.get_launch_url(course_id) == get_launch_url(self.customer, course_id)
+        assert transform_context.get_launch_url(course_id, 'http://enroll.here/') == 'http://enroll.here/'
+
     @ddt.data(
         (
             {